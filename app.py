@@ -1,15 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
 from datetime import datetime, timedelta
 from portfolio_optimizer import PortfolioOptimizer
 from risk_metrics import RiskMetrics
 from data_fetcher import DataFetcher
 from portfolio_calculations import calculate_portfolio_value
+from preprocessing import align_prices, compute_returns
+from profiling import profiler
+from stage_cache import StageCache, fingerprint
+from stress_testing import HISTORICAL_WINDOWS, StressEngine
 from utils import (
-    calculate_simple_returns,
     format_weights,
     format_percentage,
     annualize_return,
@@ -61,12 +62,20 @@ if 'price_data' not in st.session_state:
     st.session_state.price_data = None
 if 'returns_data' not in st.session_state:
     st.session_state.returns_data = None
+if 'stage_cache' not in st.session_state:
+    # Pipeline stages are memoized per session, keyed by a hash of their inputs
+    st.session_state.stage_cache = StageCache()
+stage_cache = st.session_state.stage_cache
 
-# Initialize data fetcher
-fetcher = DataFetcher()
+# Initialize data fetcher once per session (price history is cached on disk between
+# sessions); its provider clients are created on first use and reused across reruns
+if 'fetcher' not in st.session_state:
+    st.session_state.fetcher = DataFetcher()
+fetcher = st.session_state.fetcher
 
 # Sidebar - Input parameters
 st.sidebar.title("Portfolio Inputs")
+fetcher.offline = st.sidebar.checkbox("Offline mode (cached prices only)", value=fetcher.offline)
 
 # Date range selection
 end_date = datetime.today()
@@ -80,12 +89,14 @@ with col2:
 
 # Ticker input
 st.sidebar.subheader("Asset Selection")
-ticker_input = st.sidebar.text_input("Enter ticker symbol (e.g., AAPL)", "")
+ticker_input = st.sidebar.text_input("Enter ticker symbol or company name (e.g., AAPL, Apple)", "")
 
 if ticker_input:
     search_results = fetcher.get_available_tickers(ticker_input)
     if search_results:
-        selected_ticker = st.sidebar.selectbox("Select from available tickers", search_results)
+        selected_ticker = st.sidebar.selectbox(
+            "Select from available tickers", search_results, format_func=fetcher.ticker_label
+        )
         if st.sidebar.button("Add to portfolio"):
             if selected_ticker not in st.session_state.tickers:
                 st.session_state.tickers.append(selected_ticker)
@@ -137,7 +148,10 @@ if st.session_state.tickers and st.sidebar.button("Fetch Data"):
                 end_date.strftime('%Y-%m-%d')
             )
             st.session_state.price_data = price_data
-            st.session_state.returns_data = calculate_simple_returns(price_data)
+            st.session_state.returns_data = stage_cache.get_or_compute(
+                'returns', fingerprint(price_data), lambda: compute_returns(price_data, 'simple')
+            )
+            st.session_state.returns_key = fingerprint(st.session_state.returns_data)
             
             # Get current prices for holdings calculation
             current_prices = fetcher.get_current_prices(st.session_state.tickers)
@@ -159,6 +173,9 @@ if st.session_state.price_data is None:
     st.warning("Click 'Fetch Data' in the sidebar to load price data.")
     st.stop()
 
+# Charts are only drawn once prices are loaded, so plotly is imported here
+import plotly.express as px
+
 # Display price chart
 st.subheader("Asset Price Trends")
 fig = px.line(st.session_state.price_data, title="Normalized Price History")
@@ -168,12 +185,39 @@ st.plotly_chart(fig, use_container_width=True)
 # Portfolio optimization section
 st.subheader("Portfolio Optimization")
 
-# Create optimizer and risk metrics instances
-optimizer = PortfolioOptimizer(st.session_state.returns_data)
-risk_metrics = RiskMetrics(st.session_state.returns_data)
+# Covariance backend used by every optimization below
+covariance_estimators = {
+    "Sample": "sample",
+    "Ledoit-Wolf Shrinkage": "ledoit_wolf",
+    "Exponentially Weighted": "ewma",
+    "Factor Model (PCA)": "factor"
+}
+covariance_method = covariance_estimators[st.selectbox("Covariance Estimator", list(covariance_estimators))]
+
+# Create optimizer and risk metrics instances, reused until their inputs change
+returns_data = st.session_state.returns_data
+returns_key = st.session_state.get('returns_key') or fingerprint(returns_data)
+model_key = fingerprint(returns_key, covariance_method)
+optimizer = stage_cache.get_or_compute(
+    'moments', model_key, lambda: PortfolioOptimizer(returns_data, covariance=covariance_method)
+)
+risk_metrics = stage_cache.get_or_compute('risk_model', returns_key, lambda: RiskMetrics(returns_data))
+
+def correlation_clusters():
+    """
+    Correlation matrix, its hierarchical clustering and quasi-diagonal asset
+    order, recomputed only when the returns change
+    """
+    # scipy.cluster is slow to import, so hrp is only loaded once clusters are needed
+    from hrp import cluster_assets, quasi_diagonal_order
 
-# Calculate equal weight portfolio first
-equal_weight_result = optimizer.equal_weight_portfolio()
+    def cluster():
+        linkage = cluster_assets(corr.values)
+        return linkage, quasi_diagonal_order(linkage)
+
+    corr = stage_cache.get_or_compute('correlation', returns_key, risk_metrics.calculate_correlation_matrix)
+    linkage, order = stage_cache.get_or_compute('linkage', returns_key, cluster)
+    return corr, linkage, order
 
 # Optimization strategy selection
 risk_free_rate = st.number_input(
@@ -185,7 +229,8 @@ risk_free_rate = st.number_input(
 ) / 100
 strategy = st.selectbox(
     "Optimization Strategy",
-    ["Equal Weight", "Minimum Variance", "Maximum Sharpe Ratio"]
+    ["Equal Weight", "Minimum Variance", "Maximum Sharpe Ratio", "Constrained Minimum Variance",
+     "Risk Parity", "Minimum CVaR", "Hierarchical Risk Parity"]
 )
 
 # ====== NEW CODE STARTS HERE ======
@@ -204,23 +249,76 @@ else:
 # Add a checkbox to choose between custom weights and optimization
 use_custom_weights = st.checkbox("Use my current shareholdings as weights", value=True)
 
-if use_custom_weights and initial_weights is not None:
-    result = {
-        'weights': initial_weights,
-        'return': np.sum(st.session_state.returns_data.mean() * initial_weights),
-        'volatility': np.sqrt(np.dot(initial_weights.T, 
-                                   np.dot(st.session_state.returns_data.cov(), 
-                                          initial_weights)))
-    }
-    st.info("Using your current shareholdings to calculate portfolio weights")
-else:
-    # Original optimization code
+# Position, cardinality and turnover limits for the constrained strategy
+constraint_spec = {}
+if strategy == "Constrained Minimum Variance":
+    with st.expander("Constraints", expanded=True):
+        constraint_spec['upper_bounds'] = st.slider(
+            "Maximum weight per asset (%)", min_value=5, max_value=100, value=100, step=5
+        ) / 100
+        max_assets = st.number_input(
+            "Maximum number of assets (0 = no limit)", min_value=0, max_value=len(st.session_state.tickers), value=0
+        )
+        if max_assets:
+            constraint_spec['max_assets'] = int(max_assets)
+        if initial_weights is not None and st.checkbox("Limit turnover from current holdings"):
+            constraint_spec['turnover_limit'] = st.slider(
+                "Maximum turnover (%)", min_value=0, max_value=200, value=50, step=5
+            ) / 100
+            constraint_spec['current_weights'] = initial_weights
+
+# Tail level and scenario source for the minimum CVaR strategy
+cvar_settings = {}
+if strategy == "Minimum CVaR":
+    with st.expander("CVaR Settings", expanded=True):
+        cvar_settings['alpha'] = 1 - st.select_slider(
+            "Confidence level", options=[0.90, 0.95, 0.975, 0.99], value=0.95
+        )
+        cvar_settings['scenarios'] = st.radio(
+            "Scenarios", ["Historical", "Simulated (10,000 paths)"], horizontal=True
+        )
+
+def run_optimization() -> dict:
+    if use_custom_weights and initial_weights is not None:
+        return {
+            'weights': initial_weights,
+            'return': np.sum(optimizer.mean_returns * initial_weights),
+            'volatility': np.sqrt(np.dot(initial_weights.T,
+                                       np.dot(optimizer.cov_matrix, initial_weights)))
+        }
     if strategy == "Equal Weight":
-        result = optimizer.equal_weight_portfolio()
+        return optimizer.equal_weight_portfolio()
     elif strategy == "Minimum Variance":
-        result = optimizer.min_variance()
+        return optimizer.min_variance()
     elif strategy == "Maximum Sharpe Ratio":
-        result = optimizer.max_sharpe_ratio(risk_free_rate)
+        return optimizer.max_sharpe_ratio(risk_free_rate)
+    elif strategy == "Constrained Minimum Variance":
+        return optimizer.constrained(constraint_spec, risk_free_rate=risk_free_rate)
+    elif strategy == "Risk Parity":
+        return optimizer.risk_parity(risk_free_rate=risk_free_rate)
+    elif strategy == "Minimum CVaR":
+        method = 'historical' if cvar_settings['scenarios'] == "Historical" else 'simulated'
+        return optimizer.min_cvar(alpha=cvar_settings['alpha'], scenarios=risk_metrics.scenarios(method),
+                                  risk_free_rate=risk_free_rate)
+    elif strategy == "Hierarchical Risk Parity":
+        return optimizer.hrp(linkage=correlation_clusters()[1], risk_free_rate=risk_free_rate)
+
+custom = use_custom_weights and initial_weights is not None
+result = stage_cache.get_or_compute(
+    'optimization',
+    fingerprint(model_key, custom, initial_weights if custom else strategy, risk_free_rate, constraint_spec,
+                cvar_settings),
+    run_optimization
+)
+if custom:
+    st.info("Using your current shareholdings to calculate portfolio weights")
+elif 'solve_stats' in result:
+    stats = result['solve_stats']
+    st.caption(f"Solved with {stats['solver']} in {stats['solve_time'] * 1000:.0f} ms "
+               f"({stats['solves']} solve{'s' if stats['solves'] != 1 else ''}, status {stats['status']})")
+elif 'cvar' in result:
+    st.caption(f"Daily VaR {format_percentage(result['var'])}, "
+               f"CVaR {format_percentage(result['cvar'])} at {1 - cvar_settings['alpha']:.1%} confidence")
 # ====== NEW CODE ENDS HERE ======
 
 # Display optimization results
@@ -263,10 +361,22 @@ st.dataframe(weights_df, use_container_width=True)
 # Risk metrics section
 st.subheader("Risk Analysis")
 
-# Calculate risk metrics
-var = risk_metrics.calculate_var(result['weights'])
-cvar = risk_metrics.calculate_cvar(result['weights'])
-drawdown = risk_metrics.calculate_drawdown(result['weights'])
+# Calculate risk metrics once per weight vector
+def run_risk_metrics() -> dict:
+    return {
+        'var': risk_metrics.calculate_var(result['weights']),
+        'cvar': risk_metrics.calculate_cvar(result['weights']),
+        'drawdown': risk_metrics.calculate_drawdown(result['weights']),
+        'rolling_vol': risk_metrics.calculate_rolling_volatility(result['weights']),
+        'rolling': risk_metrics.calculate_rolling_metrics(result['weights'], window=252)
+    }
+
+portfolio_risk = stage_cache.get_or_compute(
+    'risk_metrics', fingerprint(returns_key, result['weights']), run_risk_metrics
+)
+var = portfolio_risk['var']
+cvar = portfolio_risk['cvar']
+drawdown = portfolio_risk['drawdown']
 
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -293,13 +403,13 @@ The efficient frontier shows optimal portfolios that offer the highest expected
 for a given level of risk or the lowest risk for a given level of return.
 """)
 
-# Generate efficient frontier
-target_returns = np.linspace(
-    st.session_state.returns_data.min().min(),
-    st.session_state.returns_data.max().max(),
-    20
+# Generate efficient frontier, traced adaptively to a volatility error tolerance
+frontier_tolerance = 0.005
+efficient_portfolios = stage_cache.get_or_compute(
+    'frontier',
+    fingerprint(model_key, frontier_tolerance),
+    lambda: optimizer.adaptive_frontier(tolerance=frontier_tolerance, max_points=40)
 )
-efficient_portfolios = optimizer.efficient_frontier(target_returns)
 
 if efficient_portfolios:
     frontier_data = pd.DataFrame([{
@@ -338,9 +448,10 @@ if efficient_portfolios:
 
 # Correlation matrix
 st.subheader("Asset Correlation Matrix")
-corr_matrix = risk_metrics.calculate_correlation_matrix()
+# Quasi-diagonal (dendrogram) order puts correlated assets in blocks along the diagonal
+corr_matrix, _, order = correlation_clusters()
 fig = px.imshow(
-    corr_matrix,
+    corr_matrix.iloc[order, order],
     text_auto=True,
     aspect="auto",
     color_continuous_scale='RdBu',
@@ -351,7 +462,7 @@ st.plotly_chart(fig, use_container_width=True)
 
 # Rolling volatility
 st.subheader("Rolling Volatility (21-day)")
-rolling_vol = risk_metrics.calculate_rolling_volatility(result['weights'])
+rolling_vol = portfolio_risk['rolling_vol']
 fig = px.line(
     rolling_vol,
     title="Rolling Volatility",
@@ -360,6 +471,78 @@ fig = px.line(
 fig.update_layout(height=400)
 st.plotly_chart(fig, use_container_width=True)
 
+# Rolling 1-year VaR and Sharpe ratio
+st.subheader("Rolling Risk (1-year window)")
+rolling = portfolio_risk['rolling']
+col1, col2 = st.columns(2)
+with col1:
+    fig = px.line(rolling['var'], title="Rolling VaR (95%)", labels={'value': 'VaR', 'index': 'Date'})
+    fig.update_layout(height=350, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+with col2:
+    fig = px.line(rolling['sharpe'], title="Rolling Sharpe Ratio", labels={'value': 'Sharpe', 'index': 'Date'})
+    fig.update_layout(height=350, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Stress tests: crisis windows replayed on today's weights, plus a hypothetical market move
+st.subheader("Stress Tests")
+# The scenario library lives for the session (per ticker set), so selecting another
+# scenario fetches and evaluates only that one
+if st.session_state.get('stress_engine') is None or st.session_state.stress_engine.tickers != st.session_state.tickers:
+    st.session_state.stress_engine = StressEngine(st.session_state.tickers)
+    st.session_state.stress_market_scenarios = []
+stress_engine = st.session_state.stress_engine
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    selected_windows = st.multiselect(
+        "Historical windows", list(HISTORICAL_WINDOWS),
+        default=['Global Financial Crisis (2008)', 'COVID-19 Crash (2020)', 'Rate Shock (2022)']
+    )
+with col2:
+    market_shock = st.slider("Market move (%)", min_value=-50, max_value=0, value=-20, step=5)
+
+# Betas for the market move come from the loaded returns, so refresh them with the data
+market_name = f"Market {market_shock:+d}%"
+if st.session_state.get('stress_returns_key') != returns_key:
+    for name in st.session_state.stress_market_scenarios:
+        if name in stress_engine:
+            stress_engine.remove(name)
+    st.session_state.stress_market_scenarios = []
+    st.session_state.stress_returns_key = returns_key
+if market_name not in stress_engine:
+    stress_engine.add_market_shock(market_name, market_shock / 100, returns_data)
+    st.session_state.stress_market_scenarios.append(market_name)
+
+missing_windows = {name: HISTORICAL_WINDOWS[name] for name in selected_windows if name not in stress_engine}
+if missing_windows and st.button(f"Fetch history for {len(missing_windows)} window(s)"):
+    with st.spinner("Fetching stress history..."):
+        # A few days of margin so the first return of each window has its prior close
+        history_start = min(pd.Timestamp(start) for start, _ in missing_windows.values()) - timedelta(days=10)
+        history_end = max(pd.Timestamp(end) for _, end in missing_windows.values()) + timedelta(days=1)
+        history, errors = fetcher.fetch_yfinance_batch(
+            st.session_state.tickers, history_start.strftime('%Y-%m-%d'), history_end.strftime('%Y-%m-%d')
+        )
+        for ticker, error in errors.items():
+            st.warning(f"No stress history for {ticker}: {error}")
+        if history:
+            stress_returns = compute_returns(align_prices(pd.DataFrame(history)), 'simple')
+            stress_engine.add_historical_windows(stress_returns, missing_windows)
+    st.experimental_rerun()
+
+shown = [name for name in selected_windows if name in stress_engine] + [market_name]
+portfolio_value = holdings_data['total_value'] if initial_weights is not None else None
+stress_report = stress_engine.report(result['weights'], portfolio_value=portfolio_value).loc[shown]
+for column in ['P&L', 'Max Drawdown', 'Coverage']:
+    stress_report[column] = stress_report[column].apply(format_percentage)
+if 'P&L ($)' in stress_report:
+    stress_report['P&L ($)'] = stress_report['P&L ($)'].apply(
+        lambda value: f"{'-' if value < 0 else ''}${abs(value):,.2f}"
+    )
+st.dataframe(stress_report, use_container_width=True)
+if missing_windows:
+    st.caption(f"Fetch price history to include: {', '.join(missing_windows)}")
+
 # Download results
 st.subheader("Export Results")
 if st.button("Download Portfolio Allocation"):
@@ -370,4 +553,22 @@ if st.button("Download Portfolio Allocation"):
         data=csv,
         file_name="portfolio_allocation.csv",
         mime="text/csv"
-    )
\ No newline at end of file
+    )
+
+# Debug panel: pipeline cache effectiveness for this session
+with st.sidebar.expander("Debug: pipeline cache"):
+    st.dataframe(stage_cache.stats_frame(), use_container_width=True)
+    if st.button("Clear pipeline cache"):
+        stage_cache.clear()
+
+# Stage timings and counters, shown when started with PORTFOLIO_PROFILE=1
+if profiler.enabled:
+    with st.sidebar.expander("Profiling"):
+        st.dataframe(profiler.summary(), use_container_width=True)
+        if profiler.counters:
+            st.json(dict(profiler.counters))
+        st.download_button("Download JSON", profiler.to_json(), file_name="profile.json", mime="application/json")
+        st.download_button("Download Chrome trace", profiler.to_chrome_trace(), file_name="trace.json",
+                           mime="application/json")
+        if st.button("Reset profile"):
+            profiler.reset()
@@ -0,0 +1,182 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+from portfolio_optimizer import PortfolioOptimizer, STRATEGIES
+from utils import calculate_simple_returns, annualize_return, annualize_volatility
+
+
+def rebalance_positions(index: pd.DatetimeIndex, frequency: Union[str, int], window: int) -> List[int]:
+    """
+    Row positions at which to re-optimize: the last trading day of each period
+    for a pandas frequency ('W', 'M', 'Q', 'Y'), or every n rows for an integer,
+    starting once a full estimation window is available
+    """
+    if isinstance(frequency, int):
+        return list(range(window - 1, len(index) - 1, frequency))
+
+    periods = index.to_period(frequency)
+    last_in_period = np.flatnonzero(np.append(periods[1:] != periods[:-1], True))
+    return [int(p) for p in last_in_period if window - 1 <= p < len(index) - 1]
+
+
+def _optimize_positions(returns: np.ndarray, columns: List[str], positions: List[int], window: int,
+                        strategy: str, covariance: str,
+                        risk_free_rate: float) -> List[Tuple[np.ndarray, bool]]:
+    """
+    Target weights for a chunk of rebalance positions (runs in a worker
+    process), each with whether it fell back to minimum variance. Only assets
+    with a return on every date of the window are held; the others (not yet
+    listed, delisted or with gaps) get zero weight.
+
+    One optimizer is kept for the chunk and updated with each window, so its
+    compiled QPs are re-solved with new moments and a warm start; it is only
+    rebuilt when the set of eligible assets changes.
+    """
+    weights = []
+    optimizer, held = None, None
+    for position in positions:
+        history = returns[position - window + 1:position + 1]
+        eligible = ~np.isnan(history).any(axis=0)
+        if not eligible.any():
+            raise ValueError(f"No asset has a complete estimation window at row {position}")
+        history = pd.DataFrame(history[:, eligible], columns=[c for c, e in zip(columns, eligible) if e])
+        if optimizer is None or not np.array_equal(eligible, held):
+            optimizer, held = PortfolioOptimizer(history, covariance=covariance), eligible
+        else:
+            optimizer.update(history)
+        fell_back = False
+        if strategy == 'max_sharpe':
+            try:
+                result = optimizer.max_sharpe_ratio(risk_free_rate)
+            except ValueError:
+                # The tangency portfolio is undefined in this window, e.g. no
+                # asset beats the risk-free rate
+                result = optimizer.min_variance(risk_free_rate=risk_free_rate)
+                fell_back = True
+        else:
+            result = optimizer.optimize(strategy, risk_free_rate)
+        target = np.zeros(len(columns))
+        target[eligible] = result['weights']
+        weights.append((target, fell_back))
+    return weights
+
+
+class Backtester:
+    """
+    Walk-forward backtest: slide an estimation window over the price history,
+    re-optimize with PortfolioOptimizer on each rebalance date, then hold the
+    drifting portfolio until the next one, paying transaction costs on turnover.
+
+    Rebalance dates are independent, so they are optimized in contiguous chunks
+    across a process pool; the returns matrix is shipped once per chunk.
+    """
+
+    def __init__(self, prices: pd.DataFrame, strategy: str = 'min_variance',
+                 estimation_window: int = 252, rebalance_frequency: Union[str, int] = 'M',
+                 transaction_cost: float = 0.001, risk_free_rate: float = 0.0,
+                 covariance: str = 'sample', max_workers: Optional[int] = None):
+        # Each ticker keeps its own history; windows skip assets they don't cover
+        self.returns = calculate_simple_returns(prices, how='all')
+        if len(self.returns) <= estimation_window:
+            raise ValueError("Price history is shorter than the estimation window")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}' (choose from {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.estimation_window = estimation_window
+        self.rebalance_frequency = rebalance_frequency
+        self.transaction_cost = transaction_cost
+        self.risk_free_rate = risk_free_rate
+        self.covariance = covariance
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def target_weights(self) -> pd.DataFrame:
+        """Optimize every rebalance date, in parallel when max_workers > 1"""
+        return self._optimize_rebalances()[0]
+
+    def _optimize_rebalances(self) -> Tuple[pd.DataFrame, pd.Series]:
+        """Target weights per rebalance date, and whether each fell back to minimum variance"""
+        positions = rebalance_positions(self.returns.index, self.rebalance_frequency, self.estimation_window)
+        if not positions:
+            raise ValueError("No rebalance dates after the estimation window")
+
+        values = self.returns.to_numpy(dtype=float)
+        columns = list(self.returns.columns)
+        args = (self.estimation_window, self.strategy, self.covariance, self.risk_free_rate)
+
+        num_chunks = min(self.max_workers, len(positions))
+        if num_chunks <= 1:
+            results = _optimize_positions(values, columns, positions, *args)
+        else:
+            chunks = [list(chunk) for chunk in np.array_split(positions, num_chunks)]
+            # Each chunk only needs the rows from its first window onwards
+            with ProcessPoolExecutor(max_workers=num_chunks) as pool:
+                futures = [
+                    pool.submit(
+                        _optimize_positions,
+                        values[chunk[0] - self.estimation_window + 1:chunk[-1] + 1],
+                        columns,
+                        [p - chunk[0] + self.estimation_window - 1 for p in chunk],
+                        *args
+                    )
+                    for chunk in chunks
+                ]
+                results = [r for future in futures for r in future.result()]
+
+        dates = self.returns.index[positions]
+        weights = pd.DataFrame([w for w, _ in results], index=dates, columns=self.returns.columns)
+        return weights, pd.Series([fell_back for _, fell_back in results], index=dates, dtype=bool)
+
+    def run(self) -> Dict:
+        """
+        Run the backtest. Returns the net equity curve and daily returns, target
+        weights per rebalance date, turnover and costs, and summary statistics.
+        'fallbacks' flags the max_sharpe rebalances that used minimum variance
+        because the tangency portfolio was undefined.
+        """
+        targets, fallbacks = self._optimize_rebalances()
+        returns = self.returns.to_numpy(dtype=float)
+        start = self.returns.index.get_loc(targets.index[0])
+        rebalance_at = {self.returns.index.get_loc(date): w for date, w in zip(targets.index, targets.to_numpy())}
+
+        weights = np.zeros(returns.shape[1])
+        net_returns = np.empty(len(returns) - start - 1)
+        turnover, costs = [], []
+
+        for i, row in enumerate(range(start, len(returns) - 1)):
+            cost = 0.0
+            if row in rebalance_at:
+                target = rebalance_at[row]
+                traded = np.abs(target - weights).sum()
+                cost = traded * self.transaction_cost
+                turnover.append(traded)
+                costs.append(cost)
+                weights = target
+
+            # Hold through the next day's returns, letting weights drift
+            day_returns = np.nan_to_num(returns[row + 1])
+            gross = weights @ day_returns
+            net_returns[i] = (1 - cost) * (1 + gross) - 1
+            weights = weights * (1 + day_returns) / (1 + gross)
+
+        dates = self.returns.index[start + 1:]
+        net_returns = pd.Series(net_returns, index=dates)
+        equity_curve = (1 + net_returns).cumprod()
+        drawdown = equity_curve / equity_curve.cummax() - 1
+        daily_mean, daily_vol = net_returns.mean(), net_returns.std()
+
+        return {
+            'equity_curve': equity_curve,
+            'returns': net_returns,
+            'weights': targets,
+            'turnover': pd.Series(turnover, index=targets.index),
+            'costs': pd.Series(costs, index=targets.index),
+            'fallbacks': fallbacks,
+            'total_return': equity_curve.iloc[-1] - 1,
+            'annual_return': annualize_return(daily_mean),
+            'annual_volatility': annualize_volatility(daily_vol),
+            'sharpe_ratio': (annualize_return(daily_mean) - self.risk_free_rate) / annualize_volatility(daily_vol)
+            if daily_vol > 0 else 0.0,
+            'max_drawdown': drawdown.min()
+        }
@@ -0,0 +1,265 @@
+"""
+Headless batch optimization: optimize and risk-score many portfolios from a
+JSON file without Streamlit.
+
+    python batch_optimize.py portfolios.json --start 2020-01-01 --end 2024-12-31 \
+        --output results.csv --workers 8
+
+The portfolios file is a list of objects (or one object per line):
+
+    {"name": "client-1", "tickers": ["AAPL", "MSFT"], "holdings": {"AAPL": 10, "MSFT": 5},
+     "strategy": "max_sharpe", "constraints": {"upper_bounds": 0.4}, "risk_free_rate": 0.02}
+
+`strategy` is one of PortfolioOptimizer's STRATEGIES, 'constrained' (min
+variance under `constraints`, see ConstraintSpec) or 'current' (score the
+holdings as they are). Prices for the union of all tickers are fetched once
+through the price cache, and their returns are shared with every worker
+through a ReturnsPanel in shared memory. Parquet output (a .parquet
+--output) needs pyarrow or fastparquet installed.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from constraints import holdings_weights
+from portfolio_optimizer import PortfolioOptimizer, STRATEGIES
+from preprocessing import align_prices, compute_returns
+from returns_panel import ReturnsPanel
+from risk_metrics import RiskMetrics
+from utils import annualize_return, annualize_volatility
+
+# Optimizer strategies plus constrained min variance and scoring the holdings as-is
+BATCH_STRATEGIES = list(STRATEGIES) + ['constrained', 'current']
+
+# Returns panel shared by the portfolios scored in this process
+_RETURNS = None
+_LAST_PRICES = None
+
+
+def load_portfolios(path: str) -> List[Dict]:
+    """Read portfolios from a JSON list or a JSON-lines file"""
+    with open(path) as f:
+        text = f.read().strip()
+    if text.startswith('['):
+        portfolios = json.loads(text)
+    else:
+        portfolios = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    for i, portfolio in enumerate(portfolios):
+        portfolio.setdefault('name', f"portfolio_{i}")
+        if 'tickers' not in portfolio:
+            portfolio['tickers'] = list(portfolio.get('holdings', {}))
+        if not portfolio['tickers']:
+            raise ValueError(f"Portfolio '{portfolio['name']}' has no tickers")
+        strategy = portfolio.setdefault('strategy', 'max_sharpe')
+        if strategy not in BATCH_STRATEGIES:
+            raise ValueError(f"Portfolio '{portfolio['name']}' has unknown strategy '{strategy}' "
+                             f"(choose from {', '.join(BATCH_STRATEGIES)})")
+    return portfolios
+
+
+def _init_worker(returns: ReturnsPanel, last_prices: pd.Series):
+    global _RETURNS, _LAST_PRICES
+    # Attached to the parent's shared memory, not a copy
+    _RETURNS = returns
+    _LAST_PRICES = last_prices
+
+
+def _release_worker():
+    global _RETURNS, _LAST_PRICES
+    _RETURNS = None
+    _LAST_PRICES = None
+
+
+def optimize_portfolio(portfolio: Dict, covariance: str = 'sample', alpha: float = 0.05) -> Dict:
+    """Optimize and risk-score one portfolio against the shared returns panel"""
+    row = {'name': portfolio['name'], 'strategy': portfolio.get('strategy', 'max_sharpe'), 'error': None}
+    timings = {'optimize': 0.0, 'risk': 0.0}
+    try:
+        tickers = portfolio['tickers']
+        missing = [t for t in tickers if t not in _RETURNS]
+        if missing:
+            raise ValueError(f"No price data for {', '.join(missing)}")
+        # Copies the portfolio's dates × tickers block (a view for adjacent
+        # panel columns), never the whole panel; dates with no returns for
+        # any of its tickers cost a second copy, so only when there are some
+        returns = _RETURNS.select(tickers)
+        empty = np.isnan(returns.to_numpy()).all(axis=1)
+        if empty.any():
+            returns = returns[~empty]
+        risk_free_rate = portfolio.get('risk_free_rate', 0.0)
+        holdings = portfolio.get('holdings')
+        current = None
+        if holdings:
+            current = holdings_weights(
+                {t: holdings.get(t, 0) for t in tickers}, _LAST_PRICES[tickers].to_dict()
+            )
+
+        start = time.perf_counter()
+        optimizer = PortfolioOptimizer(returns, covariance=portfolio.get('covariance', covariance))
+        strategy = row['strategy']
+        if strategy == 'current':
+            if current is None:
+                raise ValueError("The 'current' strategy needs holdings")
+            result = optimizer._portfolio_result(np.array([current[t] for t in tickers]), risk_free_rate)
+        elif strategy == 'constrained':
+            spec = dict(portfolio.get('constraints', {}))
+            if 'turnover_limit' in spec and 'current_weights' not in spec:
+                if current is None:
+                    raise ValueError("A turnover limit needs holdings")
+                spec['current_weights'] = current
+            result = optimizer.constrained(spec, time_limit=portfolio.get('time_limit', 1.0),
+                                           risk_free_rate=risk_free_rate)
+        else:
+            result = optimizer.optimize(strategy, risk_free_rate)
+        timings['optimize'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        risk = RiskMetrics(returns).calculate_batch_metrics(result['weights'][None, :], alpha=alpha)
+        timings['risk'] = time.perf_counter() - start
+
+        ret, vol = optimizer.calculate_portfolio_performance(result['weights'])
+        row.update({
+            'annual_return': annualize_return(ret),
+            'annual_volatility': annualize_volatility(vol),
+            'sharpe_ratio': result.get('sharpe_ratio', np.nan),
+            'var': float(risk['var'][0]),
+            'cvar': float(risk['cvar'][0]),
+            'max_drawdown': float(risk['max_drawdown'][0]),
+            'observations': len(returns),
+            'weights': dict(zip(tickers, result['weights'].tolist())),
+        })
+    except Exception as e:
+        row['error'] = str(e)
+    row['timings'] = timings
+    return row
+
+
+def _optimize_chunk(portfolios: List[Dict], covariance: str, alpha: float) -> List[Dict]:
+    return [optimize_portfolio(portfolio, covariance, alpha) for portfolio in portfolios]
+
+
+def run_batch(portfolios: List[Dict], prices: pd.DataFrame, max_workers: Optional[int] = None,
+              covariance: str = 'sample', alpha: float = 0.05) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+    """
+    Optimize every portfolio against one price panel. Returns a summary frame
+    (one row per portfolio), a long frame of weights and per-stage timings.
+    """
+    stage_times = {}
+    start = time.perf_counter()
+    # Each ticker keeps its own history; the optimizer uses pairwise-complete moments
+    prices = align_prices(prices)
+    returns = ReturnsPanel.from_frame(compute_returns(prices))
+    last_prices = prices.ffill().iloc[-1]
+    stage_times['returns'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    max_workers = max_workers or os.cpu_count() or 1
+    num_chunks = min(max_workers, len(portfolios))
+    with returns:
+        if num_chunks <= 1:
+            _init_worker(returns, last_prices)
+            try:
+                rows = _optimize_chunk(portfolios, covariance, alpha)
+            finally:
+                # Drop this process's view so the panel can be closed
+                _release_worker()
+        else:
+            # Several chunks per worker keep the pool busy when portfolios differ in size
+            chunks = [list(chunk) for chunk in np.array_split(np.array(portfolios, dtype=object), num_chunks * 4)
+                      if len(chunk)]
+            with ProcessPoolExecutor(max_workers=num_chunks, initializer=_init_worker,
+                                     initargs=(returns, last_prices)) as pool:
+                futures = [pool.submit(_optimize_chunk, chunk, covariance, alpha) for chunk in chunks]
+                rows = [row for future in futures for row in future.result()]
+    stage_times['optimize_and_score'] = time.perf_counter() - start
+    stage_times['optimize (cpu)'] = sum(row['timings']['optimize'] for row in rows)
+    stage_times['risk (cpu)'] = sum(row['timings']['risk'] for row in rows)
+
+    weights = pd.DataFrame(
+        [(row['name'], ticker, weight) for row in rows for ticker, weight in (row.get('weights') or {}).items()],
+        columns=['name', 'ticker', 'weight']
+    )
+    summary = pd.DataFrame([{k: v for k, v in row.items() if k not in ('weights', 'timings')} for row in rows])
+    return summary, weights, stage_times
+
+
+def check_output(output: str):
+    """Reject an output path that write_results could not write, before any work is done"""
+    ext = os.path.splitext(output)[1]
+    if ext not in ('.parquet', '.csv'):
+        raise ValueError("Output must be a .parquet or .csv file")
+    if ext == '.parquet' and not any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet')):
+        raise ValueError("Parquet output needs pyarrow or fastparquet installed; use a .csv output instead")
+
+
+def write_results(summary: pd.DataFrame, weights: pd.DataFrame, output: str) -> List[str]:
+    """Write the summary and a '<name>_weights' file as Parquet or CSV (by extension)"""
+    check_output(output)
+    stem, ext = os.path.splitext(output)
+    paths = [output, f"{stem}_weights{ext}"]
+    for frame, path in zip([summary, weights], paths):
+        if ext == '.parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+    return paths
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Optimize and risk-score many portfolios")
+    parser.add_argument("portfolios", help="JSON or JSON-lines file of portfolios")
+    parser.add_argument("--start", required=True, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=pd.Timestamp.today().strftime('%Y-%m-%d'), help="End date (YYYY-MM-DD)")
+    parser.add_argument("--output", default="results.csv", help="Output .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--covariance", default='sample', help="Default covariance estimator")
+    parser.add_argument("--alpha", type=float, default=0.05, help="VaR/CVaR tail probability")
+    parser.add_argument("--offline", action="store_true", help="Only use cached prices")
+    args = parser.parse_args(argv)
+    try:
+        check_output(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+
+    from data_fetcher import DataFetcher
+
+    total_start = time.perf_counter()
+    start = time.perf_counter()
+    portfolios = load_portfolios(args.portfolios)
+    tickers = sorted({t for portfolio in portfolios for t in portfolio['tickers']})
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fetcher = DataFetcher(offline=args.offline or None)
+    series, errors = fetcher.fetch_yfinance_batch(tickers, args.start, args.end)
+    for ticker, error in errors.items():
+        print(f"Failed to fetch {ticker}: {error}")
+    if not series:
+        raise SystemExit("No price data fetched")
+    prices = pd.DataFrame(series)
+    fetch_time = time.perf_counter() - start
+
+    summary, weights, stage_times = run_batch(portfolios, prices, args.workers, args.covariance, args.alpha)
+
+    start = time.perf_counter()
+    paths = write_results(summary, weights, args.output)
+    write_time = time.perf_counter() - start
+    total_time = time.perf_counter() - total_start
+
+    failed = summary['error'].notna().sum()
+    print(f"Wrote {', '.join(paths)}")
+    print(f"{len(portfolios)} portfolios ({failed} failed), {len(tickers)} tickers "
+          f"in {total_time:.2f}s: {len(portfolios) / total_time:.1f} portfolios/s")
+    stages = {'load': load_time, 'fetch': fetch_time, **stage_times, 'write': write_time}
+    for stage, seconds in stages.items():
+        print(f"  {stage:<20} {seconds:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
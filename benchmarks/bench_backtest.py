@@ -0,0 +1,39 @@
+"""
+Walk-forward backtest over a years x assets x rebalance frequency grid,
+optimizing rebalance dates sequentially versus across a process pool.
+
+    python benchmarks/bench_backtest.py
+"""
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backtest import Backtester
+from synthetic import synthetic_returns
+
+
+def main():
+    warnings.simplefilter("ignore")
+    workers = os.cpu_count() or 1
+    print(f"{'years':>5} {'assets':>6} {'freq':>5} {'dates':>6} {'sequential (s)':>15} {f'{workers} workers (s)':>15}")
+    for years in [5, 10]:
+        for num_assets in [20, 100]:
+            returns = synthetic_returns(num_assets, 252 * years)
+            prices = (1 + returns).cumprod() * 100
+            for frequency in ['W', 'M', 'Q']:
+                timings = []
+                for max_workers in [1, workers]:
+                    backtest = Backtester(prices, strategy='min_variance', rebalance_frequency=frequency,
+                                          max_workers=max_workers)
+                    start = time.perf_counter()
+                    result = backtest.run()
+                    timings.append(time.perf_counter() - start)
+                print(f"{years:>5} {num_assets:>6} {frequency:>5} {len(result['weights']):>6} "
+                      f"{timings[0]:>15.2f} {timings[1]:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
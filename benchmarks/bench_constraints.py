@@ -0,0 +1,51 @@
+"""
+Constrained minimum variance: compiling a constraint structure versus
+re-solving it with new limits, and the cardinality heuristic's solve count
+and time against its time limit.
+
+    python benchmarks/bench_constraints.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from portfolio_optimizer import PortfolioOptimizer
+from synthetic import synthetic_returns
+
+
+def main():
+    print(f"{'assets':>6} {'case':>22} {'compile (ms)':>13} {'re-solve (ms)':>14} {'solves':>7} {'names':>6}")
+    for num_assets in [50, 200, 500]:
+        returns = synthetic_returns(num_assets, 1260)
+        optimizer = PortfolioOptimizer(returns)
+        assets = list(returns.columns)
+        sectors = {
+            f"sector_{i}": {'assets': assets[i::10], 'max': 0.15}
+            for i in range(10)
+        }
+        current = np.full(num_assets, 1 / num_assets)
+        cases = {
+            'bounds': lambda cap: {'upper_bounds': cap},
+            'bounds + sectors': lambda cap: {'upper_bounds': cap, 'groups': sectors},
+            'sectors + turnover': lambda cap: {'upper_bounds': cap, 'groups': sectors,
+                                               'turnover_limit': 0.5, 'current_weights': current},
+            'max 20 names': lambda cap: {'upper_bounds': 0.1, 'max_assets': 20},
+        }
+        for name, spec in cases.items():
+            cap = max(5 / num_assets, 0.02)
+            start = time.perf_counter()
+            optimizer.constrained(spec(cap), time_limit=2.0)
+            compile_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = optimizer.constrained(spec(cap * 1.5), time_limit=2.0)
+            solve_time = time.perf_counter() - start
+            print(f"{num_assets:>6} {name:>22} {compile_time * 1000:>13.1f} {solve_time * 1000:>14.1f} "
+                  f"{result['solve_stats']['solves']:>7} {int((result['weights'] > 0).sum()):>6}")
+
+
+if __name__ == "__main__":
+    main()
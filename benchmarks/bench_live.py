@@ -0,0 +1,61 @@
+"""
+Live valuation throughput and latency: quotes from the simulated feed
+through the asyncio loop into the array-backed PortfolioState, unpaced and
+at a fixed quote rate, against recomputing calculate_portfolio_value on
+every tick.
+
+    python benchmarks/bench_live.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from live_valuation import LiveValuation, PortfolioState, SimulatedPriceSource
+from portfolio_calculations import calculate_portfolio_value
+
+
+def portfolio(num_assets: int):
+    tickers = [f"T{i:04d}" for i in range(num_assets)]
+    holdings = {ticker: float(i % 50 + 1) for i, ticker in enumerate(tickers)}
+    prices = {ticker: 100.0 for ticker in tickers}
+    return holdings, prices
+
+
+def run_live(num_assets: int, num_ticks: int, rate=None):
+    holdings, prices = portfolio(num_assets)
+    valuation = LiveValuation(PortfolioState(holdings, prices), SimulatedPriceSource(prices, rate=rate))
+    return asyncio.run(valuation.run(max_ticks=num_ticks))
+
+
+def recompute_per_tick(num_assets: int, num_ticks: int) -> float:
+    """Ticks per second when each quote re-values the whole portfolio"""
+    holdings, prices = portfolio(num_assets)
+    tickers = list(prices)
+    start = time.perf_counter()
+    for i in range(num_ticks):
+        prices[tickers[i % num_assets]] *= 1.0001
+        calculate_portfolio_value(holdings, prices)
+    return num_ticks / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{'assets':>6} {'ticks/s':>10} {'p50 (us)':>9} {'p99 (us)':>9} {'recompute ticks/s':>18}")
+    for num_assets in [10, 100, 1000, 5000]:
+        stats = run_live(num_assets, 200000)
+        recompute = recompute_per_tick(num_assets, 2000)
+        print(f"{num_assets:>6} {stats['ticks_per_second']:>10,.0f} {stats['latency_p50_us']:>9.1f} "
+              f"{stats['latency_p99_us']:>9.1f} {recompute:>18,.0f}")
+
+    print()
+    print(f"{'rate':>6} {'ticks/s':>10} {'p50 (us)':>9} {'p99 (us)':>9}")
+    for rate in [1000, 5000, 20000]:
+        stats = run_live(500, rate * 2, rate=rate)
+        print(f"{rate:>6} {stats['ticks_per_second']:>10,.0f} {stats['latency_p50_us']:>9.1f} "
+              f"{stats['latency_p99_us']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Cost of refreshing moments after one new bar: recomputing mean() and cov()
+over the window versus a RollingMoments update.
+
+    python benchmarks/bench_moments.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from moments import RollingMoments
+from synthetic import synthetic_returns
+
+
+def main():
+    print(f"{'assets':>6} {'window':>7} {'recompute (ms)':>15} {'update (ms)':>12} {'speedup':>8}")
+    for num_assets in [50, 200, 500]:
+        for window in [252, 2520]:
+            returns = synthetic_returns(num_assets, window + 100)
+            moments = RollingMoments.from_returns(returns.iloc[:window], window=window)
+
+            start = time.perf_counter()
+            for i in range(100):
+                history = returns.iloc[i + 1:window + i + 1]
+                history.mean()
+                history.cov()
+            recompute = (time.perf_counter() - start) * 10
+
+            start = time.perf_counter()
+            for i in range(100):
+                moments.update(returns.iloc[window + i])
+                moments.mean()
+                moments.cov()
+            update = (time.perf_counter() - start) * 10
+
+            print(f"{num_assets:>6} {window:>7} {recompute:>15.2f} {update:>12.2f} {recompute / update:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
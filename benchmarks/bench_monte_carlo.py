@@ -0,0 +1,34 @@
+"""
+Monte Carlo VaR/CVaR throughput (scenarios per second) by universe size,
+distribution and number of portfolios evaluated per scenario batch.
+
+    python benchmarks/bench_monte_carlo.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from monte_carlo import MonteCarloRisk
+from synthetic import synthetic_returns
+
+
+def main():
+    num_paths = 200000
+    print(f"{'assets':>6} {'dist':>6} {'portfolios':>10} {'time (s)':>9} {'scenarios/s':>12}")
+    for num_assets in [50, 500]:
+        returns = synthetic_returns(num_assets, 2520)
+        for distribution in ['normal', 't']:
+            engine = MonteCarloRisk.from_returns(returns, distribution=distribution, seed=42)
+            for num_portfolios in [1, 100]:
+                weights = np.random.default_rng(0).dirichlet(np.ones(num_assets), size=num_portfolios)
+                start = time.perf_counter()
+                engine.simulate(weights, num_paths=num_paths, horizon=10, alpha=0.01)
+                elapsed = time.perf_counter() - start
+                print(f"{num_assets:>6} {distribution:>6} {num_portfolios:>10} {elapsed:>9.2f} {num_paths / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Returns preprocessing on a universe with staggered listings and scattered
+missing quotes: rows kept by a global dropna versus calendar alignment, and
+pairwise-complete moments versus DataFrame.mean()/cov().
+
+    python benchmarks/bench_preprocessing.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from preprocessing import align_prices, compute_returns, nearest_psd, pairwise_moments
+from synthetic import synthetic_returns
+
+
+def staggered_prices(num_assets: int, num_days: int, seed: int = 0):
+    """Synthetic prices where a third of the assets list late and 0.5% of quotes are missing"""
+    rng = np.random.default_rng(seed)
+    prices = (1 + synthetic_returns(num_assets, num_days, seed=seed)).cumprod() * 100
+    late = rng.choice(num_assets, num_assets // 3, replace=False)
+    for column in late:
+        prices.iloc[:rng.integers(1, num_days - 60), column] = np.nan
+    return prices.mask(rng.random(prices.shape) < 0.005)
+
+
+def main():
+    print(f"{'assets':>6} {'days':>5} {'dropna rows':>12} {'aligned rows':>13} {'prep (ms)':>10} "
+          f"{'pairwise (ms)':>14} {'pandas (ms)':>12} {'psd (ms)':>9}")
+    for num_assets, num_days in [(50, 2520), (500, 2520), (2000, 5040)]:
+        prices = staggered_prices(num_assets, num_days)
+        dropna_rows = len(prices.pct_change(fill_method=None).dropna())
+
+        start = time.perf_counter()
+        returns = compute_returns(align_prices(prices))
+        prep = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, cov, _ = pairwise_moments(returns)
+        pairwise = time.perf_counter() - start
+
+        start = time.perf_counter()
+        returns.mean(), returns.cov()
+        pandas = time.perf_counter() - start
+
+        start = time.perf_counter()
+        nearest_psd(cov.values)
+        psd = time.perf_counter() - start
+
+        print(f"{num_assets:>6} {num_days:>5} {dropna_rows:>12} {len(returns):>13} {prep * 1000:>10.1f} "
+              f"{pairwise * 1000:>14.1f} {pandas * 1000:>12.1f} {psd * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Overhead of the profiling layer: a cached RiskMetrics.calculate_var call
+(the cheapest instrumented stage) with profiling disabled versus enabled,
+and the raw cost of an instrumented no-op call.
+
+    python benchmarks/bench_profiling.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from profiling import profiled, profiler
+from risk_metrics import RiskMetrics
+from synthetic import synthetic_returns
+
+
+def noop():
+    pass
+
+
+def span():
+    with profiler.span('bench', 'bench'):
+        pass
+
+
+def main():
+    metrics = RiskMetrics(synthetic_returns(50, 2520))
+    weights = np.full(50, 1 / 50)
+    instrumented_noop = profiled('bench')(noop)
+    cases = {
+        'calculate_var': lambda: metrics.calculate_var(weights),
+        'no-op': noop,
+        'instrumented no-op': instrumented_noop,
+        'span': span,
+    }
+
+    print(f"{'call':>20} {'disabled (us)':>14} {'enabled (us)':>13}")
+    for name, fn in cases.items():
+        timings = []
+        for enabled in [False, True]:
+            profiler.enabled = enabled
+            profiler.reset()
+            number = 20000
+            timings.append(min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6)
+        print(f"{name:>20} {timings[0]:>14.2f} {timings[1]:>13.2f}")
+    profiler.enabled = False
+
+
+if __name__ == "__main__":
+    main()
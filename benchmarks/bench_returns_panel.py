@@ -0,0 +1,73 @@
+"""
+Worker memory when a large returns matrix is sent to a process pool as a
+pickled DataFrame versus a shared-memory or memory-mapped ReturnsPanel.
+
+Each worker scores a portfolio with RiskMetrics and reports its private
+memory (USS, from /proc/self/smaps_rollup on Linux) and how long the task
+took to arrive and run.
+
+    python benchmarks/bench_returns_panel.py [num_assets] [years] [workers]
+"""
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from returns_panel import ReturnsPanel
+from risk_metrics import RiskMetrics
+from synthetic import synthetic_returns
+
+
+def private_memory_mb(_=None) -> float:
+    """Memory owned by this process alone (shared pages are not counted)"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return sum(int(fields[k].split()[0]) for k in ("Private_Clean", "Private_Dirty")) / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def score(returns, sent_at: float):
+    received = time.perf_counter() - sent_at
+    metrics = RiskMetrics(returns)
+    weights = np.full(metrics.returns.shape[1], 1 / metrics.returns.shape[1])
+    var = metrics.calculate_var(weights)
+    return private_memory_mb(), received, var
+
+
+def main():
+    num_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    returns = synthetic_returns(num_assets, 252 * years)
+    print(f"{num_assets} assets x {252 * years} days = {returns.values.nbytes / 2 ** 20:.0f} MB, {workers} workers")
+    print(f"{'transport':>14} {'worker private (MB)':>20} {'total (MB)':>11} {'transfer (ms)':>14}")
+
+    # Spawned workers receive everything by pickling, as on macOS and Windows
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Warm the workers up so interpreter start-up is not measured
+        list(pool.map(private_memory_mb, range(workers)))
+        baseline = np.mean(list(pool.map(private_memory_mb, range(workers))))
+
+        for transport in ["DataFrame", "shared_memory", "memmap"]:
+            payload = returns if transport == "DataFrame" else ReturnsPanel.from_frame(returns, backend=transport)
+            futures = [pool.submit(score, payload, time.perf_counter()) for _ in range(workers)]
+            results = [future.result() for future in futures]
+            if transport != "DataFrame":
+                payload.close()
+
+            private = np.mean([r[0] for r in results]) - baseline
+            transfer = np.mean([r[1] for r in results]) * 1000
+            print(f"{transport:>14} {private:>20.1f} {private * workers:>11.1f} {transfer:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
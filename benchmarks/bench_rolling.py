@@ -0,0 +1,74 @@
+"""
+Rolling risk metrics on 20 years of daily returns (252-day window) for
+batches of portfolios: rolling_metrics against pandas, with VaR both the
+obvious way (rolling.apply with np.percentile, O(T·W log W)) and with
+pandas' rolling.quantile. Also checks both give the same numbers.
+
+    python benchmarks/bench_rolling.py
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from rolling_metrics import rolling_metrics
+from synthetic import synthetic_returns
+
+WINDOW = 252
+ALPHA = 0.05
+
+
+def pandas_metrics(portfolio_returns: pd.DataFrame, market: pd.Series, var_apply: bool) -> dict:
+    rolling = portfolio_returns.rolling(WINDOW)
+    std = rolling.std()
+    wealth = (1 + portfolio_returns).cumprod()
+    drawdown = wealth / wealth.cummax() - 1
+    if var_apply:
+        var = rolling.apply(lambda window: np.percentile(window, ALPHA * 100), raw=True)
+    else:
+        var = rolling.quantile(ALPHA)
+    return {
+        'volatility': std * np.sqrt(252),
+        'var': var,
+        'sharpe': rolling.mean() * 252 / (std * np.sqrt(252)),
+        'beta': rolling.cov(market).div(market.rolling(WINDOW).var(), axis=0),
+        'drawdown': drawdown,
+        'max_drawdown': drawdown.cummin()
+    }
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    returns = synthetic_returns(50, 5040)
+    market = returns.mean(axis=1)
+    rng = np.random.default_rng(0)
+
+    print(f"{'portfolios':>10} {'rolling_metrics (s)':>20} {'pandas apply (s)':>17} {'speedup':>8} "
+          f"{'pandas quantile (s)':>20} {'speedup':>8} {'max diff':>9}")
+    for num_portfolios in [1, 10, 100, 500]:
+        weights = rng.dirichlet(np.ones(returns.shape[1]), num_portfolios)
+        ours, our_time = timed(rolling_metrics, returns.values, weights, window=WINDOW, alpha=ALPHA,
+                               market_returns=market.values)
+
+        portfolio_returns = pd.DataFrame(returns.values @ weights.T, index=returns.index)
+        # rolling.apply runs a Python callback per window: too slow past a few portfolios
+        apply_time = float('nan')
+        if num_portfolios <= 10:
+            _, apply_time = timed(pandas_metrics, portfolio_returns, market, var_apply=True)
+        reference, quantile_time = timed(pandas_metrics, portfolio_returns, market, var_apply=False)
+
+        difference = max(np.nanmax(np.abs(ours[name] - reference[name].values)) for name in reference)
+        print(f"{num_portfolios:>10} {our_time:>20.3f} {apply_time:>17.3f} {apply_time / our_time:>7.0f}x "
+              f"{quantile_time:>20.3f} {quantile_time / our_time:>7.1f}x {difference:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
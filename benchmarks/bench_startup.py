@@ -0,0 +1,110 @@
+"""
+Cold start of the dashboard and the batch CLI: each entry point's imports run
+in a fresh interpreter under `python -X importtime`, so nothing is cached.
+
+Reports the median import time of each entry point as shipped, which heavy
+dependencies it loaded, and the time of the same imports plus the heavy
+dependencies the modules used to import eagerly (cvxpy, scipy.optimize,
+scipy.cluster, scipy.linalg, the provider SDKs, plotly, matplotlib). The import-time report lists the slowest
+modules by cumulative time.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --report dashboard --top 25
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Project modules each entry point imports at load (streamlit itself excluded)
+ENTRY_POINTS = {
+    'dashboard': ['portfolio_optimizer', 'risk_metrics', 'data_fetcher', 'portfolio_calculations',
+                  'preprocessing', 'profiling', 'stage_cache', 'utils'],
+    'batch': ['batch_optimize'],
+}
+
+# Heavy dependencies that used to be imported at module load
+HEAVY = ['cvxpy', 'scipy.optimize', 'scipy.cluster', 'scipy.linalg', 'yfinance',
+         'alpha_vantage.timeseries', 'dotenv', 'plotly.express', 'matplotlib.pyplot']
+
+
+def installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def import_profile(modules: List[str]) -> Tuple[float, List[Tuple[str, float, float]], List[str]]:
+    """
+    Import `modules` in a fresh interpreter. Returns the total import time (s),
+    (module, self s, cumulative s) per imported module, and the heavy
+    dependencies that ended up loaded.
+    """
+    code = (
+        "import sys\n" + "".join(f"import {m}\n" for m in modules) +
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.rstrip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    # Nested imports are indented below their parent; the top-level cumulative times add up
+    total = sum(cumulative for name, _, cumulative in entries if not name.startswith("  "))
+    entries = [(name.strip(), self_time, cumulative) for name, self_time, cumulative in entries]
+    loaded = [m for m in completed.stdout.strip().split(",") if m]
+    return total, entries, loaded
+
+
+def median_import_time(modules: List[str], repeats: int) -> Tuple[float, List[str]]:
+    times, loaded = [], []
+    for _ in range(repeats):
+        total, _, loaded = import_profile(modules)
+        times.append(total)
+    return statistics.median(times), loaded
+
+
+def report(modules: List[str], top: int):
+    total, entries, _ = import_profile(modules)
+    print(f"Import-time report: {total * 1000:.0f} ms total")
+    print(f"{'module':<50} {'self (ms)':>10} {'cumulative (ms)':>16}")
+    for name, self_time, cumulative in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"{name[:50]:<50} {self_time * 1000:>10.1f} {cumulative * 1000:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--report", choices=list(ENTRY_POINTS), help="Print the import-time report of an entry point")
+    parser.add_argument("--top", type=int, default=20, help="Modules listed in the report")
+    args = parser.parse_args()
+
+    if args.report:
+        report(ENTRY_POINTS[args.report], args.top)
+        return
+
+    eager = [m for m in HEAVY if installed(m)]
+    missing = [m for m in HEAVY if m not in eager]
+    print(f"{'entry point':<12} {'lazy (ms)':>10} {'eager (ms)':>11} {'saved':>7}  heavy modules loaded")
+    for name, modules in ENTRY_POINTS.items():
+        lazy, loaded = median_import_time(modules, args.repeats)
+        eager_time, _ = median_import_time(modules + eager, args.repeats)
+        print(f"{name:<12} {lazy * 1000:>10.0f} {eager_time * 1000:>11.0f} {1 - lazy / eager_time:>7.0%}  "
+              f"{', '.join(loaded) or 'none'}")
+    if missing:
+        print(f"Not installed here, so excluded from the eager time: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Stress engine on 500 assets with every built-in historical window plus
+hypothetical shocks: batched evaluation of K portfolios against a loop that
+replays each portfolio through each scenario with pandas, and the cost of
+adding one scenario to an already evaluated library.
+
+    python benchmarks/bench_stress.py
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stress_testing import HISTORICAL_WINDOWS, StressEngine
+from synthetic import synthetic_returns
+
+
+def loop_replay(returns: pd.DataFrame, weights_matrix: np.ndarray) -> np.ndarray:
+    """P&L per window and portfolio, one buy-and-hold replay at a time"""
+    pnl = np.empty((len(HISTORICAL_WINDOWS), len(weights_matrix)))
+    for s, (start, end) in enumerate(HISTORICAL_WINDOWS.values()):
+        window = returns.loc[(returns.index > start) & (returns.index <= end)]
+        for k, weights in enumerate(weights_matrix):
+            value = (1 + window).cumprod() @ weights
+            pnl[s, k] = value.iloc[-1] - 1
+    return pnl
+
+
+def main():
+    returns = synthetic_returns(500, 6000)  # 2000 to 2023
+    rng = np.random.default_rng(0)
+
+    engine = StressEngine(list(returns.columns))
+    start = time.perf_counter()
+    engine.add_historical_windows(returns)
+    for i in range(20):
+        engine.add_shock(f"Shock {i}", dict(zip(returns.columns, rng.normal(-0.1, 0.05, 500))))
+    engine.add_market_shock("Market -20%", -0.2, returns)
+    print(f"{len(engine)} scenarios built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{'portfolios':>10} {'engine (ms)':>12} {'cached (ms)':>12} {'add one (ms)':>13} "
+          f"{'loop (ms)':>10} {'speedup':>8} {'max diff':>9}")
+    for num_portfolios in [1, 10, 100, 1000]:
+        weights = rng.dirichlet(np.ones(500), num_portfolios)
+
+        start = time.perf_counter()
+        results = engine.evaluate(weights)
+        engine_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.evaluate(weights)
+        cached_time = time.perf_counter() - start
+
+        engine.add_shock("Extra", {returns.columns[0]: -0.5})
+        start = time.perf_counter()
+        engine.evaluate(weights)
+        add_time = time.perf_counter() - start
+        engine.remove("Extra")
+
+        loop_time, difference = float('nan'), float('nan')
+        if num_portfolios <= 100:
+            start = time.perf_counter()
+            reference = loop_replay(returns, weights)
+            loop_time = time.perf_counter() - start
+            difference = np.abs(results['pnl'][:len(HISTORICAL_WINDOWS)] - reference).max()
+
+        print(f"{num_portfolios:>10} {engine_time * 1000:>12.1f} {cached_time * 1000:>12.2f} {add_time * 1000:>13.2f} "
+              f"{loop_time * 1000:>10.0f} {loop_time / engine_time:>7.0f}x {difference:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Symbol index on synthetic listings the size of the full US listing and
+larger: compile time, cold open (memory-mapped) and lookup latency for
+symbol prefixes, company names and misspelt names.
+
+    python benchmarks/bench_symbols.py
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from symbol_index import SymbolIndex, build_index
+
+LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+def synthetic_listing(num_symbols: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    words = list({"".join(rng.choice(LETTERS, rng.integers(4, 11))) for _ in range(num_symbols // 2)})
+    rows, seen = [], set()
+    while len(rows) < num_symbols:
+        symbol = "".join(rng.choice(LETTERS, rng.integers(1, 6))).upper()
+        if symbol in seen:
+            continue
+        seen.add(symbol)
+        name = " ".join(words[i].capitalize() for i in rng.integers(0, len(words), rng.integers(1, 4))) + " Inc."
+        rows.append((symbol, name, ("NASDAQ", "NYSE", "NYSEARCA")[rng.integers(0, 3)]))
+    return rows, words
+
+
+def misspell(word: str, rng) -> str:
+    i = int(rng.integers(0, len(word)))
+    return word[:i] + str(rng.choice(LETTERS)) + word[i + 1:]
+
+
+def latency(index: SymbolIndex, queries, **kwargs):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, **kwargs)
+        times.append(time.perf_counter() - start)
+    return np.percentile(np.array(times) * 1e6, [50, 99])
+
+
+def main():
+    rng = np.random.default_rng(1)
+    print(f"{'symbols':>8} {'build (s)':>9} {'open (ms)':>9} {'MB':>5} "
+          f"{'prefix p50/p99 (us)':>20} {'name p50/p99':>13} {'fuzzy p50/p99':>14}")
+    for num_symbols in [10000, 50000, 200000]:
+        rows, words = synthetic_listing(num_symbols)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index")
+            start = time.perf_counter()
+            build_index(rows, path)
+            build_time = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+
+            start = time.perf_counter()
+            index = SymbolIndex(path)
+            open_time = time.perf_counter() - start
+            index.search("warm up")
+
+            samples = rng.integers(0, len(rows), 300)
+            prefix = latency(index, [rows[i][0][:2] for i in samples], fuzzy=False)
+            name = latency(index, [rows[i][1].split()[0][:5] for i in samples], fuzzy=False)
+            fuzzy = latency(index, [misspell(words[i % len(words)], rng) for i in samples])
+            del index
+
+        print(f"{num_symbols:>8} {build_time:>9.2f} {open_time * 1000:>9.2f} {size:>5.1f} "
+              f"{prefix[0]:>9.0f}/{prefix[1]:<10.0f} {name[0]:>6.0f}/{name[1]:<6.0f} {fuzzy[0]:>6.0f}/{fuzzy[1]:<7.0f}")
+
+
+if __name__ == "__main__":
+    main()
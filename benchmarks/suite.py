@@ -0,0 +1,237 @@
+"""
+Reproducible benchmark suite: optimizer, risk metrics and data pipeline over
+a sweep of universe sizes, history lengths and frontier points, on seeded
+factor-model returns (no network).
+
+Each case records its best wall time over a few repeats and its peak traced
+memory (tracemalloc, measured in a separate run so it does not slow the
+timings). Results can be saved as a baseline and later compared against it;
+the comparison exits non-zero when a case regresses beyond the threshold.
+
+    python benchmarks/suite.py --quick --save benchmarks/baseline.json
+    python benchmarks/suite.py --quick --compare benchmarks/baseline.json --threshold 0.25
+    python benchmarks/suite.py --only frontier --assets 10 500 2000
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from portfolio_calculations import calculate_portfolio_value
+from portfolio_optimizer import PortfolioOptimizer
+from preprocessing import align_prices, compute_returns
+from risk_metrics import RiskMetrics
+from synthetic import synthetic_returns
+
+# Sweep grids; --quick keeps a run under a minute or two
+FULL = {'assets': [10, 100, 500, 2000], 'years': [1, 5, 20], 'points': [10, 50]}
+QUICK = {'assets': [10, 100, 500], 'years': [1, 5], 'points': [10]}
+
+
+def _returns(num_assets: int, years: int):
+    return synthetic_returns(num_assets, 252 * years, seed=42)
+
+
+def frontier_cases(grid: Dict) -> Iterator[Tuple[str, Dict, Callable[[], Callable]]]:
+    for num_assets in grid['assets']:
+        for points in grid['points']:
+            def setup(num_assets=num_assets, points=points):
+                returns = _returns(num_assets, 5)
+                # Targets inside the efficient range, which efficient_frontier would clip to
+                targets = np.linspace(*PortfolioOptimizer(returns).frontier_range(), points)
+                return lambda: PortfolioOptimizer(returns).efficient_frontier(targets)
+            yield 'frontier', {'assets': num_assets, 'years': 5, 'points': points}, setup
+
+
+def optimizer_cases(grid: Dict):
+    for num_assets in grid['assets']:
+        for years in grid['years']:
+            def setup(num_assets=num_assets, years=years):
+                returns = _returns(num_assets, years)
+
+                def run():
+                    optimizer = PortfolioOptimizer(returns)
+                    optimizer.min_variance()
+                    optimizer.max_sharpe_ratio(0.02)
+                return run
+            yield 'optimizer', {'assets': num_assets, 'years': years}, setup
+
+
+def risk_engine_cases(grid: Dict):
+    for num_assets in grid['assets']:
+        for years in grid['years']:
+            def setup(num_assets=num_assets, years=years):
+                returns = _returns(num_assets, years)
+
+                def run():
+                    optimizer = PortfolioOptimizer(returns)
+                    optimizer.risk_parity()
+                    optimizer.min_cvar()
+                return run
+            yield 'risk_engines', {'assets': num_assets, 'years': years}, setup
+
+
+def risk_cases(grid: Dict):
+    for num_assets in grid['assets']:
+        for years in grid['years']:
+            def setup(num_assets=num_assets, years=years):
+                returns = _returns(num_assets, years)
+                weights = np.full(num_assets, 1 / num_assets)
+
+                def run():
+                    metrics = RiskMetrics(returns)
+                    metrics.calculate_var(weights)
+                    metrics.calculate_cvar(weights)
+                    metrics.calculate_drawdown(weights)
+                    metrics.calculate_rolling_volatility(weights)
+                return run
+            yield 'risk_metrics', {'assets': num_assets, 'years': years}, setup
+
+
+def batch_risk_cases(grid: Dict):
+    for num_assets in grid['assets']:
+        for years in grid['years']:
+            def setup(num_assets=num_assets, years=years):
+                returns = _returns(num_assets, years)
+                weights = np.random.default_rng(0).dirichlet(np.ones(num_assets), size=100)
+                return lambda: RiskMetrics(returns).calculate_batch_metrics(weights)
+            yield 'batch_risk', {'assets': num_assets, 'years': years, 'portfolios': 100}, setup
+
+
+def pipeline_cases(grid: Dict):
+    for num_assets in grid['assets']:
+        for years in grid['years']:
+            def setup(num_assets=num_assets, years=years):
+                prices = (1 + _returns(num_assets, years)).cumprod() * 100
+                # A third of the universe lists halfway through the history
+                prices.iloc[:len(prices) // 2, ::3] = np.nan
+                return lambda: compute_returns(align_prices(prices))
+            yield 'preprocess', {'assets': num_assets, 'years': years}, setup
+
+
+def portfolio_value_cases(grid: Dict):
+    for num_assets in grid['assets']:
+        def setup(num_assets=num_assets):
+            rng = np.random.default_rng(0)
+            tickers = [f"A{i:04d}" for i in range(num_assets)]
+            holdings = dict(zip(tickers, rng.integers(1, 1000, num_assets).tolist()))
+            prices = dict(zip(tickers, rng.uniform(5, 500, num_assets).tolist()))
+
+            def run():
+                for _ in range(100):
+                    calculate_portfolio_value(holdings, prices)
+            return run
+        yield 'portfolio_value', {'assets': num_assets, 'calls': 100}, setup
+
+
+SUITES = {
+    'frontier': frontier_cases,
+    'optimizer': optimizer_cases,
+    'risk_engines': risk_engine_cases,
+    'risk_metrics': risk_cases,
+    'batch_risk': batch_risk_cases,
+    'preprocess': pipeline_cases,
+    'portfolio_value': portfolio_value_cases,
+}
+
+
+def case_key(name: str, params: Dict) -> str:
+    return name + '[' + ','.join(f"{k}={v}" for k, v in params.items()) + ']'
+
+
+def measure(setup: Callable[[], Callable], repeats: int) -> Dict:
+    """Best wall time over `repeats` runs, then peak traced memory of one more run"""
+    run = setup()
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': min(times), 'median_time': float(np.median(times)), 'peak_memory': peak}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_time: float) -> List[str]:
+    """Describe every case slower or hungrier than baseline * (1 + threshold)"""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result['time'] > reference['time'] * (1 + threshold) and result['time'] - reference['time'] > min_time:
+            regressions.append(f"{key}: time {reference['time'] * 1000:.1f} -> {result['time'] * 1000:.1f} ms")
+        if result['peak_memory'] > reference['peak_memory'] * (1 + threshold) + 1024 ** 2:
+            regressions.append(f"{key}: peak memory {reference['peak_memory'] / 2 ** 20:.1f} -> "
+                               f"{result['peak_memory'] / 2 ** 20:.1f} MB")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="Smaller sweep")
+    parser.add_argument("--only", nargs="+", choices=list(SUITES), help="Run only these suites")
+    parser.add_argument("--assets", nargs="+", type=int, help="Override the asset sweep")
+    parser.add_argument("--years", nargs="+", type=int, help="Override the history sweep (years)")
+    parser.add_argument("--points", nargs="+", type=int, help="Override the frontier points sweep")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--save", help="Write results to this baseline file")
+    parser.add_argument("--compare", help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--min-time", type=float, default=0.005,
+                        help="Ignore time regressions smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore")
+    grid = dict(QUICK if args.quick else FULL)
+    for field in ('assets', 'years', 'points'):
+        if getattr(args, field):
+            grid[field] = getattr(args, field)
+
+    results = {}
+    print(f"{'case':<58} {'time (ms)':>10} {'peak (MB)':>10}")
+    for suite in args.only or list(SUITES):
+        for name, params, setup in SUITES[suite](grid):
+            key = case_key(name, params)
+            results[key] = measure(setup, args.repeats)
+            print(f"{key:<58} {results[key]['time'] * 1000:>10.1f} {results[key]['peak_memory'] / 2 ** 20:>10.1f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'cpus': os.cpu_count()},
+                'grid': grid,
+                'results': results
+            }, f, indent=2)
+        print(f"Saved {len(results)} cases to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
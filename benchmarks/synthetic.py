@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_returns(num_assets: int, num_days: int, num_factors: int = 5, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate daily returns from a seeded linear factor model, so benchmarks need no network
+    """
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0, 1, size=(num_assets, num_factors))
+    factors = rng.normal(0, 0.01 / np.sqrt(num_factors), size=(num_days, num_factors))
+    specific = rng.normal(0, 0.01, size=(num_days, num_assets))
+    drift = rng.uniform(0.0001, 0.0008, size=num_assets)
+
+    returns = drift + factors @ loadings.T + specific
+    dates = pd.bdate_range("2000-01-03", periods=num_days)
+    tickers = [f"A{i:04d}" for i in range(num_assets)]
+    return pd.DataFrame(returns, index=dates, columns=tickers)
@@ -0,0 +1,409 @@
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from covariance import covariance_factor
+from portfolio_calculations import calculate_portfolio_value
+from profiling import profiler
+
+# Solvers able to handle mixed-integer QPs, in order of preference, with the
+# solve() options that cap their run time at a number of seconds
+MIQP_SOLVERS = {
+    'GUROBI': lambda seconds: {'TimeLimit': seconds},
+    'MOSEK': lambda seconds: {'mosek_params': {'MSK_DPAR_OPTIMIZER_MAX_TIME': seconds}},
+    'CPLEX': lambda seconds: {'cplex_params': {'timelimit': seconds}},
+    'SCIP': lambda seconds: {'scip_params': {'limits/time': seconds}},
+}
+
+
+class ConstraintSpec:
+    """
+    Declarative portfolio constraints.
+
+    - lower_bounds / upper_bounds: a scalar or a per-asset dict (default 0 and 1)
+    - groups: {name: {'assets': [...], 'min': 0.0, 'max': 0.4}} sector/group caps
+    - turnover_limit: max sum |w - current_weights| (requires current_weights)
+    - max_assets: maximum number of names held (cardinality)
+    - min_weight: minimum weight of every name held; the others are 0
+    - min_return: minimum expected (daily) portfolio return
+    """
+
+    def __init__(self, lower_bounds: Union[float, Dict[str, float]] = 0.0,
+                 upper_bounds: Union[float, Dict[str, float]] = 1.0,
+                 groups: Optional[Dict[str, Dict]] = None,
+                 turnover_limit: Optional[float] = None,
+                 current_weights: Optional[Union[np.ndarray, Dict[str, float]]] = None,
+                 max_assets: Optional[int] = None,
+                 min_return: Optional[float] = None,
+                 min_weight: Optional[float] = None):
+        if turnover_limit is not None and current_weights is None:
+            raise ValueError("A turnover limit needs the current weights")
+        if turnover_limit is not None and turnover_limit < 0:
+            raise ValueError("The turnover limit cannot be negative")
+        if max_assets is not None and (int(max_assets) != max_assets or max_assets < 1):
+            raise ValueError("max_assets must be a positive integer")
+        if min_weight is not None and not 0 < min_weight <= 1:
+            raise ValueError("min_weight must be in (0, 1]")
+        if np.isscalar(lower_bounds) and np.isscalar(upper_bounds) and lower_bounds > upper_bounds:
+            raise ValueError("Lower bounds cannot exceed upper bounds")
+        for name, group in (groups or {}).items():
+            if 'assets' not in group:
+                raise ValueError(f"Group '{name}' has no assets")
+            if group.get('min', 0.0) > group.get('max', 1.0):
+                raise ValueError(f"Group '{name}' has a minimum above its maximum")
+        self.lower_bounds = lower_bounds
+        self.upper_bounds = upper_bounds
+        self.groups = groups or {}
+        self.turnover_limit = turnover_limit
+        self.current_weights = current_weights
+        self.max_assets = max_assets
+        self.min_return = min_return
+        self.min_weight = min_weight
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> "ConstraintSpec":
+        """Build a spec from plain data (e.g. parsed JSON or YAML)"""
+        return cls(**spec)
+
+    @property
+    def selects_assets(self) -> bool:
+        """Whether names are either held or not (cardinality or a minimum position size)"""
+        return self.max_assets is not None or self.min_weight is not None
+
+    @staticmethod
+    def _vector(value: Union[float, Dict[str, float], np.ndarray, None], assets: List[str],
+                default: float) -> np.ndarray:
+        if value is None:
+            return np.full(len(assets), default)
+        if isinstance(value, dict):
+            return np.array([value.get(asset, default) for asset in assets], dtype=float)
+        return np.broadcast_to(np.asarray(value, dtype=float), (len(assets),)).copy()
+
+    def structure(self, assets: List[str]) -> Tuple:
+        """Everything that changes the problem's shape; values are parameters"""
+        group_members = tuple(
+            (name, tuple(sorted(set(group['assets']) & set(assets)))) for name, group in sorted(self.groups.items())
+        )
+        return (tuple(assets), group_members, self.turnover_limit is not None, self.min_return is not None)
+
+    def values(self, assets: List[str]) -> Dict[str, np.ndarray]:
+        """Parameter values for a compiled problem"""
+        names = sorted(self.groups)
+        return {
+            'lower': self._vector(self.lower_bounds, assets, 0.0),
+            'upper': self._vector(self.upper_bounds, assets, 1.0),
+            'group_min': np.array([self.groups[name].get('min', 0.0) for name in names], dtype=float),
+            'group_max': np.array([self.groups[name].get('max', 1.0) for name in names], dtype=float),
+            'current': self._vector(self.current_weights, assets, 0.0),
+            'turnover_limit': np.array(self.turnover_limit if self.turnover_limit is not None else 2.0),
+            'min_return': np.array(self.min_return if self.min_return is not None else 0.0),
+        }
+
+
+def holdings_weights(holdings: Dict[str, int], prices: Dict[str, float]) -> Dict[str, float]:
+    """Current weights of share holdings, keyed by ticker, for turnover limits"""
+    weights = calculate_portfolio_value(holdings, prices)['weights']
+    return dict(zip(holdings.keys(), weights))
+
+
+class ConstrainedProblem:
+    """
+    Minimum-variance problem compiled once for a constraint structure. Bounds,
+    group limits, current weights, the turnover limit and the return floor are
+    cvxpy Parameters, so a new spec with the same structure only re-solves.
+    """
+
+    def __init__(self, assets: List[str], mean_returns: np.ndarray, cov_factor: np.ndarray,
+                 specific_risk: Optional[np.ndarray], spec: ConstraintSpec, integer: bool = False):
+        self.assets = list(assets)
+        self.structure = spec.structure(self.assets)
+        _, group_members, has_turnover, has_min_return = self.structure
+        num_assets = len(self.assets)
+        mean_returns = np.asarray(mean_returns, dtype=float)
+        self.return_scale = 1 / max(np.abs(mean_returns).max(), 1e-12)
+        self.scaled_returns = self.return_scale * mean_returns
+        self.cov_factor = cov_factor
+        self.specific_risk = specific_risk
+        self._selection_problems = {}
+
+        index = {asset: i for i, asset in enumerate(self.assets)}
+        self.membership = np.zeros((len(group_members), num_assets))
+        for row, (_, members) in enumerate(group_members):
+            self.membership[row, [index[a] for a in members]] = 1
+
+        # CVXPY is only imported once a constrained problem is first built
+        import cvxpy as cp
+        self.weights = cp.Variable(num_assets)
+        self.params = {
+            'lower': cp.Parameter(num_assets),
+            'upper': cp.Parameter(num_assets),
+            'current': cp.Parameter(num_assets),
+            'turnover_limit': cp.Parameter(nonneg=True),
+            'min_return': cp.Parameter(),
+        }
+
+        risk = cp.sum_squares(cov_factor @ self.weights)
+        if specific_risk is not None:
+            risk = risk + cp.sum_squares(cp.multiply(specific_risk, self.weights))
+        self.risk = risk
+
+        constraints = [cp.sum(self.weights) == 1, self.weights >= self.params['lower']]
+        if integer:
+            # An unselected name is capped at zero, a selected one held at min_weight or more
+            self.selected = cp.Variable(num_assets, boolean=True)
+            self.params['max_assets'] = cp.Parameter(nonneg=True)
+            self.params['min_weight'] = cp.Parameter(nonneg=True)
+            constraints += [
+                self.weights <= cp.multiply(self.params['upper'], self.selected),
+                self.weights >= self.params['min_weight'] * self.selected,
+                cp.sum(self.selected) <= self.params['max_assets']
+            ]
+        else:
+            constraints.append(self.weights <= self.params['upper'])
+
+        if group_members:
+            self.params['group_min'] = cp.Parameter(len(group_members))
+            self.params['group_max'] = cp.Parameter(len(group_members))
+            constraints += [
+                self.membership @ self.weights >= self.params['group_min'],
+                self.membership @ self.weights <= self.params['group_max']
+            ]
+        if has_turnover:
+            constraints.append(cp.norm1(self.weights - self.params['current']) <= self.params['turnover_limit'])
+        if has_min_return:
+            constraints.append(self.scaled_returns @ self.weights >= self.params['min_return'])
+
+        self.problem = cp.Problem(cp.Minimize(risk), constraints)
+
+    def set_values(self, spec: ConstraintSpec):
+        self.values = spec.values(self.assets)
+        self.values['min_return'] = self.values['min_return'] * self.return_scale
+        for name, param in self.params.items():
+            if name in self.values:
+                param.value = self.values[name]
+        self.min_weight = spec.min_weight or 0.0
+        if 'max_assets' in self.params:
+            self.params['max_assets'].value = spec.max_assets or len(self.assets)
+            self.params['min_weight'].value = self.min_weight
+
+    def marginal_risk(self, weights: np.ndarray) -> np.ndarray:
+        """Gradient of the (scaled) variance, 2(GᵀGw + d ∘ w)"""
+        gradient = 2 * self.cov_factor.T @ (self.cov_factor @ weights)
+        if self.specific_risk is not None:
+            gradient += 2 * self.specific_risk ** 2 * weights
+        return gradient
+
+    def solve(self, solver: Optional[str] = None, **kwargs) -> Optional[np.ndarray]:
+        """Solve with the current parameter values; None when infeasible"""
+        import cvxpy as cp
+        start = time.perf_counter()
+        try:
+            self.problem.solve(solver=solver, warm_start=True, **kwargs)
+        except cp.SolverError:
+            return None
+        finally:
+            profiler.record_solve('constrained.solve', self.problem, start)
+        if self.problem.status not in ["optimal", "optimal_inaccurate"] or self.weights.value is None:
+            return None
+        return self.weights.value.copy()
+
+    def solve_selection(self, selection: List[int]) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Solve with every name outside `selection` held at zero. The restricted
+        problem has only len(selection) variables and is compiled once per size,
+        with the selected block of the covariance as a parameter.
+        Returns full-length weights (None if infeasible) and the scaled variance.
+        """
+        size = len(selection)
+        if size not in self._selection_problems:
+            self._selection_problems[size] = _SelectionProblem(size, *self.structure[1:])
+        return self._selection_problems[size].solve(self, np.asarray(sorted(selection)))
+
+
+class _SelectionProblem:
+    """A ConstrainedProblem restricted to a fixed number of names, fully parametrized"""
+
+    def __init__(self, size: int, group_members: Tuple, has_turnover: bool, has_min_return: bool):
+        import cvxpy as cp
+        self.weights = cp.Variable(size)
+        self.params = {
+            'factor': cp.Parameter((size, size)),
+            'lower': cp.Parameter(size),
+            'upper': cp.Parameter(size),
+        }
+        constraints = [
+            cp.sum(self.weights) == 1,
+            self.weights >= self.params['lower'],
+            self.weights <= self.params['upper']
+        ]
+        if group_members:
+            self.params['membership'] = cp.Parameter((len(group_members), size))
+            self.params['group_min'] = cp.Parameter(len(group_members))
+            self.params['group_max'] = cp.Parameter(len(group_members))
+            constraints += [
+                self.params['membership'] @ self.weights >= self.params['group_min'],
+                self.params['membership'] @ self.weights <= self.params['group_max']
+            ]
+        if has_turnover:
+            # Selling every unselected name uses up part of the turnover budget
+            self.params['current'] = cp.Parameter(size)
+            self.params['turnover_limit'] = cp.Parameter()
+            constraints.append(cp.norm1(self.weights - self.params['current']) <= self.params['turnover_limit'])
+        if has_min_return:
+            self.params['returns'] = cp.Parameter(size)
+            self.params['min_return'] = cp.Parameter()
+            constraints.append(self.params['returns'] @ self.weights >= self.params['min_return'])
+
+        self.risk = cp.sum_squares(self.params['factor'] @ self.weights)
+        self.problem = cp.Problem(cp.Minimize(self.risk), constraints)
+
+    def solve(self, parent: ConstrainedProblem, selection: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        block = parent.cov_factor[:, selection]
+        block = block.T @ block
+        if parent.specific_risk is not None:
+            block[np.diag_indices_from(block)] += parent.specific_risk[selection] ** 2
+        values = parent.values
+        unselected = np.ones(len(parent.assets), dtype=bool)
+        unselected[selection] = False
+
+        params = self.params
+        params['factor'].value = covariance_factor_square(block)
+        # Every selected name is held at parent.min_weight or more
+        params['lower'].value = np.maximum(values['lower'][selection], parent.min_weight)
+        params['upper'].value = values['upper'][selection]
+        if 'membership' in params:
+            params['membership'].value = parent.membership[:, selection]
+            params['group_min'].value = values['group_min']
+            params['group_max'].value = values['group_max']
+        if 'current' in params:
+            params['current'].value = values['current'][selection]
+            params['turnover_limit'].value = values['turnover_limit'] - np.abs(values['current'][unselected]).sum()
+        if 'returns' in params:
+            params['returns'].value = parent.scaled_returns[selection]
+            params['min_return'].value = values['min_return']
+
+        import cvxpy as cp
+        start = time.perf_counter()
+        try:
+            self.problem.solve(warm_start=True)
+        except cp.SolverError:
+            return None, np.inf
+        finally:
+            profiler.record_solve('constrained.solve_selection', self.problem, start, size=len(selection))
+        if self.problem.status not in ["optimal", "optimal_inaccurate"] or self.weights.value is None:
+            return None, np.inf
+
+        weights = np.zeros(len(parent.assets))
+        weights[selection] = self.weights.value
+        return weights, self.risk.value
+
+
+def covariance_factor_square(cov_matrix: np.ndarray) -> np.ndarray:
+    """Square factor G (GᵀG = Σ) of a small covariance block, padding a dropped null space with zeros"""
+    factor = covariance_factor(cov_matrix)
+    if factor.shape[0] < factor.shape[1]:
+        factor = np.vstack([factor, np.zeros((factor.shape[1] - factor.shape[0], factor.shape[1]))])
+    return factor
+
+
+def solve_constrained(problem: ConstrainedProblem, spec: ConstraintSpec, backend: str = 'heuristic',
+                      time_limit: float = 1.0, tolerance: float = 1e-6) -> Dict:
+    """
+    Solve a compiled problem for a spec, handling cardinality and minimum
+    position sizes with either a mixed-integer solve ('mip', needs a
+    MIQP-capable solver) or a greedy heuristic with swap improvement. Both
+    stop after `time_limit` seconds (the MIP solver with its best solution).
+
+    Returns the weights (None if infeasible) and solve metrics.
+    """
+    start = time.perf_counter()
+    problem.set_values(spec)
+    stats = {'backend': backend, 'solves': 0}
+
+    if backend == 'mip' and 'max_assets' in problem.params:
+        import cvxpy as cp
+        solvers = [s for s in MIQP_SOLVERS if s in cp.installed_solvers()]
+        if not solvers:
+            raise ValueError("No mixed-integer QP solver installed; use backend='heuristic'")
+        weights = problem.solve(solver=solvers[0], **MIQP_SOLVERS[solvers[0]](time_limit))
+        stats.update(solves=1, solver=solvers[0])
+    else:
+        weights = problem.solve()
+        stats['solves'] += 1
+        stats['solver'] = problem.problem.solver_stats.solver_name if problem.problem.solver_stats else None
+        if weights is not None and _violates_selection(weights, spec, tolerance):
+            weights = _cardinality_heuristic(problem, spec, weights, start + time_limit, stats, tolerance)
+
+    status = problem.problem.status
+    if weights is not None:
+        weights = np.where(np.abs(weights) > tolerance, weights, 0.0)
+        weights = weights / weights.sum()
+    else:
+        status = 'infeasible' if status in ["optimal", "optimal_inaccurate"] else status
+    stats['status'] = status
+    stats['solve_time'] = time.perf_counter() - start
+    return {'weights': weights, 'solve_stats': stats}
+
+
+def _violates_selection(weights: np.ndarray, spec: ConstraintSpec, tolerance: float) -> bool:
+    """Whether continuous weights hold too many names or a name below min_weight"""
+    held = weights > tolerance
+    if spec.max_assets is not None and held.sum() > spec.max_assets:
+        return True
+    return spec.min_weight is not None and bool(np.any(weights[held] < spec.min_weight - tolerance))
+
+
+def _cardinality_heuristic(problem: ConstrainedProblem, spec: ConstraintSpec, relaxed: np.ndarray,
+                           deadline: float, stats: Dict, tolerance: float = 1e-6) -> Optional[np.ndarray]:
+    """
+    Keep the largest names of the relaxed solution (plus any with a positive
+    lower bound), at most max_assets and no more than min_weight allows, and
+    solve over those alone with every held name at min_weight or more. Then
+    swap held names for excluded ones with a low marginal variance while a
+    swap improves the risk and the deadline has not passed.
+    """
+    upper = problem.values['upper']
+    forced = problem.values['lower'] > 0
+    max_held = spec.max_assets if spec.max_assets is not None else len(relaxed)
+    if spec.min_weight is not None:
+        max_held = min(max_held, int(np.floor(1 / spec.min_weight + 1e-9)))
+    if forced.sum() > max_held:
+        return None
+
+    ranking = [i for i in np.argsort(-relaxed) if not forced[i]]
+    if spec.max_assets is None:
+        # Only a minimum position size: start from the names the relaxed solution holds
+        ranking = [i for i in ranking if relaxed[i] > tolerance]
+    held = set(np.flatnonzero(forced)) | set(ranking[:max_held - int(forced.sum())])
+
+    def solve_with(selection) -> Tuple[Optional[np.ndarray], float]:
+        stats['solves'] += 1
+        return problem.solve_selection(list(selection))
+
+    best, best_risk = solve_with(held)
+    stats['swaps'] = 0
+
+    def improving_swap():
+        """The first swap that lowers the risk: held names smallest first, each
+        against the len(held) excluded names with the lowest marginal variance"""
+        gradient = problem.marginal_risk(best)
+        removable = [i for i in sorted(held, key=lambda i: best[i]) if not forced[i]]
+        candidates = [i for i in np.argsort(gradient) if i not in held and upper[i] > 0][:len(held)]
+        for out in removable:
+            for candidate in candidates:
+                if time.perf_counter() >= deadline:
+                    return None
+                trial = (held - {out}) | {candidate}
+                weights, risk = solve_with(trial)
+                if weights is not None and risk < best_risk * (1 - 1e-9):
+                    return trial, weights, risk
+        return None
+
+    # Stops at a local optimum, where no single swap improves the risk
+    while best is not None and time.perf_counter() < deadline:
+        swap = improving_swap()
+        if swap is None:
+            break
+        held, best, best_risk = swap
+        stats['swaps'] += 1
+
+    return best
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple, Union
+from preprocessing import nearest_psd, pairwise_moments
+
+
+def covariance_factor(cov_matrix: np.ndarray) -> np.ndarray:
+    """
+    Factor a covariance matrix as G.T @ G so risk can be written as ||G w||^2
+    """
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    try:
+        return np.linalg.cholesky(cov_matrix).T
+    except np.linalg.LinAlgError:
+        # Sample covariances with T < N are only semidefinite; fall back to
+        # an eigendecomposition and drop the null space
+        eigvals, eigvecs = np.linalg.eigh(cov_matrix)
+        keep = eigvals > eigvals.max() * 1e-12
+        return (eigvecs[:, keep] * np.sqrt(eigvals[keep])).T
+
+
+class CovarianceModel:
+    """
+    A fitted covariance matrix Σ = GᵀG + diag(d).
+
+    `factor` (G, k×N) and `specific_variance` (d) are optional: a plain dense
+    model only has the matrix, and a factor is computed from it when a solver
+    asks for one. Factor models keep k small, so QPs can use ||Gw||² + ||√d ∘ w||²
+    instead of a dense N×N quadratic form.
+    """
+
+    def __init__(self, matrix: pd.DataFrame, factor: Optional[np.ndarray] = None,
+                 specific_variance: Optional[np.ndarray] = None):
+        self.matrix = matrix
+        self.factor = factor
+        self.specific_variance = specific_variance
+        self._cholesky = None
+
+    @property
+    def num_assets(self) -> int:
+        return self.matrix.shape[0]
+
+    def risk_factors(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Return (G, d) with Σ = GᵀG + diag(d); d is None for dense models"""
+        if self.factor is None:
+            self.factor = covariance_factor(self.matrix.values)
+        return self.factor, self.specific_variance
+
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        """Solve Σx = b, using the Woodbury identity when the model is low-rank plus diagonal"""
+        if self.specific_variance is not None and self.factor is not None and np.all(self.specific_variance > 0):
+            g, d = self.factor, self.specific_variance
+            d_inv_b = b / d
+            d_inv_gt = g.T / d[:, None]
+            capacitance = np.eye(g.shape[0]) + g @ d_inv_gt
+            return d_inv_b - d_inv_gt @ np.linalg.solve(capacitance, g @ d_inv_b)
+
+        # scipy.linalg is slow to import and only needed for dense solves
+        from scipy.linalg import cho_factor, cho_solve
+        if self._cholesky is None:
+            try:
+                self._cholesky = cho_factor(self.matrix.values)
+            except np.linalg.LinAlgError:
+                self._cholesky = False
+
+        if self._cholesky is False:
+            # Singular covariance: fall back to the minimum-norm solution
+            return np.linalg.lstsq(self.matrix.values, b, rcond=None)[0]
+        return cho_solve(self._cholesky, b)
+
+
+class CovarianceEstimator:
+    """
+    Interface for covariance backends: fit(returns) returns a CovarianceModel.
+    Estimators with handles_missing = False are only given complete rows.
+    """
+
+    name = "base"
+    handles_missing = False
+
+    def fit(self, returns: pd.DataFrame) -> CovarianceModel:
+        raise NotImplementedError
+
+    @staticmethod
+    def _frame(matrix: np.ndarray, returns: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(matrix, index=returns.columns, columns=returns.columns)
+
+
+class SampleCovariance(CovarianceEstimator):
+    """
+    Dense sample covariance, as returned by DataFrame.cov(). With missing
+    returns each pair uses the dates both assets were observed, and the result
+    is repaired to positive semidefinite.
+    """
+
+    name = "sample"
+    handles_missing = True
+
+    def fit(self, returns: pd.DataFrame) -> CovarianceModel:
+        values = returns.to_numpy(dtype=float)
+        if np.isnan(values).any():
+            _, cov, _ = pairwise_moments(returns)
+            return CovarianceModel(self._frame(nearest_psd(cov.values), returns))
+
+        num_periods, num_assets = values.shape
+        factor = None
+        if num_periods <= num_assets:
+            # The centered returns are already a factor with fewer rows than Cholesky
+            factor = (values - values.mean(axis=0)) / np.sqrt(max(num_periods - 1, 1))
+        return CovarianceModel(returns.cov(), factor=factor)
+
+
+class LedoitWolfCovariance(CovarianceEstimator):
+    """
+    Ledoit-Wolf (2004) shrinkage of the sample covariance towards a scaled
+    identity, with the optimal shrinkage intensity estimated from the data
+    """
+
+    name = "ledoit_wolf"
+
+    def fit(self, returns: pd.DataFrame) -> CovarianceModel:
+        values = returns.to_numpy(dtype=float)
+        num_periods, num_assets = values.shape
+        centered = values - values.mean(axis=0)
+        sample = centered.T @ centered / num_periods
+
+        mu = np.trace(sample) / num_assets
+        delta = ((sample - mu * np.eye(num_assets)) ** 2).sum() / num_assets
+        # Σ_t ||x_t x_tᵀ - S||² = Σ_t ||x_t||⁴ - T ||S||²
+        beta = ((centered ** 2).sum(axis=1) ** 2).sum() - num_periods * (sample ** 2).sum()
+        beta = min(beta / (num_periods ** 2 * num_assets), delta)
+        self.shrinkage = beta / delta if delta > 0 else 0.0
+
+        matrix = (1 - self.shrinkage) * sample + self.shrinkage * mu * np.eye(num_assets)
+        return CovarianceModel(self._frame(matrix, returns))
+
+
+class EWMACovariance(CovarianceEstimator):
+    """Exponentially weighted covariance with the given half-life in periods"""
+
+    name = "ewma"
+
+    def __init__(self, halflife: float = 63):
+        self.halflife = halflife
+
+    def fit(self, returns: pd.DataFrame) -> CovarianceModel:
+        values = returns.to_numpy(dtype=float)
+        num_periods, num_assets = values.shape
+        decay = 0.5 ** (1 / self.halflife)
+        weights = decay ** np.arange(num_periods - 1, -1, -1)
+        weights /= weights.sum()
+
+        centered = values - weights @ values
+        factor = np.sqrt(weights)[:, None] * centered
+        matrix = factor.T @ factor
+        return CovarianceModel(
+            self._frame(matrix, returns),
+            factor=factor if num_periods <= num_assets else None
+        )
+
+
+class FactorModelCovariance(CovarianceEstimator):
+    """
+    Statistical factor model: the top k principal components of the sample
+    covariance plus a diagonal of specific variances, Σ = BBᵀ + D
+    """
+
+    name = "factor"
+
+    def __init__(self, num_factors: int = 5, min_specific_variance: float = 1e-10):
+        self.num_factors = num_factors
+        self.min_specific_variance = min_specific_variance
+
+    def fit(self, returns: pd.DataFrame) -> CovarianceModel:
+        values = returns.to_numpy(dtype=float)
+        num_periods, num_assets = values.shape
+        centered = (values - values.mean(axis=0)) / np.sqrt(max(num_periods - 1, 1))
+
+        _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+        k = min(self.num_factors, len(singular_values))
+        factor = components[:k] * singular_values[:k, None]
+
+        total_variance = (centered ** 2).sum(axis=0)
+        specific_variance = np.maximum(total_variance - (factor ** 2).sum(axis=0), self.min_specific_variance)
+
+        matrix = factor.T @ factor + np.diag(specific_variance)
+        return CovarianceModel(self._frame(matrix, returns), factor=factor, specific_variance=specific_variance)
+
+
+COVARIANCE_ESTIMATORS = {
+    SampleCovariance.name: SampleCovariance,
+    LedoitWolfCovariance.name: LedoitWolfCovariance,
+    EWMACovariance.name: EWMACovariance,
+    FactorModelCovariance.name: FactorModelCovariance,
+}
+
+
+def get_covariance_estimator(estimator: Union[str, CovarianceEstimator, None] = None,
+                             **kwargs) -> CovarianceEstimator:
+    """Resolve an estimator instance from a registered name"""
+    if isinstance(estimator, CovarianceEstimator):
+        return estimator
+    name = estimator or SampleCovariance.name
+    if name not in COVARIANCE_ESTIMATORS:
+        raise ValueError(f"Unknown covariance estimator '{name}' (choose from {', '.join(COVARIANCE_ESTIMATORS)})")
+    return COVARIANCE_ESTIMATORS[name](**kwargs)
@@ -1,18 +1,82 @@
-import yfinance as yf
+import functools
+import re
+import threading
 import pandas as pd
-from alpha_vantage.timeseries import TimeSeries
 import os
-from dotenv import load_dotenv
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+from preprocessing import align_prices
+from profiling import profiled, profiler
+from price_cache import PriceCache
+from fetch_pool import RateLimiter, RetryBudget, map_concurrent
+
+# Provider SDKs (yfinance, alpha_vantage) and python-dotenv are imported on first
+# use, not at module load: most reruns and worker starts never reach the network.
+
+# A typed query that could be a ticker: up to five characters plus an optional
+# class or market suffix (BRK.B, BF-B, GC=F) or a leading ^ for indexes
+TICKER_PATTERN = re.compile(r"\^?[A-Z0-9]{1,5}(?:[.\-=][A-Z0-9]{1,3})?")
+
+
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    """Load .env into the environment once per process"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def yahoo_ticker(symbol: str):
+    """Default ticker factory: a yfinance Ticker, importing yfinance on the first call"""
+    import yfinance as yf
+    return yf.Ticker(symbol)
 
-load_dotenv()
 
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, cache: Optional[PriceCache] = None, use_cache: bool = True,
+                 offline: Optional[bool] = None, max_workers: int = 8,
+                 rate_limits: Optional[Dict[str, float]] = None, max_retries: int = 6,
+                 ticker_factory=None, symbol_index=None):
+        load_environment()
+        
+        # Offline mode serves everything from the local price cache
+        if offline is None:
+            offline = os.getenv('PORTFOLIO_OFFLINE', '').lower() in ('1', 'true', 'yes')
+        self.offline = offline
+        self.cache = cache if cache is not None else (PriceCache() if use_cache or offline else None)
+        self.price_field = 'Close'
+        
+        # Concurrency settings: worker pool size, calls/second per provider
+        # ('yahoo', 'alpha_vantage') and the retry budget shared by a batch
+        self.max_workers = max_workers
+        self.rate_limiters = {
+            provider: RateLimiter(rate) for provider, rate in (rate_limits or {}).items()
+        }
+        self.max_retries = max_retries
+        self.ticker_factory = ticker_factory or yahoo_ticker
+        self._symbol_index = symbol_index
+        
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY', '57PTG52IHJUJG5GH')
-        if self.alpha_vantage_key:
-            self.ts = TimeSeries(key=self.alpha_vantage_key, output_format='pandas')
+        self._ts = None
+        self._client_lock = threading.Lock()
     
+    @property
+    def ts(self):
+        """Alpha Vantage TimeSeries client, created on first use and reused"""
+        if self._ts is None:
+            with self._client_lock:
+                if self._ts is None:
+                    from alpha_vantage.timeseries import TimeSeries
+                    self._ts = TimeSeries(key=self.alpha_vantage_key, output_format='pandas')
+        return self._ts
+    
+    @property
+    def symbol_index(self):
+        """Local ticker symbol index, opened (memory-mapped) on first search"""
+        if self._symbol_index is None:
+            from symbol_index import default_index
+            self._symbol_index = default_index()
+        return self._symbol_index
+    
+    @profiled('fetch')
     def fetch_yfinance_data(self, tickers: List[str], start_date: str, end_date: str) -> pd.DataFrame:
         """Ultra-reliable Yahoo Finance data fetcher with comprehensive error handling"""
         try:
@@ -26,83 +90,151 @@ class DataFetcher:
             if start_dt >= end_dt:
                 raise ValueError("Start date must be before end date")
 
-            # We'll fetch each ticker individually for maximum reliability
-            all_data = {}
-            
-            for ticker in tickers:
-                try:
-                    # First try with auto_adjust=True
-                    ticker_obj = yf.Ticker(ticker)
-                    df = ticker_obj.history(
-                        start=start_date,
-                        end=end_date,
-                        auto_adjust=True,
-                        actions=False
-                    )
-                    
-                    # If empty, try without auto_adjust
-                    if df.empty:
-                        df = ticker_obj.history(
-                            start=start_date,
-                            end=end_date,
-                            auto_adjust=False,
-                            actions=False
-                        )
-                    
-                    # If still empty, try different period parameter
-                    if df.empty:
-                        df = ticker_obj.history(
-                            period="max",
-                            auto_adjust=True,
-                            actions=False
-                        )
-                        # Filter to our desired date range
-                        df = df.loc[start_date:end_date]
-                    
-                    # Verify we got data
-                    if df.empty:
-                        raise ValueError(f"No data available for {ticker} in date range")
-                    
-                    # Find the best available price column
-                    price_columns = ['Close', 'Adj Close', 'Open', 'High', 'Low']
-                    available_columns = [col for col in price_columns if col in df.columns]
-                    
-                    if not available_columns:
-                        raise ValueError(f"No price columns found for {ticker}")
-                    
-                    # Use the first available price column
-                    price_col = available_columns[0]
-                    all_data[ticker] = df[price_col]
-                    
-                except Exception as e:
-                    raise ValueError(f"Failed to fetch {ticker}: {str(e)}")
+            # Tickers are fetched concurrently; collect every failure before raising
+            all_data, errors = self.fetch_yfinance_batch(tickers, start_date, end_date)
+            if errors:
+                raise ValueError("; ".join(f"Failed to fetch {t}: {e}" for t, e in errors.items()))
             
             # Combine all tickers into a single DataFrame
-            result = pd.DataFrame(all_data)
+            result = pd.DataFrame({ticker: all_data[ticker] for ticker in tickers})
             
             if result.empty:
                 raise ValueError("No data available for any ticker")
                 
-            return result.dropna()
+            # Align calendars without truncating every ticker to the shortest history
+            return align_prices(result)
         
         except Exception as e:
             raise Exception(f"Error fetching Yahoo Finance data: {str(e)}")
     
+    def fetch_yfinance_batch(self, tickers: List[str], start_date: str,
+                             end_date: str) -> Tuple[Dict[str, pd.Series], Dict[str, str]]:
+        """
+        Fetch tickers concurrently, returning the series that succeeded and an
+        error message for each ticker that failed
+        """
+        return map_concurrent(
+            lambda ticker: self._fetch_ticker(ticker, start_date, end_date),
+            tickers,
+            max_workers=self.max_workers,
+            budget=self._retry_budget()
+        )
+    
+    def _retry_budget(self) -> RetryBudget:
+        return RetryBudget(max_retries=self.max_retries)
+    
+    def _throttle(self, provider: str):
+        limiter = self.rate_limiters.get(provider)
+        if limiter is not None:
+            limiter.acquire()
+    
+    def _history(self, ticker_obj, **kwargs) -> pd.DataFrame:
+        self._throttle('yahoo')
+        profiler.count('yahoo.requests')
+        with profiler.span('yahoo.history', 'fetch', ticker=getattr(ticker_obj, 'ticker', None)):
+            return ticker_obj.history(**kwargs)
+    
+    def _fetch_ticker(self, ticker: str, start_date: str, end_date: str) -> pd.Series:
+        """Fetch one ticker's prices, downloading only the dates missing from the cache"""
+        with profiler.span('fetch_ticker', 'fetch', ticker=ticker) as span:
+            if self.cache is None:
+                prices = self._download_history(ticker, start_date, end_date)
+                if prices.empty:
+                    raise ValueError(f"No data available for {ticker} in date range")
+                span.set(source='network', rows=len(prices))
+                return prices
+            
+            downloads = 0
+            if not self.offline:
+                top_up = self.cache.coverage(ticker, self.price_field) is not None
+                for gap_start, gap_end in self.cache.missing_ranges(ticker, self.price_field, start_date, end_date):
+                    gap_start = gap_start.strftime('%Y-%m-%d')
+                    gap_end = gap_end.strftime('%Y-%m-%d')
+                    # A top-up gap can legitimately be empty (weekends, holidays),
+                    # so skip the expensive full-history fallback for it
+                    prices = self._download_history(ticker, gap_start, gap_end, fallbacks=not top_up)
+                    self.cache.store(ticker, self.price_field, prices, gap_start, gap_end)
+                    downloads += 1
+            profiler.count('price_cache.misses' if downloads else 'price_cache.hits')
+            
+            prices = self.cache.load(ticker, self.price_field, start_date, end_date)
+            if prices is None or prices.empty:
+                if self.offline:
+                    raise ValueError(f"No cached data for {ticker} in date range (offline mode)")
+                raise ValueError(f"No data available for {ticker} in date range")
+            span.set(source='network' if downloads else 'cache', downloads=downloads, rows=len(prices))
+            return prices
+    
+    def _download_history(self, ticker: str, start_date: str, end_date: str,
+                          fallbacks: bool = True) -> pd.Series:
+        """Download a single ticker's price history from Yahoo Finance"""
+        # First try with auto_adjust=True
+        ticker_obj = self.ticker_factory(ticker)
+        df = self._history(
+            ticker_obj,
+            start=start_date,
+            end=end_date,
+            auto_adjust=True,
+            actions=False
+        )
+        
+        # If empty, try without auto_adjust
+        if df.empty and fallbacks:
+            df = self._history(
+                ticker_obj,
+                start=start_date,
+                end=end_date,
+                auto_adjust=False,
+                actions=False
+            )
+        
+        # If still empty, try different period parameter
+        if df.empty and fallbacks:
+            df = self._history(
+                ticker_obj,
+                period="max",
+                auto_adjust=True,
+                actions=False
+            )
+            # Filter to our desired date range
+            df = df.loc[start_date:end_date]
+        
+        if df.empty:
+            return pd.Series(dtype=float, name=ticker)
+        
+        # Find the best available price column
+        price_columns = ['Close', 'Adj Close', 'Open', 'High', 'Low']
+        available_columns = [col for col in price_columns if col in df.columns]
+        
+        if not available_columns:
+            raise ValueError(f"No price columns found for {ticker}")
+        
+        # Use the first available price column, indexed by tz-naive trading date
+        # so fresh downloads and cached history align
+        prices = df[available_columns[0]].rename(ticker)
+        if prices.index.tz is not None:
+            prices.index = prices.index.tz_localize(None)
+        prices.index = prices.index.normalize()
+        return prices
+    
+    @profiled('fetch')
     def fetch_alpha_vantage_data(self, tickers: List[str]) -> Optional[pd.DataFrame]:
         """Fetch current price data from Alpha Vantage."""
         try:
-            if not hasattr(self, 'ts') or not self.alpha_vantage_key:
+            if self.offline or not self.alpha_vantage_key:
                 return None
+            client = self.ts
                 
-            prices = {}
+            def fetch_quote(ticker: str) -> float:
+                self._throttle('alpha_vantage')
+                data, _ = client.get_quote_endpoint(symbol=ticker)
+                return float(data['05. price'])
             
-            for ticker in tickers:
-                try:
-                    data, _ = self.ts.get_quote_endpoint(symbol=ticker)
-                    prices[ticker] = float(data['05. price'])
-                except Exception as e:
-                    print(f"Error fetching {ticker} from Alpha Vantage: {str(e)}")
-                    continue
+            prices, errors = map_concurrent(
+                fetch_quote, tickers, max_workers=self.max_workers, budget=self._retry_budget()
+            )
+            for ticker, error in errors.items():
+                print(f"Error fetching {ticker} from Alpha Vantage: {error}")
             
             return pd.DataFrame.from_dict(prices, orient='index', columns=['price']) if prices else None
         
@@ -110,25 +242,53 @@ class DataFetcher:
             print(f"Error in Alpha Vantage fetch: {str(e)}")
             return None
     
-    def get_available_tickers(self, query: str) -> List[str]:
+    def get_available_tickers(self, query: str, limit: int = 10, exchange: Optional[str] = None) -> List[str]:
+        """Ranked symbols matching a symbol prefix or company name, from the local index"""
+        typed = query.strip().upper()
         try:
-            ticker = yf.Ticker(query)
-            info = ticker.info
-            if info and 'symbol' in info:
-                return [info['symbol']]
-            return [query]
+            results = self.symbol_index.search(query, limit=limit, exchange=exchange)
         except Exception as e:
             print(f"Error searching for tickers: {str(e)}")
-            return [query]
+            results = []
+        matches = [result['symbol'] for result in results]
+        # Symbols missing from the listing can still be added as typed, but only
+        # when the query looks like a ticker and matched no symbol or name, so
+        # name searches and misspellings never offer symbols that don't exist
+        if TICKER_PATTERN.fullmatch(typed) and not any(result['match'] != 'fuzzy' for result in results):
+            matches.append(typed)
+        return matches
     
+    def ticker_label(self, symbol: str) -> str:
+        """Symbol with its company name and exchange, when the index knows them"""
+        try:
+            match = self.symbol_index.lookup(symbol)
+        except Exception:
+            match = None
+        if not match or not match['name']:
+            return symbol
+        return f"{symbol} · {match['name']} ({match['exchange']})" if match['exchange'] else f"{symbol} · {match['name']}"
+    
+    @profiled('fetch')
     def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
         """Get current market prices for tickers"""
-        prices = {}
-        for ticker in tickers:
-            try:
-                data = yf.Ticker(ticker).history(period='1d')
-                if not data.empty and 'Close' in data.columns:
-                    prices[ticker] = data['Close'].iloc[-1]
-            except Exception as e:
-                print(f"Couldn't fetch price for {ticker}: {str(e)}")
-        return prices
\ No newline at end of file
+        if self.offline:
+            # Fall back to the last cached close
+            prices = {}
+            for ticker in tickers:
+                cached = self.cache.load(ticker, self.price_field)
+                if cached is not None and not cached.empty:
+                    prices[ticker] = float(cached.iloc[-1])
+            return prices
+        
+        def fetch_price(ticker: str) -> Optional[float]:
+            data = self._history(self.ticker_factory(ticker), period='1d')
+            if not data.empty and 'Close' in data.columns:
+                return data['Close'].iloc[-1]
+            return None
+        
+        prices, errors = map_concurrent(
+            fetch_price, tickers, max_workers=self.max_workers, budget=self._retry_budget()
+        )
+        for ticker, error in errors.items():
+            print(f"Couldn't fetch price for {ticker}: {error}")
+        return {ticker: price for ticker, price in prices.items() if price is not None}
\ No newline at end of file
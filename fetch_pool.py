@@ -0,0 +1,103 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from profiling import profiler
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `rate` calls per second with bursts of `burst`
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryBudget:
+    """
+    Retry allowance shared by every task in a batch, so a flaky provider cannot
+    multiply the batch's wall time by the per-ticker retry count
+    """
+
+    def __init__(self, max_retries: int = 6, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Take one retry from the budget, returning False once it is spent"""
+        with self._lock:
+            if self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def call_with_retry(fn: Callable[[], Any], budget: Optional[RetryBudget] = None) -> Any:
+    """
+    Call fn, retrying transient failures with backoff while the shared budget lasts.
+    ValueError signals a permanent failure (no data, bad symbol) and is never retried.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except ValueError:
+            raise
+        except Exception:
+            if budget is None or not budget.acquire():
+                raise
+            profiler.count('fetch.retries')
+            time.sleep(budget.backoff(attempt))
+            attempt += 1
+
+
+def map_concurrent(fn: Callable[[str], Any], keys: Iterable[str], max_workers: int = 8,
+                   budget: Optional[RetryBudget] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run fn(key) for every key on a bounded thread pool.
+
+    Returns (results, errors): one failing key never aborts the others, and its
+    error message is reported under its key instead.
+    """
+    keys = list(dict.fromkeys(keys))
+    results, errors = {}, {}
+    if not keys:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        futures = {key: pool.submit(call_with_retry, lambda key=key: fn(key), budget) for key in keys}
+        for key in keys:
+            try:
+                results[key] = futures[key].result()
+            except Exception as e:
+                errors[key] = str(e)
+
+    return results, errors
@@ -0,0 +1,156 @@
+import time
+import heapq
+import warnings
+import numpy as np
+import cvxpy as cp
+from typing import Dict, List, Optional
+from profiling import profiler
+
+
+class ParametricFrontier:
+    """
+    Long-only minimum-variance problem compiled once with the target return as a
+    parameter, so sweeping the frontier only re-solves with warm starts.
+    Risk is ||Gw||² plus ||√d ∘ w||² when specific_risk (√d) is given.
+    """
+
+    def __init__(self, mean_returns: np.ndarray, cov_factor: np.ndarray,
+                 specific_risk: Optional[np.ndarray] = None, solver: Optional[str] = None,
+                 max_iter: int = 1000):
+        self.mean_returns = np.asarray(mean_returns, dtype=float)
+        self.cov_factor = np.asarray(cov_factor, dtype=float)
+        self.specific_risk = specific_risk
+        self.solver = solver
+        self.max_iter = max_iter
+        self._stall_target = None
+        self.num_assets = len(self.mean_returns)
+
+        # Daily returns are ~1e-4, below the solvers' absolute tolerance, so the
+        # return constraint is expressed in units of the largest mean return
+        self.return_scale = 1 / max(np.abs(self.mean_returns).max(), 1e-12)
+
+        self.weights = cp.Variable(self.num_assets)
+        self.target = cp.Parameter()
+        # Σ = GᵀG (+ diag(d) for factor models), never a dense N×N quad_form
+        risk = cp.sum_squares(self.cov_factor @ self.weights)
+        if specific_risk is not None:
+            risk = risk + cp.sum_squares(cp.multiply(specific_risk, self.weights))
+        constraints = [
+            cp.sum(self.weights) == 1,
+            self.weights >= 0,
+            (self.return_scale * self.mean_returns) @ self.weights >= self.target
+        ]
+        self.problem = cp.Problem(cp.Minimize(risk), constraints)
+
+    def _solve_quietly(self, **kwargs) -> Optional[str]:
+        """
+        Solve and return the status, or None when the solver fails. CVXPY's
+        "Solution may be inaccurate" UserWarning is suppressed: the caller
+        handles the 'optimal_inaccurate' status itself.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='Solution may be inaccurate', category=UserWarning)
+            try:
+                self.problem.solve(warm_start=True, **kwargs)
+            except cp.SolverError:
+                return None
+        return self.problem.status
+
+    def solve(self, target: float) -> Dict:
+        """
+        Solve for a single target return, reusing the compiled problem. A
+        solution the solver flags as inaccurate is kept (status
+        'optimal_inaccurate') only when no accurate one is found.
+        """
+        self.target.value = float(target) * self.return_scale
+        start = time.perf_counter()
+        if self.solver is not None:
+            status = self._solve_quietly(solver=self.solver)
+        else:
+            # OSQP warm-starts well low on the frontier but stalls near the top,
+            # where the feasible set shrinks to a point, or stops with an
+            # inaccurate solution. Above the lowest target where that happened,
+            # go straight to an interior-point method.
+            status = None
+            if self._stall_target is None or target < self._stall_target:
+                status = self._solve_quietly(solver=cp.OSQP, max_iter=self.max_iter)
+                if status != "optimal":
+                    self._stall_target = target if self._stall_target is None else min(self._stall_target, target)
+            if status != "optimal":
+                status = self._solve_quietly(solver=cp.CLARABEL)
+        solve_time = time.perf_counter() - start
+        profiler.record_solve('frontier.solve', self.problem, start, target=float(target))
+        if status == "optimal_inaccurate":
+            profiler.count('frontier.inaccurate')
+
+        weights = self.weights.value
+        if status not in ["optimal", "optimal_inaccurate"] or weights is None:
+            weights = None
+        else:
+            # Solver tolerances leave tiny negative weights; project back
+            weights = np.clip(weights, 0, None)
+            weights = weights / weights.sum()
+
+        return {
+            'target': float(target),
+            'status': status if status is not None else 'solver_error',
+            'weights': weights,
+            'solve_time': solve_time
+        }
+
+    def _volatility(self, weights: np.ndarray) -> float:
+        """Volatility in the solver's (scaled) units; only ratios are used"""
+        variance = np.sum((self.cov_factor @ weights) ** 2)
+        if self.specific_risk is not None:
+            variance += np.sum((self.specific_risk * weights) ** 2)
+        return float(np.sqrt(variance))
+
+    def trace(self, low: Dict, high: Dict, tolerance: float = 0.001, max_points: int = 100) -> List[Dict]:
+        """
+        Adaptively trace the frontier between two solved endpoints.
+
+        Return and volatility are rescaled so both endpoints span [0, 1], and
+        each interval is scored by the distance from its solved midpoint to the
+        chord between its ends, as a fraction of that box. The worst interval is
+        split first, so points concentrate where the frontier bends, until
+        every interval is within `tolerance` or `max_points` are solved. The
+        error is therefore independent of the return and risk levels, and
+        steep and flat stretches of the frontier are refined alike. The
+        endpoint dicts are copied, never modified.
+        """
+        low, high = dict(low), dict(high)
+        points = [low, high]
+        for point in points:
+            point.setdefault('volatility_scaled', self._volatility(point['weights']))
+        return_span = max(high['target'] - low['target'], 1e-18)
+        volatility_span = max(abs(high['volatility_scaled'] - low['volatility_scaled']), 1e-18)
+
+        queue = []
+
+        def push(left: Dict, right: Dict):
+            if right['target'] - left['target'] <= 1e-12 * max(1.0, abs(right['target'])):
+                return
+            mid = self.solve((left['target'] + right['target']) / 2)
+            if mid['weights'] is None:
+                return
+            mid['volatility_scaled'] = self._volatility(mid['weights'])
+            points.append(mid)
+            interpolated = (left['volatility_scaled'] + right['volatility_scaled']) / 2
+            slope = ((right['volatility_scaled'] - left['volatility_scaled']) / volatility_span
+                     / ((right['target'] - left['target']) / return_span))
+            error = (interpolated - mid['volatility_scaled']) / volatility_span / np.sqrt(1 + slope ** 2)
+            # Tie-break on insertion order so dicts are never compared
+            heapq.heappush(queue, (-error, len(points), left, mid, right))
+
+        push(low, high)
+        while queue and len(points) < max_points:
+            neg_error, _, left, mid, right = heapq.heappop(queue)
+            if -neg_error <= tolerance:
+                break
+            push(left, mid)
+            if len(points) < max_points:
+                push(mid, right)
+
+        for point in points:
+            point.pop('volatility_scaled', None)
+        return sorted(points, key=lambda p: p['target'])
@@ -0,0 +1,309 @@
+"""
+Live valuation of holdings from a stream of quotes.
+
+    python live_valuation.py AAPL=10 MSFT=5 GOOG=3 --simulate --duration 10
+    python live_valuation.py AAPL=10 MSFT=5 --targets AAPL=0.6 MSFT=0.4 --interval 15
+
+Quotes arrive through asyncio from a pluggable PriceSource: a simulated
+random-walk feed (local, deterministic, for tests and benchmarks) or a
+poller around DataFetcher.get_current_prices. Holdings and prices live in
+aligned NumPy arrays, and every tick updates the portfolio value and the
+drift from the target weights in O(1).
+"""
+import abc
+import argparse
+import asyncio
+import time
+import numpy as np
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Sequence
+from profiling import profiler
+
+
+class Quote(NamedTuple):
+    ticker: str
+    price: float
+    # time.perf_counter() when the quote was produced, for latency measurement
+    timestamp: float
+
+
+class PortfolioState:
+    """
+    Holdings, prices and target weights in arrays aligned on `tickers`.
+
+    Besides the position values v and total T, the state keeps Σv² and Σv·t,
+    so a price update changes T, the squared drift ||v/T - t||² and any single
+    weight in O(1); the full weight vector is computed on demand. The running
+    sums are rebuilt from the arrays every `resync_every` updates to stop
+    rounding error from accumulating.
+    """
+
+    def __init__(self, holdings: Dict[str, float], prices: Dict[str, float],
+                 target_weights: Optional[Dict[str, float]] = None, resync_every: int = 100000):
+        self.tickers = list(holdings)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        missing = [ticker for ticker in self.tickers if ticker not in prices]
+        if missing:
+            raise ValueError(f"No price for {', '.join(missing)}")
+
+        self.shares = np.array([holdings[t] for t in self.tickers], dtype=float)
+        self.prices = np.array([prices[t] for t in self.tickers], dtype=float)
+        if target_weights is None:
+            self.targets = np.full(len(self.tickers), 1 / len(self.tickers)) if self.tickers else np.zeros(0)
+        else:
+            self.targets = np.array([target_weights.get(t, 0.0) for t in self.tickers], dtype=float)
+        self.resync_every = resync_every
+        self.updates = 0
+        self.resync()
+
+    def resync(self):
+        """Recompute the position values and running sums from the arrays"""
+        self.values = self.shares * self.prices
+        self.total_value = float(self.values.sum())
+        self._sum_squares = float(self.values @ self.values)
+        self._sum_targets = float(self.values @ self.targets)
+        self._target_norm = float(self.targets @ self.targets)
+        self._since_resync = 0
+
+    def update(self, ticker: str, price: float) -> float:
+        """Apply one quote and return the new portfolio value"""
+        i = self.index.get(ticker)
+        if i is None:
+            return self.total_value
+        old = self.values[i]
+        new = self.shares[i] * price
+        self.prices[i] = price
+        self.values[i] = new
+        self.total_value += new - old
+        self._sum_squares += new * new - old * old
+        self._sum_targets += (new - old) * self.targets[i]
+
+        self.updates += 1
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every:
+            self.resync()
+        return self.total_value
+
+    def update_many(self, tickers: Sequence[str], prices: Sequence[float]):
+        """Apply a batch of quotes (the last quote of a ticker wins) with array operations"""
+        indices = np.array([self.index.get(t, -1) for t in tickers])
+        prices = np.asarray(prices, dtype=float)
+        known = indices >= 0
+        indices, prices = indices[known], prices[known]
+        # Keep the last quote per ticker
+        _, last = np.unique(indices[::-1], return_index=True)
+        keep = len(indices) - 1 - last
+        indices, prices = indices[keep], prices[keep]
+
+        self.prices[indices] = prices
+        self.values[indices] = self.shares[indices] * prices
+        self.updates += len(indices)
+        self.resync()
+
+    def weight(self, ticker: str) -> float:
+        return self.values[self.index[ticker]] / self.total_value if self.total_value else 0.0
+
+    @property
+    def weights(self) -> np.ndarray:
+        if self.total_value == 0:
+            return np.zeros(len(self.values))
+        return self.values / self.total_value
+
+    @property
+    def drift(self) -> float:
+        """Euclidean distance ||w - t|| of the current weights from the targets, in O(1)"""
+        if self.total_value == 0:
+            return float(np.sqrt(self._target_norm))
+        squared = (self._sum_squares / self.total_value ** 2
+                   - 2 * self._sum_targets / self.total_value + self._target_norm)
+        return float(np.sqrt(max(squared, 0.0)))
+
+    @property
+    def turnover_to_target(self) -> float:
+        """Σ|w - t|: the turnover a rebalance back to the targets would need"""
+        return float(np.abs(self.weights - self.targets).sum())
+
+    def snapshot(self) -> Dict:
+        """Value, weights and drift, shaped like calculate_portfolio_value plus the drift"""
+        return {
+            'weights': self.weights,
+            'total_value': self.total_value,
+            'current_prices': dict(zip(self.tickers, self.prices.tolist())),
+            'drift': self.drift,
+            'turnover_to_target': self.turnover_to_target
+        }
+
+
+class PriceSource(abc.ABC):
+    """Async stream of quotes; subclasses implement stream() as an async generator"""
+
+    @abc.abstractmethod
+    def stream(self, tickers: List[str]) -> AsyncIterator[Quote]:
+        """Yield quotes for `tickers` until the consumer closes the stream"""
+
+
+class SimulatedPriceSource(PriceSource):
+    """
+    Geometric random walk with one ticker moving per quote, for tests and
+    benchmarks. `rate` (quotes per second) paces the feed; None streams as
+    fast as the consumer accepts quotes. Seeded, so runs are reproducible.
+    """
+
+    def __init__(self, prices: Dict[str, float], volatility: float = 0.0005, rate: Optional[float] = None,
+                 seed: int = 0, chunk_size: int = 4096):
+        self.prices = dict(prices)
+        self.volatility = volatility
+        self.rate = rate
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    async def stream(self, tickers: List[str]) -> AsyncIterator[Quote]:
+        rng = np.random.default_rng(self.seed)
+        levels = np.array([self.prices[t] for t in tickers], dtype=float)
+        start = time.perf_counter()
+        produced = 0
+        while True:
+            # Random draws are made a chunk at a time; yielding stays per quote
+            which = rng.integers(0, len(tickers), self.chunk_size)
+            moves = np.exp(rng.normal(0, self.volatility, self.chunk_size))
+            for i, move in zip(which.tolist(), moves.tolist()):
+                levels[i] *= move
+                if self.rate is not None:
+                    delay = start + produced / self.rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                produced += 1
+                yield Quote(tickers[i], float(levels[i]), time.perf_counter())
+            # Let other tasks run between chunks when unpaced
+            await asyncio.sleep(0)
+
+
+class PollingPriceSource(PriceSource):
+    """
+    Polls DataFetcher.get_current_prices (concurrent per ticker) every
+    `interval` seconds in a worker thread, yielding a quote for each price
+    that changed
+    """
+
+    def __init__(self, fetcher, interval: float = 15.0):
+        self.fetcher = fetcher
+        self.interval = interval
+
+    async def stream(self, tickers: List[str]) -> AsyncIterator[Quote]:
+        loop = asyncio.get_running_loop()
+        last: Dict[str, float] = {}
+        while True:
+            started = time.perf_counter()
+            prices = await loop.run_in_executor(None, self.fetcher.get_current_prices, tickers)
+            for ticker, price in prices.items():
+                if last.get(ticker) != price:
+                    last[ticker] = price
+                    yield Quote(ticker, float(price), time.perf_counter())
+            await asyncio.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+
+class LiveValuation:
+    """
+    Consumes a PriceSource into a PortfolioState, recording per-quote latency
+    (quote produced to portfolio updated) and throughput
+    """
+
+    def __init__(self, state: PortfolioState, source: PriceSource, on_update=None,
+                 max_latency_samples: int = 1000000):
+        self.state = state
+        self.source = source
+        self.on_update = on_update
+        self.max_latency_samples = max_latency_samples
+        self.ticks = 0
+        self.elapsed = 0.0
+        self._latencies: List[float] = []
+
+    async def run(self, max_ticks: Optional[int] = None, duration: Optional[float] = None) -> Dict:
+        """Stream until `max_ticks` quotes or `duration` seconds, whichever comes first"""
+        deadline = None if duration is None else time.perf_counter() + duration
+        start = time.perf_counter()
+        stream = self.source.stream(self.state.tickers)
+        try:
+            with profiler.span('live_valuation', 'risk', tickers=len(self.state.tickers)) as span:
+                async for quote in stream:
+                    self.state.update(quote.ticker, quote.price)
+                    now = time.perf_counter()
+                    if len(self._latencies) < self.max_latency_samples:
+                        self._latencies.append(now - quote.timestamp)
+                    self.ticks += 1
+                    if self.on_update is not None:
+                        self.on_update(self.state, quote)
+                    if (max_ticks is not None and self.ticks >= max_ticks) or (deadline is not None and now >= deadline):
+                        break
+                span.set(ticks=self.ticks)
+        finally:
+            await stream.aclose()
+            self.elapsed += time.perf_counter() - start
+        return self.stats()
+
+    def stats(self) -> Dict:
+        """Ticks, ticks per second and latency percentiles in microseconds"""
+        latencies = np.array(self._latencies) * 1e6
+        p50, p99, worst = np.percentile(latencies, [50, 99, 100]) if len(latencies) else (np.nan,) * 3
+        return {
+            'ticks': self.ticks,
+            'ticks_per_second': self.ticks / self.elapsed if self.elapsed else 0.0,
+            'latency_p50_us': float(p50),
+            'latency_p99_us': float(p99),
+            'latency_max_us': float(worst)
+        }
+
+
+def _parse_pairs(pairs: Sequence[str], kind: str) -> Dict[str, float]:
+    parsed = {}
+    for pair in pairs:
+        ticker, sep, value = pair.partition('=')
+        if not sep:
+            raise ValueError(f"Expected TICKER=VALUE for {kind}, got '{pair}'")
+        parsed[ticker.upper()] = float(value)
+    return parsed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Stream live portfolio value, weights and drift")
+    parser.add_argument("holdings", nargs="+", help="Holdings as TICKER=SHARES")
+    parser.add_argument("--targets", nargs="+", default=None, help="Target weights as TICKER=WEIGHT (default equal)")
+    parser.add_argument("--simulate", action="store_true", help="Use the simulated feed instead of live quotes")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Simulated quotes per second")
+    parser.add_argument("--interval", type=float, default=15.0, help="Seconds between live polls")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--report-every", type=float, default=1.0, help="Seconds between printed snapshots")
+    args = parser.parse_args(argv)
+
+    holdings = _parse_pairs(args.holdings, 'holdings')
+    targets = _parse_pairs(args.targets, 'targets') if args.targets else None
+
+    if args.simulate:
+        prices = {ticker: 100.0 for ticker in holdings}
+        source = SimulatedPriceSource(prices, rate=args.rate)
+    else:
+        from data_fetcher import DataFetcher
+        fetcher = DataFetcher()
+        prices = fetcher.get_current_prices(list(holdings))
+        source = PollingPriceSource(fetcher, interval=args.interval)
+
+    state = PortfolioState(holdings, prices, targets)
+    last_report = [time.perf_counter()]
+
+    def report(state: PortfolioState, quote: Quote):
+        now = time.perf_counter()
+        if now - last_report[0] >= args.report_every:
+            last_report[0] = now
+            weights = ", ".join(f"{t} {w:.1%}" for t, w in zip(state.tickers, state.weights))
+            print(f"{state.total_value:>14,.2f}  drift {state.drift:.4f}  {weights}")
+
+    valuation = LiveValuation(state, source, on_update=report)
+    try:
+        stats = asyncio.run(valuation.run(duration=args.duration))
+    except KeyboardInterrupt:
+        stats = valuation.stats()
+    print(f"{stats['ticks']} quotes, {stats['ticks_per_second']:,.0f}/s, latency p50 "
+          f"{stats['latency_p50_us']:.1f} us, p99 {stats['latency_p99_us']:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
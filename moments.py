@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import List, Optional, Union
+
+
+class RollingMoments:
+    """
+    Incrementally maintained mean and covariance of asset returns over an
+    expanding window or the last `window` observations.
+
+    Batches of rows are merged into (and dropped from) the running count, mean
+    and co-moment matrix with the pairwise update of Chan et al., so each new
+    bar costs O(N²) instead of recomputing mean() and cov() over all T rows.
+    """
+
+    def __init__(self, assets: List[str], window: Optional[int] = None):
+        self.assets = list(assets)
+        self._asset_index = pd.Index(self.assets)
+        self.window = window
+        self.count = 0
+        self._mean = np.zeros(len(self.assets))
+        self._comoment = np.zeros((len(self.assets), len(self.assets)))
+        # Rows still inside the window (only kept when it is bounded)
+        self._rows = deque()
+        self._dates = deque()
+        self._last_prices = None
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, window: Optional[int] = None) -> "RollingMoments":
+        """Seed the moments from a returns history"""
+        moments = cls(returns.columns, window=window)
+        moments.update(returns)
+        return moments
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, window: Optional[int] = None) -> "RollingMoments":
+        """Seed the moments from a price history, remembering the last prices for push_prices"""
+        from utils import calculate_simple_returns
+        moments = cls.from_returns(calculate_simple_returns(prices), window=window)
+        moments._last_prices = prices.iloc[-1].to_numpy(dtype=float)
+        return moments
+
+    def _merge(self, rows: np.ndarray, sign: int):
+        """Add (sign=1) or remove (sign=-1) a batch of rows from the running moments"""
+        batch_count = len(rows)
+        if batch_count == 1:
+            # A single bar has no co-moment of its own
+            batch_mean = rows[0]
+            batch_comoment = 0
+        else:
+            batch_mean = rows.mean(axis=0)
+            centered = rows - batch_mean
+            batch_comoment = centered.T @ centered
+
+        if sign > 0:
+            total = self.count + batch_count
+            delta = batch_mean - self._mean
+            self._comoment += batch_comoment + np.outer(delta, delta) * (self.count * batch_count / total)
+            self._mean += delta * (batch_count / total)
+            self.count = total
+        else:
+            remaining = self.count - batch_count
+            if remaining <= 0:
+                self.count = 0
+                self._mean[:] = 0
+                self._comoment[:] = 0
+                return
+            remaining_mean = (self.count * self._mean - batch_count * batch_mean) / remaining
+            delta = batch_mean - remaining_mean
+            self._comoment -= batch_comoment + np.outer(delta, delta) * (remaining * batch_count / self.count)
+            self._mean = remaining_mean
+            self.count = remaining
+
+    def update(self, returns: Union[pd.DataFrame, pd.Series, np.ndarray]):
+        """
+        Add new return rows (a DataFrame, a single row Series or an array) and drop
+        the rows that fall out of the window. Rows with missing values are skipped.
+        """
+        if isinstance(returns, pd.Series):
+            # Fast path for a single new bar
+            values = returns if returns.index.equals(self._asset_index) else returns[self.assets]
+            dates = [returns.name]
+            rows = values.to_numpy(dtype=float)[None, :]
+        elif isinstance(returns, pd.DataFrame):
+            dates = list(returns.index)
+            rows = returns[self.assets].to_numpy(dtype=float)
+        else:
+            rows = np.atleast_2d(np.asarray(returns, dtype=float))
+            dates = [None] * len(rows)
+
+        valid = ~np.isnan(rows).any(axis=1)
+        rows = rows[valid]
+        dates = [date for date, keep in zip(dates, valid) if keep]
+        if self.window is not None:
+            # Rows that would be dropped again within this batch never enter
+            rows, dates = rows[-self.window:], dates[-self.window:]
+        if len(rows) == 0:
+            return
+
+        self._merge(rows, 1)
+        if self.window is None:
+            return
+
+        self._rows.extend(rows)
+        self._dates.extend(dates)
+        excess = len(self._rows) - self.window
+        if excess > 0:
+            expired = np.array([self._rows.popleft() for _ in range(excess)])
+            for _ in range(excess):
+                self._dates.popleft()
+            self._merge(expired, -1)
+
+    def push_prices(self, prices: Union[pd.DataFrame, pd.Series]):
+        """Append new price bars, converting them to simple returns against the last known prices"""
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame().T
+        values = prices[self.assets].to_numpy(dtype=float)
+        if self._last_prices is not None:
+            values = np.vstack([self._last_prices, values])
+        returns = values[1:] / values[:-1] - 1
+        self._last_prices = values[-1]
+        self.update(pd.DataFrame(returns, index=prices.index[-len(returns):], columns=self.assets)
+                    if len(returns) else np.empty((0, len(self.assets))))
+
+    def mean(self) -> pd.Series:
+        """Mean return of each asset over the window"""
+        return pd.Series(self._mean.copy(), index=self._asset_index)
+
+    def cov(self) -> pd.DataFrame:
+        """Sample covariance (ddof=1) over the window"""
+        if self.count < 2:
+            raise ValueError("At least two observations are needed for a covariance")
+        return pd.DataFrame(self._comoment / (self.count - 1), index=self._asset_index, columns=self._asset_index)
+
+    def window_returns(self) -> Optional[pd.DataFrame]:
+        """The return rows currently inside a bounded window (None when expanding)"""
+        if self.window is None:
+            return None
+        return pd.DataFrame(np.array(self._rows), index=list(self._dates), columns=self.assets)
@@ -3,18 +3,16 @@ from typing import Dict
 
 def calculate_portfolio_value(holdings: Dict[str, int], prices: Dict[str, float]) -> Dict:
     """Calculate portfolio weights based on actual holdings"""
-    total_value = sum(shares * prices[ticker] for ticker, shares in holdings.items())
-    
-    if total_value == 0:
-        return {ticker: 0 for ticker in holdings.keys()}
-    
-    weights = {
-        ticker: (shares * prices[ticker]) / total_value
-        for ticker, shares in holdings.items()
-    }
-    
+    shares = np.fromiter(holdings.values(), dtype=float, count=len(holdings))
+    position_prices = np.fromiter((prices[ticker] for ticker in holdings), dtype=float, count=len(holdings))
+    values = shares * position_prices
+    total_value = float(values.sum())
+
+    # A worthless (or empty) portfolio keeps the same shape, with zero weights
+    weights = values / total_value if total_value != 0 else np.zeros(len(values))
+
     return {
-        'weights': np.array(list(weights.values())),
+        'weights': weights,
         'total_value': total_value,
         'current_prices': prices
-    }
\ No newline at end of file
+    }
@@ -1,19 +1,86 @@
+import time
 import numpy as np
 import pandas as pd
-import cvxpy as cp
-from scipy.optimize import minimize
-from typing import Tuple, Dict, List
+from typing import TYPE_CHECKING, Tuple, Dict, List, Optional, Union
+from constraints import ConstrainedProblem, ConstraintSpec, solve_constrained
+from covariance import CovarianceEstimator, CovarianceModel, get_covariance_estimator
+from profiling import profiled, profiler
+from returns_panel import ReturnsPanel, as_frame
+from risk_engines import min_cvar_weights, risk_parity_weights
+from utils import annualize_return, annualize_volatility
+
+# CVXPY takes longer to import than the rest of the optimizer together, so it is
+# only imported by the QP paths that need it (closed forms come first). hrp
+# (scipy.cluster) is likewise imported by hrp() alone.
+if TYPE_CHECKING:
+    import cvxpy as cp
+    from frontier import ParametricFrontier
 
 class PortfolioOptimizer:
-    def __init__(self, returns: pd.DataFrame):
-        # Clean data by dropping NA values
-        self.returns = returns.dropna()
+    def __init__(self, returns: Union[pd.DataFrame, ReturnsPanel],
+                 covariance: Union[str, CovarianceEstimator] = 'sample'):
+        # Pluggable covariance backend: 'sample', 'ledoit_wolf', 'ewma', 'factor'
+        self._estimator = get_covariance_estimator(covariance)
+        self._risk_params = None
+        self._fit(returns)
+    
+    def _fit(self, returns: Union[pd.DataFrame, ReturnsPanel], keep_problems: bool = False):
+        estimator = self._estimator
+        
+        # Keep each asset's own history: only dates without any returns are dropped.
+        # Means then use every observation of an asset and the sample covariance
+        # pairwise-complete ones; other estimators still need complete rows.
+        # A complete shared panel is used in place
+        has_nan = returns.has_nan if isinstance(returns, ReturnsPanel) else returns.isna().values.any()
+        self.returns = as_frame(returns)
+        if has_nan:
+            self.returns = self.returns.dropna(how='all' if estimator.handles_missing else 'any')
         if self.returns.empty:
             raise ValueError("No valid returns data after cleaning NA values")
             
-        self.mean_returns = self.returns.mean()
-        self.cov_matrix = self.returns.cov()
-        self.num_assets = len(self.returns.columns)
+        with profiler.span('covariance.fit', 'optimize', estimator=estimator.name, assets=self.returns.shape[1]):
+            cov_model = estimator.fit(self.returns)
+        self._set_moments(self.returns.mean(), cov_model, keep_problems=keep_problems)
+    
+    def update(self, returns: Union[pd.DataFrame, ReturnsPanel]):
+        """
+        Refit the moments on a new returns window over the same assets, e.g.
+        the next rebalance date of a backtest. The minimum variance and
+        maximum Sharpe QPs take the moments as parameters, so they are kept
+        and re-solved with a warm start instead of being compiled again.
+        """
+        if list(as_frame(returns).columns) != list(self.mean_returns.index):
+            raise ValueError("update() needs returns for the optimizer's assets")
+        self._fit(returns, keep_problems=True)
+    
+    @classmethod
+    def from_moments(cls, moments) -> 'PortfolioOptimizer':
+        """
+        Build an optimizer from a RollingMoments accumulator without recomputing
+        mean() and cov() over the full history. `returns` holds the rows of a
+        bounded window, or None for an expanding one, in which case min_cvar
+        needs explicit scenarios.
+        """
+        optimizer = cls.__new__(cls)
+        optimizer._estimator = get_covariance_estimator('sample')
+        optimizer._risk_params = None
+        optimizer.returns = moments.window_returns()
+        optimizer._set_moments(moments.mean(), CovarianceModel(moments.cov()))
+        return optimizer
+    
+    def _set_moments(self, mean_returns: pd.Series, cov_model: CovarianceModel, keep_problems: bool = False):
+        self.mean_returns = mean_returns
+        self.cov_model = cov_model
+        self.cov_matrix = cov_model.matrix
+        self.num_assets = len(mean_returns)
+        self._frontier = None
+        self._risk_factors = None
+        if not keep_problems:
+            self._risk_params = None
+            self._min_variance_problem = None
+            self._max_sharpe_problem = None
+        self._constrained_problems = {}
+        self._hrp_linkages = {}
         
     def calculate_portfolio_performance(self, weights: np.ndarray) -> Tuple[float, float]:
         """Calculate portfolio return and volatility with input validation"""
@@ -30,34 +97,21 @@ class PortfolioOptimizer:
         port_vol = np.sqrt(np.dot(weights.T, np.dot(self.cov_matrix, weights)))
         return float(port_return), float(port_vol)
     
+    @profiled('optimize')
     def efficient_frontier(self, target_returns: np.ndarray) -> List[Dict]:
         """Calculate efficient frontier with robust error handling"""
         efficient_portfolios = []
         
-        # Validate target returns range
-        min_return = self.mean_returns.min()
-        max_return = self.mean_returns.max()
-        target_returns = np.clip(target_returns, min_return, max_return)
+        # Validate target returns range: below the minimum variance return the
+        # frontier is inefficient, above the best asset it is infeasible
+        min_return, max_return = self.frontier_range()
+        target_returns = np.unique(np.clip(target_returns, min_return, max_return))
         
         for target in target_returns:
-            weights = cp.Variable(self.num_assets)
-            risk = cp.quad_form(weights, self.cov_matrix.values)
-            
-            constraints = [
-                cp.sum(weights) == 1,
-                weights >= 0,
-                self.mean_returns.values.T @ weights >= target
-            ]
-            
-            problem = cp.Problem(cp.Minimize(risk), constraints)
-            
             try:
-                problem.solve()
+                point = self._parametric_frontier().solve(target)
                 
-                if problem.status in ["infeasible", "unbounded"]:
-                    continue
-                    
-                w = weights.value
+                w = point['weights']
                 if w is None:
                     continue
                     
@@ -65,7 +119,8 @@ class PortfolioOptimizer:
                 efficient_portfolios.append({
                     'return': ret,
                     'volatility': vol,
-                    'weights': w
+                    'weights': w,
+                    'solve_time': point['solve_time']
                 })
                 
             except Exception as e:
@@ -74,6 +129,50 @@ class PortfolioOptimizer:
         
         return efficient_portfolios
     
+    def frontier_range(self) -> Tuple[float, float]:
+        """Return range of the long-only frontier: minimum variance return to best asset mean"""
+        return self.min_variance()['return'], float(self.mean_returns.max())
+    
+    @profiled('optimize')
+    def adaptive_frontier(self, tolerance: float = 0.001, max_points: int = 100) -> List[Dict]:
+        """
+        Calculate the efficient frontier to an error tolerance instead of on a
+        fixed grid: points are added where the frontier curves most, between the
+        minimum variance and maximum return portfolios. `tolerance` is a
+        fraction of the frontier's return/volatility range (see
+        ParametricFrontier.trace)
+        """
+        frontier = self._parametric_frontier()
+        
+        min_var = self.min_variance()
+        low = {'target': min_var['return'], 'status': 'optimal', 'weights': min_var['weights'], 'solve_time': 0.0}
+        
+        # The maximum return portfolio holds only the best asset; solving for it
+        # directly is degenerate, so it is constructed instead
+        best = np.zeros(self.num_assets)
+        best[int(np.argmax(self.mean_returns.values))] = 1.0
+        high = {'target': float(self.mean_returns.max()), 'status': 'optimal', 'weights': best, 'solve_time': 0.0}
+        
+        efficient_portfolios = []
+        for point in frontier.trace(low, high, tolerance=tolerance, max_points=max_points):
+            ret, vol = self.calculate_portfolio_performance(point['weights'])
+            efficient_portfolios.append({
+                'return': ret,
+                'volatility': vol,
+                'weights': point['weights'],
+                'solve_time': point['solve_time']
+            })
+        
+        return efficient_portfolios
+    
+    def _parametric_frontier(self) -> 'ParametricFrontier':
+        """Build the parametric frontier problem once and reuse it across calls"""
+        if self._frontier is None:
+            from frontier import ParametricFrontier
+            cov_factor, specific_risk = self._scaled_risk_factors()
+            self._frontier = ParametricFrontier(self.mean_returns.values, cov_factor, specific_risk)
+        return self._frontier
+    
     def equal_weight_portfolio(self) -> Dict:
         """
         Calculate equal weight portfolio performance
@@ -85,4 +184,263 @@ class PortfolioOptimizer:
             'weights': weights,
             'return': ret,
             'volatility': vol
-        }
\ No newline at end of file
+        }
+    
+    @profiled('optimize')
+    def min_variance(self, long_only: bool = True, risk_free_rate: float = 0.0) -> Dict:
+        """
+        Calculate the minimum variance portfolio.
+        
+        The closed-form solution w ∝ Σ⁻¹1 is tried first; a long-only QP is only
+        solved when that solution has short positions.
+        """
+        weights = self._solve_covariance(np.ones(self.num_assets))
+        weights = weights / weights.sum()
+        
+        if long_only and np.any(weights < -1e-10):
+            risk_params = self._risk_parameters()
+            if self._min_variance_problem is None:
+                import cvxpy as cp
+                w = cp.Variable(self.num_assets)
+                problem = cp.Problem(
+                    cp.Minimize(self._risk(w, risk_params)),
+                    [cp.sum(w) == 1, w >= 0]
+                )
+                self._min_variance_problem = (w, problem)
+            
+            w, problem = self._min_variance_problem
+            weights = self._solve_long_only(w, problem, "Minimum variance")
+        
+        return self._portfolio_result(weights, risk_free_rate)
+    
+    @profiled('optimize')
+    def max_sharpe_ratio(self, risk_free_rate: float = 0.0, long_only: bool = True) -> Dict:
+        """
+        Calculate the maximum Sharpe ratio (tangency) portfolio for an annual risk-free rate.
+        
+        The closed-form solution w ∝ Σ⁻¹(μ - rf) is tried first. Otherwise the
+        homogenized QP  min yᵀΣy  s.t. (μ - rf)ᵀy = 1, y >= 0  is solved and
+        rescaled with w = y / sum(y).
+        """
+        daily_rf = risk_free_rate / 252
+        excess = self.mean_returns.values - daily_rf
+        if not np.any(excess > 0):
+            raise ValueError("No asset has an expected return above the risk-free rate")
+        
+        y = self._solve_covariance(excess)
+        if y.sum() > 0 and (not long_only or np.all(y >= -1e-10)):
+            weights = y / y.sum()
+        elif not long_only:
+            raise ValueError("Maximum Sharpe portfolio is undefined when the tangency weights sum to zero or less")
+        else:
+            # Returns are rescaled too, keeping y of order one
+            scale = 1 / np.abs(self.mean_returns.values).max()
+            risk_params = self._risk_parameters()
+            if self._max_sharpe_problem is None:
+                import cvxpy as cp
+                y = cp.Variable(self.num_assets)
+                returns = cp.Parameter(self.num_assets)
+                rf = cp.Parameter()
+                problem = cp.Problem(
+                    cp.Minimize(self._risk(y, risk_params)),
+                    [returns @ y - rf * cp.sum(y) == 1, y >= 0]
+                )
+                self._max_sharpe_problem = (y, returns, rf, problem)
+            
+            y, returns, rf, problem = self._max_sharpe_problem
+            returns.value = scale * self.mean_returns.values
+            rf.value = scale * daily_rf
+            weights = self._solve_long_only(y, problem, "Maximum Sharpe ratio")
+        
+        return self._portfolio_result(weights, risk_free_rate)
+    
+    @profiled('optimize')
+    def constrained(self, spec: Union[ConstraintSpec, Dict], backend: str = 'heuristic',
+                    time_limit: float = 1.0, risk_free_rate: float = 0.0) -> Dict:
+        """
+        Minimum variance portfolio under a ConstraintSpec (position bounds, group
+        caps, a turnover limit, a return floor, a maximum number of names and a
+        minimum position size).
+        
+        The problem is compiled once per constraint structure and cached; specs
+        that only change limits re-solve the same parametrized problem. The
+        result carries 'solve_stats' (backend, solver, solves, status, solve_time).
+        """
+        if isinstance(spec, dict):
+            spec = ConstraintSpec.from_dict(spec)
+        if backend not in ('heuristic', 'mip'):
+            raise ValueError("Cardinality backend must be 'heuristic' or 'mip'")
+        
+        assets = list(self.mean_returns.index)
+        integer = backend == 'mip' and spec.selects_assets
+        key = (spec.structure(assets), integer)
+        if key not in self._constrained_problems:
+            cov_factor, specific_risk = self._scaled_risk_factors()
+            self._constrained_problems[key] = ConstrainedProblem(
+                assets, self.mean_returns.values, cov_factor, specific_risk, spec, integer=integer
+            )
+        
+        solution = solve_constrained(self._constrained_problems[key], spec, backend=backend, time_limit=time_limit)
+        if solution['weights'] is None:
+            raise ValueError(f"Constrained optimization failed with status {solution['solve_stats']['status']}")
+        
+        result = self._portfolio_result(solution['weights'], risk_free_rate)
+        result['solve_stats'] = solution['solve_stats']
+        return result
+    
+    @profiled('optimize')
+    def risk_parity(self, budgets: Optional[np.ndarray] = None, risk_free_rate: float = 0.0,
+                    tolerance: float = 1e-8) -> Dict:
+        """
+        Calculate the risk parity portfolio: every asset contributes equally to
+        portfolio variance, or in proportion to `budgets` (see risk_parity_weights).
+        """
+        solution = risk_parity_weights(self.cov_matrix.values, budgets, tolerance=tolerance)
+        return self._portfolio_result(solution['weights'], risk_free_rate)
+    
+    @profiled('optimize')
+    def min_cvar(self, alpha: float = 0.05, scenarios: Optional[np.ndarray] = None,
+                 long_only: bool = True, min_return: Optional[float] = None,
+                 risk_free_rate: float = 0.0, method: str = 'ipm') -> Dict:
+        """
+        Calculate the portfolio minimizing Conditional Value at Risk at alpha over
+        return scenarios (rows, one column per asset): the historical returns by
+        default, or e.g. RiskMetrics.scenarios('simulated'). `min_return` is a
+        daily expected return floor. See min_cvar_weights for the solver methods.
+        """
+        if scenarios is None:
+            if self.returns is None:
+                # An expanding RollingMoments keeps no return rows to replay
+                raise ValueError("scenarios required for a moments-only optimizer")
+            scenarios = np.nan_to_num(self.returns.to_numpy(dtype=float))
+        scenarios = np.asarray(scenarios, dtype=float)
+        if scenarios.ndim != 2 or scenarios.shape[1] != self.num_assets:
+            raise ValueError(f"Scenarios must have one column per asset ({self.num_assets})")
+        
+        start = time.perf_counter()
+        solution = min_cvar_weights(scenarios, alpha=alpha, long_only=long_only, min_return=min_return,
+                                    expected_returns=self.mean_returns.values, method=method)
+        profiler.record('Minimum CVaR', 'optimize', start, time.perf_counter() - start,
+                        scenarios=len(scenarios), assets=self.num_assets, iterations=solution['iterations'])
+        
+        result = self._portfolio_result(solution['weights'], risk_free_rate)
+        result['var'] = solution['var']
+        result['cvar'] = solution['cvar']
+        return result
+    
+    @profiled('optimize')
+    def hrp(self, linkage: Optional[np.ndarray] = None, method: str = 'single',
+            risk_free_rate: float = 0.0) -> Dict:
+        """
+        Calculate the Hierarchical Risk Parity portfolio (see hrp_weights).
+        
+        The linkage of this optimizer's correlation matrix is computed once per
+        method and reused; pass `linkage` to cluster on another correlation
+        estimate (e.g. one cached across reruns). The result carries 'order',
+        the quasi-diagonal asset order.
+        """
+        from hrp import hrp_weights
+        own_linkage = linkage is None
+        if own_linkage:
+            linkage = self._hrp_linkages.get(method)
+        solution = hrp_weights(self.cov_matrix.values, linkage=linkage, method=method)
+        if own_linkage:
+            self._hrp_linkages[method] = solution['linkage']
+        
+        result = self._portfolio_result(solution['weights'], risk_free_rate)
+        result['order'] = solution['order']
+        return result
+    
+    def _scaled_risk_factors(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Factors (G, √d) with GᵀG + diag(d) ∝ Σ, shared by every QP on this optimizer.
+        They are scaled to unit average variance because daily covariances (~1e-4)
+        sit far below the solvers' default absolute tolerances.
+        """
+        if self._risk_factors is None:
+            factor, specific_variance = self.cov_model.risk_factors()
+            scale = np.sqrt(np.trace(self.cov_matrix.values) / self.num_assets)
+            specific_risk = None if specific_variance is None else np.sqrt(specific_variance) / scale
+            self._risk_factors = (factor / scale, specific_risk)
+        return self._risk_factors
+    
+    def _risk_parameters(self) -> Dict[str, 'cp.Parameter']:
+        """
+        The scaled risk factors as parameters shared by the cached minimum
+        variance and maximum Sharpe QPs, set to the current moments. A factor
+        with fewer rows than the compiled one (a dropped null space) is padded
+        with zeros; a larger one, or a switch between dense and factor models,
+        drops the cached QPs so they are compiled again.
+        """
+        import cvxpy as cp
+        factor, specific_risk = self._scaled_risk_factors()
+        params = self._risk_params
+        if params is not None and (factor.shape[0] > params['factor'].shape[0]
+                                   or (specific_risk is None) != ('specific_risk' not in params)):
+            params = None
+            self._min_variance_problem = None
+            self._max_sharpe_problem = None
+        if params is None:
+            params = {'factor': cp.Parameter(factor.shape)}
+            if specific_risk is not None:
+                params['specific_risk'] = cp.Parameter(self.num_assets, nonneg=True)
+            self._risk_params = params
+        
+        padding = params['factor'].shape[0] - factor.shape[0]
+        params['factor'].value = np.vstack([factor, np.zeros((padding, self.num_assets))]) if padding else factor
+        if specific_risk is not None:
+            params['specific_risk'].value = specific_risk
+        return params
+    
+    def _risk(self, weights: 'cp.Variable', params: Dict[str, 'cp.Parameter']) -> 'cp.Expression':
+        """Scaled portfolio variance as a sum of squares, never a dense quad_form"""
+        import cvxpy as cp
+        risk = cp.sum_squares(params['factor'] @ weights)
+        if 'specific_risk' in params:
+            risk = risk + cp.sum_squares(cp.multiply(params['specific_risk'], weights))
+        return risk
+    
+    def _solve_covariance(self, b: np.ndarray) -> np.ndarray:
+        """Solve Σx = b through the covariance model (Cholesky or Woodbury)"""
+        return self.cov_model.solve(b)
+    
+    def _solve_long_only(self, variable: 'cp.Variable', problem: 'cp.Problem', name: str) -> np.ndarray:
+        """Solve a cached long-only QP and normalize its solution to weights"""
+        start = time.perf_counter()
+        problem.solve(warm_start=True)
+        profiler.record_solve(name, problem, start)
+        
+        if problem.status not in ["optimal", "optimal_inaccurate"] or variable.value is None:
+            raise ValueError(f"{name} optimization failed with status {problem.status}")
+        
+        weights = np.clip(variable.value, 0, None)
+        return weights / weights.sum()
+    
+    def _portfolio_result(self, weights: np.ndarray, risk_free_rate: float = 0.0) -> Dict:
+        """Package weights in the same shape as equal_weight_portfolio plus the Sharpe ratio"""
+        ret, vol = self.calculate_portfolio_performance(weights)
+        sharpe_ratio = (annualize_return(ret) - risk_free_rate) / annualize_volatility(vol) if vol > 0 else 0.0
+        
+        return {
+            'weights': weights,
+            'return': ret,
+            'volatility': vol,
+            'sharpe_ratio': sharpe_ratio
+        }
+    
+    def optimize(self, strategy: str, risk_free_rate: float = 0.0) -> Dict:
+        """Run a strategy by name (see STRATEGIES)"""
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}' (choose from {', '.join(STRATEGIES)})")
+        return STRATEGIES[strategy](self, risk_free_rate)
+
+
+# Strategy names accepted by PortfolioOptimizer.optimize
+STRATEGIES = {
+    'equal_weight': lambda optimizer, risk_free_rate: optimizer.equal_weight_portfolio(),
+    'min_variance': lambda optimizer, risk_free_rate: optimizer.min_variance(risk_free_rate=risk_free_rate),
+    'max_sharpe': lambda optimizer, risk_free_rate: optimizer.max_sharpe_ratio(risk_free_rate),
+    'risk_parity': lambda optimizer, risk_free_rate: optimizer.risk_parity(risk_free_rate=risk_free_rate),
+    'min_cvar': lambda optimizer, risk_free_rate: optimizer.min_cvar(risk_free_rate=risk_free_rate),
+    'hrp': lambda optimizer, risk_free_rate: optimizer.hrp(risk_free_rate=risk_free_rate),
+}
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+from profiling import profiled
+from utils import returns_from_prices
+
+
+@profiled('returns')
+def align_prices(prices: pd.DataFrame, max_fill: int = 5) -> pd.DataFrame:
+    """
+    Align tickers on a common calendar without truncating them to their
+    shortest common history: drop dates on which nothing traded, then carry
+    prices forward over at most `max_fill` consecutive missing dates (holidays
+    on one exchange, sparse quotes). Gaps before a ticker lists, after it stops
+    trading or longer than the limit stay NaN.
+    """
+    prices = prices.sort_index().dropna(how='all')
+    if max_fill > 0:
+        prices = prices.ffill(limit=max_fill, limit_area='inside')
+    return prices
+
+
+@profiled('returns')
+def compute_returns(prices: pd.DataFrame, method: str = 'simple') -> pd.DataFrame:
+    """
+    Simple or log returns that keep each ticker's own history: a return is NaN
+    when either of its prices is missing, and only dates without any return
+    are dropped
+    """
+    if method not in ('simple', 'log'):
+        raise ValueError("Return method must be 'simple' or 'log'")
+    return returns_from_prices(prices, log=method == 'log', how='all')
+
+
+@profiled('returns')
+def pairwise_moments(returns: pd.DataFrame, min_periods: int = 2) -> Tuple[pd.Series, pd.DataFrame, np.ndarray]:
+    """
+    Mean of each asset over its own observations and the covariance of each
+    pair over the dates both were observed (pandas' DataFrame.cov semantics),
+    computed with three matrix products instead of a loop over pairs.
+
+    Pairs with fewer than `min_periods` common observations get zero
+    covariance. Returns (mean, cov, pairwise observation counts).
+    """
+    values = returns.to_numpy(dtype=float)
+    observed = ~np.isnan(values)
+    filled = np.where(observed, values, 0.0)
+    mask = observed.astype(float)
+
+    counts = mask.T @ mask
+    # sums[i, j]: sum of asset i over the dates where j is observed too
+    sums = filled.T @ mask
+    cross = filled.T @ filled
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (cross - sums * sums.T / counts) / (counts - 1)
+    cov[counts < max(min_periods, 2)] = 0.0
+
+    mean = pd.Series(np.nanmean(np.where(observed, values, np.nan), axis=0), index=returns.columns)
+    return mean, pd.DataFrame(cov, index=returns.columns, columns=returns.columns), counts
+
+
+@profiled('returns')
+def nearest_psd(cov_matrix: np.ndarray, min_eigenvalue_ratio: float = 1e-10) -> np.ndarray:
+    """
+    Repair a symmetric matrix that is not positive semidefinite (as pairwise
+    covariances can be) by clipping its eigenvalues, then restoring the
+    original variances on the diagonal
+    """
+    cov_matrix = (np.asarray(cov_matrix, dtype=float) + np.asarray(cov_matrix, dtype=float).T) / 2
+    eigvals, eigvecs = np.linalg.eigh(cov_matrix)
+    floor = max(eigvals.max(), 0.0) * min_eigenvalue_ratio
+    if eigvals.min() >= floor:
+        return cov_matrix
+
+    repaired = (eigvecs * np.maximum(eigvals, floor)) @ eigvecs.T
+    variances = np.diag(cov_matrix)
+    scale = np.sqrt(np.divide(variances, np.diag(repaired), out=np.ones_like(variances),
+                              where=np.diag(repaired) > 0))
+    return repaired * np.outer(scale, scale)
+
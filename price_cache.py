@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "portfolio_optimizer", "prices")
+
+
+class PriceCache:
+    """
+    On-disk columnar price cache keyed by ticker and price field.
+
+    Each (ticker, field) pair is stored as two memory-mapped NumPy arrays (dates
+    as int64 nanoseconds and float64 prices) plus an index entry recording the
+    date range that has already been requested from the provider, so holidays
+    and pre-listing dates are not fetched again.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_age_days: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('PORTFOLIO_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._index = self._read_index()
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+    @staticmethod
+    def _key(ticker: str, field: str) -> str:
+        return f"{field}/{ticker}"
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + ".dates.npy", base + ".values.npy"
+
+    def coverage(self, ticker: str, field: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Return the [start, end) date range already fetched for a ticker, if any"""
+        entry = self._index.get(self._key(ticker, field))
+        if entry is None:
+            return None
+        return pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+
+    def missing_ranges(self, ticker: str, field: str, start_date: str,
+                       end_date: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Return the [start, end) ranges that still need fetching to cover the request
+        """
+        start_dt = pd.Timestamp(start_date)
+        end_dt = pd.Timestamp(end_date)
+        covered = self.coverage(ticker, field)
+        if covered is None:
+            return [(start_dt, end_dt)]
+
+        cov_start, cov_end = covered
+        missing = []
+        if start_dt < cov_start:
+            missing.append((start_dt, cov_start))
+        if end_dt > cov_end:
+            # Fetch from the end of coverage, not the request start, even when
+            # the request starts later: store() widens coverage to one contiguous
+            # range, so a gap left here would be marked covered but never fetched
+            missing.append((cov_end, end_dt))
+        return missing
+
+    def load(self, ticker: str, field: str, start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> Optional[pd.Series]:
+        """Load cached prices for [start_date, end_date), or None when nothing is cached"""
+        key = self._key(ticker, field)
+        with self._lock:
+            if key not in self._index:
+                return None
+            dates_path, values_path = self._paths(key)
+            try:
+                dates = np.load(dates_path, mmap_mode='r')
+                values = np.load(values_path, mmap_mode='r')
+            except (OSError, ValueError):
+                return None
+            # Persist the access time so size-based eviction in a later session
+            # still evicts the least recently used series first
+            self._index[key]['last_access'] = time.time()
+            self._write_index()
+
+        lo = 0 if start_date is None else np.searchsorted(dates, pd.Timestamp(start_date).value, side='left')
+        hi = len(dates) if end_date is None else np.searchsorted(dates, pd.Timestamp(end_date).value, side='left')
+        return pd.Series(
+            np.array(values[lo:hi]),
+            index=pd.DatetimeIndex(np.array(dates[lo:hi]).astype('datetime64[ns]')),
+            name=ticker
+        )
+
+    def store(self, ticker: str, field: str, prices: pd.Series, start_date: str, end_date: str):
+        """
+        Merge newly fetched prices into the cache and extend the covered range
+        """
+        key = self._key(ticker, field)
+        start_dt = pd.Timestamp(start_date)
+        # Today's bar is still forming, so never mark it as covered
+        end_dt = min(pd.Timestamp(end_date), pd.Timestamp.today().normalize())
+
+        with self._lock:
+            existing = None
+            if key in self._index:
+                dates_path, values_path = self._paths(key)
+                try:
+                    existing = pd.Series(
+                        np.load(values_path),
+                        index=pd.DatetimeIndex(np.load(dates_path).astype('datetime64[ns]'))
+                    )
+                except (OSError, ValueError):
+                    existing = None
+
+            prices = prices.dropna().astype(float)
+            merged = prices if existing is None else pd.concat([existing, prices])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+            dates_path, values_path = self._paths(key)
+            os.makedirs(os.path.dirname(dates_path), exist_ok=True)
+            for path, array in [(dates_path, merged.index.values.astype('datetime64[ns]').astype(np.int64)),
+                                (values_path, merged.values.astype(np.float64))]:
+                tmp_path = path + ".tmp.npy"
+                np.save(tmp_path, array)
+                os.replace(tmp_path, path)
+
+            now = time.time()
+            fetched_at = now
+            entry = self._index.get(key)
+            if entry is not None and existing is not None:
+                start_dt = min(start_dt, pd.Timestamp(entry['start']))
+                end_dt = max(end_dt, pd.Timestamp(entry['end']))
+                # A top-up only fetches the new dates, so the series is as old as
+                # its oldest range; keeping that time lets age-based eviction
+                # expire series that are topped up every session
+                fetched_at = min(now, entry.get('fetched_at', now))
+            self._index[key] = {
+                'start': start_dt.isoformat(),
+                'end': max(start_dt, end_dt).isoformat(),
+                'fetched_at': fetched_at,
+                'last_access': now,
+                'bytes': os.path.getsize(dates_path) + os.path.getsize(values_path)
+            }
+            self._write_index()
+
+        if self.max_age_days is not None or self.max_bytes is not None:
+            self.evict()
+
+    def evict(self, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None) -> List[str]:
+        """
+        Drop entries whose oldest cached range was fetched more than max_age_days
+        ago, then the least recently used entries until the cache fits in
+        max_bytes. Returns the evicted keys.
+        """
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+
+        with self._lock:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                evicted += [key for key, entry in self._index.items() if entry['fetched_at'] < cutoff]
+
+            if max_bytes is not None:
+                remaining = sorted(
+                    (key for key in self._index if key not in evicted),
+                    key=lambda k: self._index[k]['last_access']
+                )
+                total = sum(self._index[key]['bytes'] for key in remaining)
+                for key in remaining:
+                    if total <= max_bytes:
+                        break
+                    total -= self._index[key]['bytes']
+                    evicted.append(key)
+
+            for key in evicted:
+                for path in self._paths(key):
+                    if os.path.exists(path):
+                        os.remove(path)
+                del self._index[key]
+
+            if evicted:
+                self._write_index()
+
+        return evicted
+
+    def clear(self):
+        """Remove every cached series"""
+        self.evict(max_bytes=0)
@@ -0,0 +1,179 @@
+import functools
+import json
+import os
+import threading
+import time
+import pandas as pd
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+
+class _NullSpan:
+    """Shared do-nothing context manager returned while profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler: "Profiler", name: str, category: str, args: Dict):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.profiler.record(self.name, self.category, self.start, time.perf_counter() - self.start, **self.args)
+        return False
+
+    def set(self, **args):
+        """Attach results known only at the end of the span (status, cache hit, ...)"""
+        self.args.update(args)
+
+
+class Profiler:
+    """
+    Timers and counters for the fetch, returns, optimize and risk stages.
+
+    Disabled unless PORTFOLIO_PROFILE is set. While disabled, span() hands out
+    a shared no-op context manager and count() returns at once. Recorded spans
+    export as JSON or in the Chrome trace event format (chrome://tracing,
+    Perfetto).
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, max_events: int = 100000):
+        if enabled is None:
+            enabled = os.getenv('PORTFOLIO_PROFILE', '').lower() in ('1', 'true', 'yes')
+        self.enabled = enabled
+        self.max_events = max_events
+        self.events: List[Dict] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str, **args):
+        """Time a block: `with profiler.span('solve', 'optimize') as span: ...`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def record(self, name: str, category: str, start: float, duration: float, **args):
+        """Record a finished span (start is a time.perf_counter() value)"""
+        if not self.enabled:
+            return
+        event = {
+            'name': name,
+            'category': category,
+            'start': start - self._origin,
+            'duration': duration,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args
+        }
+        with self._lock:
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+
+    def count(self, name: str, value: float = 1):
+        """Increment a counter (cache hits, retries, ...)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    def record_solve(self, name: str, problem, start: float, **args):
+        """Record a CVXPY solve with its compile time, solver time, status and iterations"""
+        if not self.enabled:
+            return
+        stats = problem.solver_stats
+        self.record(
+            name, 'optimize', start, time.perf_counter() - start,
+            status=problem.status,
+            solver=stats.solver_name if stats else None,
+            iterations=stats.num_iters if stats else None,
+            compile_time=problem.compilation_time,
+            solver_time=stats.solve_time if stats else None,
+            **args
+        )
+
+    def summary(self) -> pd.DataFrame:
+        """Count, total, mean and max duration (seconds) per category and span name"""
+        if not self.events:
+            return pd.DataFrame(columns=['count', 'total', 'mean', 'max'])
+        frame = pd.DataFrame([(e['category'], e['name'], e['duration']) for e in self.events],
+                             columns=['category', 'name', 'duration'])
+        summary = frame.groupby(['category', 'name'])['duration'].agg(['count', 'sum', 'mean', 'max'])
+        return summary.rename(columns={'sum': 'total'}).sort_values('total', ascending=False)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Spans, counters and the per-stage summary as JSON"""
+        summary = self.summary().reset_index().to_dict(orient='records')
+        text = json.dumps({'events': self.events, 'counters': dict(self.counters), 'summary': summary},
+                          default=str, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_chrome_trace(self, path: Optional[str] = None) -> str:
+        """Spans as complete ('X') events and counters as a final 'C' event, in microseconds"""
+        trace = [
+            {
+                'name': e['name'], 'cat': e['category'], 'ph': 'X',
+                'ts': e['start'] * 1e6, 'dur': e['duration'] * 1e6,
+                'pid': e['pid'], 'tid': e['tid'], 'args': e['args']
+            }
+            for e in self.events
+        ]
+        if self.counters:
+            end = max((e['start'] + e['duration'] for e in self.events), default=0.0)
+            trace.append({'name': 'counters', 'ph': 'C', 'ts': end * 1e6, 'pid': os.getpid(),
+                          'args': dict(self.counters)})
+        text = json.dumps({'traceEvents': trace, 'displayTimeUnit': 'ms'}, default=str)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self._origin = time.perf_counter()
+
+
+# Process-wide profiler used by the instrumented modules
+profiler = Profiler()
+
+
+def profiled(category: str, name: Optional[str] = None) -> Callable:
+    """Decorator timing every call of a function as a span while profiling is enabled"""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.record(span_name, category, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,190 @@
+import gc
+import os
+import sys
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional, Sequence
+
+
+class ReturnsPanel:
+    """
+    A float64 dates × tickers matrix (returns, or prices before conversion) in
+    shared memory or a memory-mapped .npy file, plus its date and ticker indexes.
+
+    Pickling a panel only sends a small handle: a worker process unpickles it
+    by attaching to the same buffer, so the matrix is never copied per worker.
+    `to_frame()` wraps the buffer in a DataFrame without copying. The process
+    that created the panel owns it and should `close()` it (or use `with`)
+    once the workers are done.
+    """
+
+    def __init__(self, values: np.ndarray, dates: pd.DatetimeIndex, tickers: Sequence[str],
+                 backend: str, location: str, has_nan: bool, buffer=None, owner: bool = False):
+        self.values = values
+        self.dates = dates
+        self.tickers = list(tickers)
+        self._columns = pd.Index(self.tickers)
+        self.backend = backend
+        self.location = location
+        self.has_nan = has_nan
+        self._buffer = buffer
+        self._owner = owner
+
+    @classmethod
+    def from_array(cls, values: np.ndarray, dates: Sequence, tickers: Sequence[str],
+                   backend: str = 'shared_memory', path: Optional[str] = None) -> "ReturnsPanel":
+        """Copy a matrix into a new shared memory block ('shared_memory') or .npy file ('memmap')"""
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(dates), len(tickers)):
+            raise ValueError("Matrix shape does not match the date and ticker indexes")
+        dates = pd.DatetimeIndex(dates)
+        has_nan = bool(np.isnan(values).any())
+
+        if backend == 'shared_memory':
+            buffer = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            matrix = _buffer_array(buffer, values.shape)
+            matrix[:] = values
+            location = buffer.name
+        elif backend == 'memmap':
+            if path is None:
+                handle, path = tempfile.mkstemp(suffix='.npy', prefix='returns_panel_')
+                os.close(handle)
+            matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=values.shape)
+            matrix[:] = values
+            matrix.flush()
+            buffer, location = None, path
+        else:
+            raise ValueError("Backend must be 'shared_memory' or 'memmap'")
+
+        matrix.flags.writeable = False
+        return cls(matrix, dates, tickers, backend, location, has_nan, buffer=buffer, owner=True)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, backend: str = 'shared_memory',
+                   path: Optional[str] = None) -> "ReturnsPanel":
+        """Copy a DataFrame with a DatetimeIndex into a shared panel"""
+        return cls.from_array(frame.to_numpy(dtype=np.float64), frame.index, frame.columns, backend, path)
+
+    @classmethod
+    def _attach(cls, backend: str, location: str, shape, dates: np.ndarray, tickers: List[str],
+                has_nan: bool) -> "ReturnsPanel":
+        if backend == 'shared_memory':
+            buffer = _attach_shared_memory(location)
+            matrix = _buffer_array(buffer, shape)
+        else:
+            buffer = None
+            matrix = np.load(location, mmap_mode='r')
+        matrix.flags.writeable = False
+        return cls(matrix, pd.DatetimeIndex(dates), tickers, backend, location, has_nan, buffer=buffer)
+
+    def __reduce__(self):
+        # Workers attach to the buffer instead of receiving a copy of it
+        return (ReturnsPanel._attach, (self.backend, self.location, self.values.shape,
+                                       self.dates.values, self.tickers, self.has_nan))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def to_frame(self) -> pd.DataFrame:
+        """A read-only DataFrame view of the panel (no copy)"""
+        return pd.DataFrame(self.values, index=self.dates, columns=self.tickers, copy=False)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._columns
+
+    def select(self, tickers: Sequence[str]) -> pd.DataFrame:
+        """
+        A DataFrame of some tickers. A run of adjacent panel columns in order
+        (e.g. every ticker) is a view; any other selection copies only the
+        selected dates × tickers block, never the whole panel.
+        """
+        columns = self._columns.get_indexer(tickers)
+        if (columns < 0).any():
+            raise KeyError(f"Not in the panel: {', '.join(t for t, c in zip(tickers, columns) if c < 0)}")
+        if len(columns) and np.array_equal(columns, np.arange(columns[0], columns[0] + len(columns))):
+            block = self.values[:, columns[0]:columns[0] + len(columns)]
+        else:
+            block = self.values[:, columns]
+        return pd.DataFrame(block, index=self.dates, columns=list(tickers), copy=False)
+
+    def derive(self, values: np.ndarray, dates: Sequence) -> "ReturnsPanel":
+        """A new panel on the same backend and tickers, e.g. returns computed from prices"""
+        path = None
+        if self.backend == 'memmap':
+            root, ext = os.path.splitext(self.location)
+            handle, path = tempfile.mkstemp(suffix=ext, prefix=os.path.basename(root) + '_', dir=os.path.dirname(root))
+            os.close(handle)
+        return ReturnsPanel.from_array(values, dates, self.tickers, backend=self.backend, path=path)
+
+    def close(self):
+        """
+        Detach from the buffer; the owning process also frees it. Every
+        DataFrame view from to_frame() must be released first.
+        """
+        self.values = None
+        if self._buffer is not None:
+            if self._owner:
+                self._buffer.unlink()
+                self._owner = False
+            try:
+                self._buffer.close()
+            except BufferError:
+                # Views may only be waiting on the cycle collector
+                gc.collect()
+                try:
+                    self._buffer.close()
+                except BufferError:
+                    raise BufferError("Release every view of the panel before closing it") from None
+            self._buffer = None
+        elif self._owner and os.path.exists(self.location):
+            os.remove(self.location)
+        self._owner = False
+
+    def __enter__(self) -> "ReturnsPanel":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_attach_lock = threading.Lock()
+
+
+def _buffer_array(buffer: shared_memory.SharedMemory, shape) -> np.ndarray:
+    """
+    A matrix over a shared memory block. np.frombuffer keeps the block's buffer
+    exported, so closing it while views are alive fails instead of leaving
+    them dangling.
+    """
+    count = int(np.prod(shape))
+    return np.frombuffer(buffer.buf, dtype=np.float64, count=count).reshape(shape)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing block without registering it with the resource
+    tracker, which would otherwise unlink it when a worker exits (workers
+    may even share the creator's tracker, so unregistering is not safe either)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def as_frame(data) -> pd.DataFrame:
+    """Return a DataFrame for either a DataFrame or a ReturnsPanel"""
+    return data.to_frame() if isinstance(data, ReturnsPanel) else data
@@ -0,0 +1,280 @@
+import numpy as np
+from typing import Dict, Optional
+
+# scipy.linalg adds ~0.15 s to a cold start, so the solvers import it when first run
+
+
+def risk_parity_weights(cov_matrix: np.ndarray, budgets: Optional[np.ndarray] = None,
+                        tolerance: float = 1e-8, max_iterations: int = 100) -> Dict:
+    """
+    Risk budgeting portfolio (equal risk contribution by default) from the
+    convex log-barrier problem
+
+        min  ½ yᵀCy - Σ b_i log y_i,   y > 0,
+
+    on the correlation matrix C, whose solution rescaled by the volatilities
+    and normalized to w = y / Σy has risk contributions w_i (Σw)_i
+    proportional to the budgets b. Solved by damped Newton steps, which
+    converge in a handful of iterations even for highly correlated universes
+    where coordinate descent needs thousands of sweeps.
+
+    Returns the weights, iterations used and the largest relative deviation
+    of the risk contributions from their budgets.
+    """
+    from scipy.linalg import cho_factor, cho_solve
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    num_assets = cov_matrix.shape[0]
+    budgets = np.full(num_assets, 1 / num_assets) if budgets is None else np.asarray(budgets, dtype=float)
+    if budgets.shape != (num_assets,) or np.any(budgets <= 0):
+        raise ValueError("Risk budgets must be positive, one per asset")
+    budgets = budgets / budgets.sum()
+
+    vols = np.sqrt(np.diag(cov_matrix))
+    if np.any(vols <= 0):
+        raise ValueError("Risk parity needs a positive variance for every asset")
+    corr = cov_matrix / np.outer(vols, vols)
+
+    y = np.sqrt(budgets)
+    y /= np.sqrt(y @ corr @ y)
+    for iteration in range(1, max_iterations + 1):
+        # Optimal exactly when y_i (Cy)_i = b_i for every asset
+        corr_y = corr @ y
+        if np.max(np.abs(y * corr_y / budgets - 1)) < tolerance:
+            break
+        gradient = corr_y - budgets / y
+        hessian = corr + np.diag(budgets / y ** 2)
+        step = -cho_solve(cho_factor(hessian), gradient)
+        decrement = -gradient @ step
+        # Damped step for a self-concordant barrier, shortened further to keep y > 0
+        size = 1.0 if decrement < 0.25 else 1 / (1 + np.sqrt(decrement))
+        shrinking = step < 0
+        if np.any(shrinking):
+            size = min(size, 0.99 * np.min(-y[shrinking] / step[shrinking]))
+        y = y + size * step
+
+    weights = y / vols
+    weights /= weights.sum()
+    contributions = weights * (cov_matrix @ weights)
+    contributions /= contributions.sum()
+    return {
+        'weights': weights,
+        'iterations': iteration,
+        'max_deviation': float(np.max(np.abs(contributions / budgets - 1)))
+    }
+
+
+def min_cvar_weights(scenarios: np.ndarray, alpha: float = 0.05, long_only: bool = True,
+                     min_return: Optional[float] = None, expected_returns: Optional[np.ndarray] = None,
+                     method: str = 'ipm', tolerance: float = 1e-8, max_iterations: int = 100) -> Dict:
+    """
+    Minimum-CVaR portfolio over S return scenarios (rows) by the
+    Rockafellar-Uryasev linear program
+
+        min  ζ + 1/(αS) Σ_s u_s
+        s.t. u_s >= -r_sᵀw - ζ,  u >= 0,  Σw = 1  [, w >= 0] [, μᵀw >= min_return]
+
+    where ζ is the VaR of the loss at the optimum.
+
+    method='ipm' (default) solves it with a primal-dual interior point method
+    that exploits the LP's structure: the S scenario slacks only enter the
+    Newton system through diagonal blocks, so each iteration costs one
+    weighted RᵀDR product and an (N+2)×(N+2) solve, and 10k scenarios × 500
+    assets solve in seconds. method='highs' hands the same LP, assembled
+    sparse, to HiGHS (exact vertex solutions, much slower on large inputs).
+
+    Returns the weights and, in return space like RiskMetrics, the
+    portfolio's VaR and CVaR at alpha.
+    """
+    scenarios = np.asarray(scenarios, dtype=float)
+    num_scenarios, num_assets = scenarios.shape
+    if not 0 < alpha < 1:
+        raise ValueError("Alpha must be between 0 and 1")
+    if method not in ('ipm', 'highs'):
+        raise ValueError("Minimum CVaR method must be 'ipm' or 'highs'")
+    if min_return is not None:
+        expected_returns = scenarios.mean(axis=0) if expected_returns is None else np.asarray(expected_returns, dtype=float)
+        if long_only and min_return > expected_returns.max():
+            raise ValueError("Minimum return is above every asset's expected return")
+
+    # Scenarios are scaled to unit magnitude; CVaR scales back linearly
+    scale = np.abs(scenarios).max() or 1.0
+    solve = _cvar_ipm if method == 'ipm' else _cvar_highs
+    weights, var, cvar, iterations = solve(
+        scenarios / scale, alpha, long_only,
+        None if min_return is None else min_return / scale,
+        None if min_return is None else expected_returns / scale,
+        tolerance, max_iterations
+    )
+
+    if long_only:
+        weights = np.clip(weights, 0, None)
+    weights = weights / weights.sum()
+    return {
+        'weights': weights,
+        'var': float(-var * scale),
+        'cvar': float(-cvar * scale),
+        'iterations': iterations
+    }
+
+
+def _cvar_highs(scenarios, alpha, long_only, min_return, expected_returns, tolerance, max_iterations):
+    """Rockafellar-Uryasev LP with variables (w, ζ, u) and a sparse [-R  -1  -I] block"""
+    import scipy.sparse as sp
+    from scipy.optimize import linprog
+    num_scenarios, num_assets = scenarios.shape
+    cost = np.concatenate([np.zeros(num_assets), [1.0], np.full(num_scenarios, 1 / (alpha * num_scenarios))])
+    upper_rows = [sp.hstack([
+        sp.csr_matrix(-scenarios),
+        sp.csr_matrix(-np.ones((num_scenarios, 1))),
+        -sp.identity(num_scenarios, format='csr')
+    ], format='csr')]
+    upper_bounds = [np.zeros(num_scenarios)]
+    if min_return is not None:
+        upper_rows.append(sp.csr_matrix(np.concatenate([-expected_returns, np.zeros(1 + num_scenarios)])[None, :]))
+        upper_bounds.append([-min_return])
+    budget_row = sp.csr_matrix(np.concatenate([np.ones(num_assets), np.zeros(1 + num_scenarios)])[None, :])
+    bounds = [(0, None) if long_only else (None, None)] * num_assets + [(None, None)] + [(0, None)] * num_scenarios
+
+    result = linprog(
+        cost,
+        A_ub=sp.vstack(upper_rows, format='csr'), b_ub=np.concatenate(upper_bounds),
+        A_eq=budget_row, b_eq=[1.0],
+        bounds=bounds, method='highs'
+    )
+    if result.status != 0:
+        raise ValueError(f"Minimum CVaR optimization failed: {result.message}")
+    return result.x[:num_assets], float(result.x[num_assets]), float(result.fun), int(result.nit)
+
+
+def _cvar_ipm(scenarios, alpha, long_only, min_return, expected_returns, tolerance, max_iterations):
+    """
+    Mehrotra predictor-corrector for  min cᵀx  s.t. Gx + s = h, s >= 0, 1ᵀw = 1
+    with x = (w, ζ, u) and inequality blocks
+        L: -Rw - ζ - u <= 0   U: -u <= 0   W: -w <= 0 (long only)   M: -μᵀw <= -min_return
+    """
+    from scipy.linalg import lu_factor, lu_solve
+    R = scenarios
+    num_scenarios, num_assets = R.shape
+    cost_u = 1 / (alpha * num_scenarios)
+    has_w = long_only
+    has_m = min_return is not None
+    mu = expected_returns
+
+    def G(dw, dzeta, du):
+        return (-R @ dw - dzeta - du, -du,
+                -dw if has_w else None,
+                -(mu @ dw) if has_m else None)
+
+    def G_transpose(v_l, v_u, v_w, v_m):
+        g_w = -(v_l @ R)
+        if has_w:
+            g_w = g_w - v_w
+        if has_m:
+            g_w = g_w - mu * v_m
+        return g_w, -v_l.sum(), -v_l - v_u
+
+    # Start from equal weights with ζ at the equal-weight VaR and positive slacks
+    w = np.full(num_assets, 1 / num_assets)
+    losses = -(R @ w)
+    zeta = float(np.quantile(losses, 1 - alpha))
+    u = np.maximum(losses - zeta, 0) + 1.0
+    s_l = np.maximum(zeta - losses, 0) + 1.0
+    s_u = u.copy()
+    s_w = w.copy() if has_w else None
+    s_m = max(float(mu @ w) - min_return, 1.0) if has_m else None
+    z_l = np.full(num_scenarios, 1 / num_scenarios)
+    z_u = np.full(num_scenarios, cost_u - 1 / num_scenarios)
+    z_w = np.ones(num_assets) if has_w else None
+    z_m = 1.0 if has_m else None
+    y = 0.0
+
+    def stack(l, u_, w_, m):
+        parts = [l, u_]
+        if has_w:
+            parts.append(w_)
+        if has_m:
+            parts.append(np.atleast_1d(m))
+        return np.concatenate(parts)
+
+    def split(v):
+        parts = [v[:num_scenarios], v[num_scenarios:2 * num_scenarios]]
+        offset = 2 * num_scenarios
+        parts.append(v[offset:offset + num_assets] if has_w else None)
+        offset += num_assets if has_w else 0
+        parts.append(float(v[offset]) if has_m else None)
+        return parts
+
+    h = stack(np.zeros(num_scenarios), np.zeros(num_scenarios),
+              np.zeros(num_assets) if has_w else None, -min_return if has_m else None)
+    num_cones = len(h)
+
+    for iteration in range(1, max_iterations + 1):
+        s = stack(s_l, s_u, s_w, s_m)
+        z = stack(z_l, z_u, z_w, z_m)
+
+        # Residuals of dual feasibility, the budget and the inequalities
+        gt_w, gt_zeta, gt_u = G_transpose(*split(z))
+        r_w = gt_w + y
+        r_zeta = 1.0 + gt_zeta
+        r_u = cost_u + gt_u
+        r_p = w.sum() - 1.0
+        r_i = stack(*G(w, zeta, u)) + s - h
+
+        primal = zeta + cost_u * u.sum()
+        gap = s @ z
+        if (max(abs(r_p), np.abs(r_i).max()) < tolerance
+                and max(np.abs(r_w).max(), abs(r_zeta), np.abs(r_u).max()) < tolerance
+                and gap < tolerance * max(1.0, abs(primal))):
+            break
+
+        # Reduced Newton system: eliminate ds, dz and then du (diagonal), leaving (dw, dζ, dy)
+        d = z / s
+        d_l, d_u, d_w, d_m = split(d)
+        e = d_l / (d_l + d_u)
+        d_reduced = d_l * d_u / (d_l + d_u)
+        matrix = np.empty((num_assets + 2, num_assets + 2))
+        # XᵀX with X = diag(√d)R lets BLAS use a symmetric rank-k update
+        weighted = R * np.sqrt(d_reduced)[:, None]
+        matrix[:num_assets, :num_assets] = weighted.T @ weighted
+        if has_w:
+            matrix[np.arange(num_assets), np.arange(num_assets)] += d_w
+        if has_m:
+            matrix[:num_assets, :num_assets] += d_m * np.outer(mu, mu)
+        matrix[:num_assets, num_assets] = matrix[num_assets, :num_assets] = d_reduced @ R
+        matrix[num_assets, num_assets] = d_reduced.sum()
+        matrix[:num_assets, num_assets + 1] = matrix[num_assets + 1, :num_assets] = 1.0
+        matrix[num_assets, num_assets + 1] = matrix[num_assets + 1, num_assets] = 0.0
+        matrix[num_assets + 1, num_assets + 1] = 0.0
+        factor = lu_factor(matrix)
+
+        def newton_step(r_c):
+            g_w, g_zeta, g_u = G_transpose(*split(d * r_i - r_c / s))
+            g_w, g_zeta, g_u = -r_w - g_w, -r_zeta - g_zeta, -r_u - g_u
+            rhs = np.concatenate([g_w - (e * g_u) @ R, [g_zeta - (e * g_u).sum(), -r_p]])
+            solution = lu_solve(factor, rhs)
+            dw, dzeta, dy = solution[:num_assets], solution[num_assets], solution[num_assets + 1]
+            du = (g_u - d_l * (R @ dw + dzeta)) / (d_l + d_u)
+            g_dx = stack(*G(dw, dzeta, du))
+            dz = d * (g_dx + r_i) - r_c / s
+            ds = -r_i - g_dx
+            return dw, dzeta, du, dy, ds, dz
+
+        def max_step(v, dv):
+            shrinking = dv < 0
+            return min(1.0, np.min(-v[shrinking] / dv[shrinking])) if np.any(shrinking) else 1.0
+
+        # Predictor (affine scaling) step, then the centred corrector
+        affine = newton_step(s * z)
+        ds, dz = affine[4], affine[5]
+        step = min(max_step(s, ds), max_step(z, dz))
+        sigma = (((s + step * ds) @ (z + step * dz)) / gap) ** 3
+        dw, dzeta, du, dy, ds, dz = newton_step(s * z + ds * dz - sigma * gap / num_cones)
+        step = min(1.0, 0.99 * min(max_step(s, ds), max_step(z, dz)))
+
+        w, zeta, u, y = w + step * dw, zeta + step * dzeta, u + step * du, y + step * dy
+        s_l, s_u, s_w, s_m = split(s + step * ds)
+        z_l, z_u, z_w, z_m = split(z + step * dz)
+    else:
+        raise ValueError(f"Minimum CVaR optimization did not converge in {max_iterations} iterations")
+
+    return w, zeta, float(zeta + cost_u * u.sum()), iteration
@@ -1,43 +1,87 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, List, Union
+from monte_carlo import MonteCarloRisk
+from profiling import profiled, profiler
+from returns_panel import ReturnsPanel, as_frame
+from rolling_metrics import rolling_mean_std, rolling_metrics
 
 class RiskMetrics:
-    def __init__(self, returns: pd.DataFrame):
-        self.returns = returns
-        self.cumulative_returns = (1 + returns).cumprod()
+    def __init__(self, returns: Union[pd.DataFrame, ReturnsPanel], cache_size: int = 16):
+        self.returns = as_frame(returns)
+        # Missing returns contribute nothing, matching pandas' skipna sum. Complete
+        # data (e.g. a shared panel) is used without copying
+        self._returns_matrix = self.returns.to_numpy(dtype=float)
+        if np.isnan(self._returns_matrix).any():
+            self._returns_matrix = np.nan_to_num(self._returns_matrix)
+        self._cumulative_returns = None
+        self._portfolio_cache = OrderedDict()
+        self.cache_size = cache_size
+        self._simulators = {}
     
+    @property
+    def cumulative_returns(self) -> pd.DataFrame:
+        if self._cumulative_returns is None:
+            self._cumulative_returns = (1 + self.returns).cumprod()
+        return self._cumulative_returns
+    
+    def portfolio_returns(self, weights: np.ndarray) -> pd.Series:
+        """
+        Portfolio return series for a weight vector, memoized in a small LRU cache
+        so every metric for the same weights shares one matrix product
+        """
+        weights = np.ascontiguousarray(weights, dtype=float)
+        key = weights.tobytes()
+        
+        series = self._portfolio_cache.get(key)
+        if series is not None:
+            profiler.count('portfolio_returns.hits')
+            self._portfolio_cache.move_to_end(key)
+            return series
+        profiler.count('portfolio_returns.misses')
+        
+        series = pd.Series(self._returns_matrix @ weights, index=self.returns.index)
+        self._portfolio_cache[key] = series
+        if len(self._portfolio_cache) > self.cache_size:
+            self._portfolio_cache.popitem(last=False)
+        return series
+    
+    @profiled('risk')
     def calculate_var(self, weights: np.ndarray, alpha: float = 0.05) -> float:
         """
         Calculate Value at Risk (VaR) for the portfolio
         """
-        portfolio_returns = (self.returns * weights).sum(axis=1)
-        return np.percentile(portfolio_returns, alpha * 100)
+        portfolio_returns = self.portfolio_returns(weights)
+        return np.percentile(portfolio_returns.values, alpha * 100)
     
+    @profiled('risk')
     def calculate_cvar(self, weights: np.ndarray, alpha: float = 0.05) -> float:
         """
         Calculate Conditional Value at Risk (CVaR)
         """
-        portfolio_returns = (self.returns * weights).sum(axis=1)
-        var = self.calculate_var(weights, alpha)
+        portfolio_returns = self.portfolio_returns(weights).values
+        var = np.percentile(portfolio_returns, alpha * 100)
         return portfolio_returns[portfolio_returns <= var].mean()
     
+    @profiled('risk')
     def calculate_beta(self, weights: np.ndarray, market_returns: pd.Series) -> float:
         """
         Calculate portfolio beta relative to market
         """
-        portfolio_returns = (self.returns * weights).sum(axis=1)
+        portfolio_returns = self.portfolio_returns(weights)
         cov_matrix = np.cov(portfolio_returns, market_returns)
         return cov_matrix[0, 1] / cov_matrix[1, 1]
     
+    @profiled('risk')
     def calculate_drawdown(self, weights: np.ndarray) -> Dict:
         """
         Calculate maximum drawdown and duration
         """
-        portfolio_returns = (self.returns * weights).sum(axis=1)
-        cumulative = (1 + portfolio_returns).cumprod()
-        peak = cumulative.expanding(min_periods=1).max()
-        drawdown = (cumulative - peak) / peak
+        portfolio_returns = self.portfolio_returns(weights).values
+        cumulative = np.cumprod(1 + portfolio_returns)
+        peak = np.maximum.accumulate(cumulative)
+        drawdown = pd.Series((cumulative - peak) / peak, index=self.returns.index)
         
         max_drawdown = drawdown.min()
         max_drawdown_period = drawdown.idxmin()
@@ -48,13 +92,124 @@ class RiskMetrics:
             'drawdown_series': drawdown
         }
     
+    @profiled('risk')
     def calculate_rolling_volatility(self, weights: np.ndarray, window: int = 21) -> pd.Series:
         """
         Calculate rolling volatility (standard deviation)
         """
-        portfolio_returns = (self.returns * weights).sum(axis=1)
+        portfolio_returns = self.portfolio_returns(weights)
         return portfolio_returns.rolling(window=window).std() * np.sqrt(252)
     
+    @profiled('risk')
+    def calculate_rolling_metrics(self, weights: np.ndarray, window: int = 252, alpha: float = 0.05,
+                                  market_returns: pd.Series = None,
+                                  risk_free_rate: float = 0.0) -> Dict[str, Union[pd.Series, pd.DataFrame]]:
+        """
+        Rolling volatility, VaR, Sharpe ratio and (given market returns) beta over
+        a trailing window, plus the running drawdown, in O(T) per portfolio.
+        
+        A weight vector gives Series; a K×N weights matrix gives DataFrames with
+        one column per portfolio.
+        """
+        weights = np.asarray(weights, dtype=float)
+        market = None
+        if market_returns is not None:
+            # Missing market returns count as flat days, like missing asset returns
+            market = market_returns.reindex(self.returns.index).fillna(0.0).to_numpy(dtype=float)
+        
+        results = rolling_metrics(self._returns_matrix, weights, window=window, alpha=alpha,
+                                  market_returns=market, risk_free_rate=risk_free_rate)
+        if weights.ndim == 1:
+            return {name: pd.Series(values[:, 0], index=self.returns.index) for name, values in results.items()}
+        return {name: pd.DataFrame(values, index=self.returns.index) for name, values in results.items()}
+    
+    @profiled('risk')
+    def calculate_batch_metrics(self, weights_matrix: np.ndarray, alpha: float = 0.05,
+                                window: int = 21, chunk_size: int = 256) -> Dict[str, np.ndarray]:
+        """
+        Calculate VaR, CVaR, maximum drawdown and rolling volatility summaries for
+        K portfolios at once from a K×N weights matrix.
+        
+        Candidates are processed in chunks of chunk_size, so peak memory is a few
+        T×chunk_size arrays regardless of K.
+        """
+        weights_matrix = np.atleast_2d(np.asarray(weights_matrix, dtype=float))
+        num_portfolios = weights_matrix.shape[0]
+        num_periods = self._returns_matrix.shape[0]
+        
+        results = {
+            name: np.empty(num_portfolios)
+            for name in ['var', 'cvar', 'max_drawdown', 'rolling_vol_mean', 'rolling_vol_max', 'rolling_vol_last']
+        }
+        drawdown_positions = np.empty(num_portfolios, dtype=int)
+        
+        # Positions either side of the alpha quantile (numpy's default linear interpolation)
+        rank = alpha * (num_periods - 1)
+        lo, hi = int(np.floor(rank)), int(np.ceil(rank))
+        frac = rank - lo
+        
+        for start in range(0, num_portfolios, chunk_size):
+            end = min(start + chunk_size, num_portfolios)
+            portfolio_returns = self._returns_matrix @ weights_matrix[start:end].T
+            
+            # VaR: partition once for both interpolation points
+            partitioned = np.partition(portfolio_returns, [lo, hi], axis=0)
+            var = partitioned[lo] + frac * (partitioned[hi] - partitioned[lo])
+            results['var'][start:end] = var
+            
+            # CVaR: mean of the returns at or below VaR
+            tail = portfolio_returns <= var
+            results['cvar'][start:end] = (portfolio_returns * tail).sum(axis=0) / tail.sum(axis=0)
+            
+            # Drawdown from the running peak of cumulative wealth
+            cumulative = np.cumprod(1 + portfolio_returns, axis=0)
+            drawdown = cumulative / np.maximum.accumulate(cumulative, axis=0) - 1
+            drawdown_positions[start:end] = drawdown.argmin(axis=0)
+            results['max_drawdown'][start:end] = drawdown.min(axis=0)
+            
+            # Rolling sample standard deviation from windowed running sums
+            if num_periods >= window > 1:
+                rolling_vol = rolling_mean_std(portfolio_returns, window)[1][window - 1:] * np.sqrt(252)
+                results['rolling_vol_mean'][start:end] = rolling_vol.mean(axis=0)
+                results['rolling_vol_max'][start:end] = rolling_vol.max(axis=0)
+                results['rolling_vol_last'][start:end] = rolling_vol[-1]
+            else:
+                for name in ['rolling_vol_mean', 'rolling_vol_max', 'rolling_vol_last']:
+                    results[name][start:end] = np.nan
+        
+        results['max_drawdown_period'] = self.returns.index[drawdown_positions]
+        return results
+    
+    @profiled('risk')
+    def calculate_monte_carlo_risk(self, weights: np.ndarray, alpha: float = 0.05, horizon: int = 1,
+                                   num_paths: int = 100000, distribution: str = 'normal',
+                                   seed: int = 0) -> Dict:
+        """
+        Calculate simulated VaR and CVaR over a 1-20 day horizon for one weight
+        vector or a K×N matrix (see MonteCarloRisk)
+        """
+        return self._simulator(distribution, seed).simulate(weights, num_paths=num_paths, horizon=horizon, alpha=alpha)
+
+    def scenarios(self, method: str = 'historical', num_paths: int = 10000, distribution: str = 'normal',
+                  seed: int = 0) -> np.ndarray:
+        """
+        Asset return scenarios (rows) for scenario-based optimizers such as
+        PortfolioOptimizer.min_cvar: the historical returns, or draws from the
+        Monte Carlo model
+        """
+        if method == 'historical':
+            return self._returns_matrix
+        if method == 'simulated':
+            return self._simulator(distribution, seed).scenarios(num_paths)
+        raise ValueError("Scenario method must be 'historical' or 'simulated'")
+
+    def _simulator(self, distribution: str, seed: int) -> MonteCarloRisk:
+        key = (distribution, seed)
+        if key not in self._simulators:
+            self._simulators[key] = MonteCarloRisk.from_returns(self.returns, distribution=distribution, seed=seed)
+        return self._simulators[key]
+    
+    @profiled('risk')
     def calculate_correlation_matrix(self) -> pd.DataFrame:
         """
         Calculate correlation matrix between assets
@@ -0,0 +1,187 @@
+import numpy as np
+from bisect import bisect_left, insort
+from typing import Dict, Optional
+
+# Every function takes a T×K matrix (K return series, e.g. one per portfolio)
+# or a single length-T series, and returns arrays of the same shape. The first
+# window - 1 rows are NaN, as with pandas' rolling(window), and so is every
+# window containing a NaN. running_drawdown needs complete series.
+
+
+def _as_matrix(returns: np.ndarray):
+    returns = np.asarray(returns, dtype=float)
+    return (returns[:, None], True) if returns.ndim == 1 else (returns, False)
+
+
+def _shape_like(result: np.ndarray, vector: bool) -> np.ndarray:
+    return result[:, 0] if vector else result
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums over each trailing window from one cumulative sum, NaN before the first full window"""
+    sums = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        cumulative = np.cumsum(values, axis=0)
+        sums[window - 1] = cumulative[window - 1]
+        sums[window:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def _without_nans(values: np.ndarray, window: int):
+    """Values with NaNs zeroed, and which trailing windows held one (None when there are none)"""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values, None
+    return np.where(missing, 0.0, values), _window_sums(missing.astype(float), window) > 0
+
+
+def rolling_mean_std(returns: np.ndarray, window: int, ddof: int = 1):
+    """
+    Rolling mean and standard deviation from running sums, O(T) per series.
+    Each series is centred on its full-sample mean first, which keeps the
+    difference of sums from cancelling catastrophically.
+    """
+    returns, vector = _as_matrix(returns)
+    if window <= ddof:
+        raise ValueError(f"Window must be larger than ddof ({ddof})")
+    returns, missing = _without_nans(returns, window)
+    centre = returns.mean(axis=0) if len(returns) else 0.0
+    centred = returns - centre
+    sums = _window_sums(centred, window)
+    squares = _window_sums(centred ** 2, window)
+    mean = sums / window + centre
+    std = np.sqrt(np.clip((squares - sums ** 2 / window) / (window - ddof), 0, None))
+    if missing is not None:
+        mean[missing] = std[missing] = np.nan
+    return _shape_like(mean, vector), _shape_like(std, vector)
+
+
+def rolling_quantile(returns: np.ndarray, window: int, q: float) -> np.ndarray:
+    """
+    Rolling q-quantile (numpy's linear interpolation) by sorted-window
+    insertion: each step deletes the value leaving the window and inserts the
+    new one with a binary search, O(log W) comparisons and one memmove,
+    instead of re-sorting every window
+    """
+    returns, vector = _as_matrix(returns)
+    if window < 1:
+        raise ValueError("Window must be at least 1")
+    if not 0 <= q <= 1:
+        raise ValueError("Quantile must be between 0 and 1")
+    num_periods = len(returns)
+    result = np.full(returns.shape, np.nan)
+    if num_periods < window:
+        return _shape_like(result, vector)
+
+    rank = q * (window - 1)
+    lo = int(np.floor(rank))
+    hi = min(lo + 1, window - 1)
+    frac = rank - lo
+    # NaNs sort last as +inf, and the windows holding one are masked after
+    missing = None
+    if np.isnan(returns).any():
+        missing = _window_sums(np.isnan(returns).astype(float), window) > 0
+        returns = np.where(np.isnan(returns), np.inf, returns)
+    for k in range(returns.shape[1]):
+        values = returns[:, k].tolist()
+        window_values = sorted(values[:window])
+        # The order statistics either side of the rank, collected in plain
+        # lists, which keeps the per-step interpreter cost low
+        lower, upper = [window_values[lo]], [window_values[hi]]
+        for leaving, arriving in zip(values, values[window:]):
+            del window_values[bisect_left(window_values, leaving)]
+            insort(window_values, arriving)
+            lower.append(window_values[lo])
+            upper.append(window_values[hi])
+        lower, upper = np.array(lower), np.array(upper)
+        with np.errstate(invalid='ignore'):
+            result[window - 1:, k] = lower + frac * (upper - lower)
+    if missing is not None:
+        result[missing] = np.nan
+    return _shape_like(result, vector)
+
+
+def rolling_var(returns: np.ndarray, window: int, alpha: float = 0.05) -> np.ndarray:
+    """Historical Value at Risk over each trailing window (the alpha quantile of returns)"""
+    return rolling_quantile(returns, window, alpha)
+
+
+def rolling_beta(returns: np.ndarray, market_returns: np.ndarray, window: int) -> np.ndarray:
+    """Rolling beta cov(r, m) / var(m) from running sums of r, m, r·m and m²"""
+    returns, vector = _as_matrix(returns)
+    if window < 2:
+        raise ValueError("Window must be at least 2")
+    market = np.asarray(market_returns, dtype=float).reshape(-1, 1)
+    if len(market) != len(returns):
+        raise ValueError("Market returns must have one value per period")
+    missing = np.isnan(returns) | np.isnan(market)
+    nan_windows = None
+    if missing.any():
+        nan_windows = _window_sums(missing.astype(float), window) > 0
+        returns, market = np.where(missing, 0.0, returns), np.where(missing, 0.0, market)
+    # Centring leaves covariances unchanged and keeps the running sums small
+    centred = returns - (returns.mean(axis=0) if len(returns) else 0.0)
+    market = market - (market.mean() if len(market) else 0.0)
+
+    sum_returns = _window_sums(centred, window)
+    sum_market = _window_sums(market, window)
+    covariance = _window_sums(centred * market, window) - sum_returns * sum_market / window
+    market_variance = _window_sums(market ** 2, window) - sum_market ** 2 / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = covariance / market_variance
+    if nan_windows is not None:
+        beta[nan_windows] = np.nan
+    return _shape_like(beta, vector)
+
+
+def rolling_sharpe(returns: np.ndarray, window: int, risk_free_rate: float = 0.0,
+                   periods_per_year: int = 252) -> np.ndarray:
+    """Annualized Sharpe ratio over each trailing window"""
+    mean, std = rolling_mean_std(returns, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (mean * periods_per_year - risk_free_rate) / (std * np.sqrt(periods_per_year))
+
+
+def running_drawdown(returns: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Drawdown from the running peak of cumulative wealth, the worst drawdown so
+    far, and the number of periods since the last peak, in one pass
+    """
+    returns, vector = _as_matrix(returns)
+    wealth = np.cumprod(1 + returns, axis=0)
+    peak = np.maximum.accumulate(wealth, axis=0)
+    drawdown = wealth / peak - 1
+
+    periods = np.arange(len(returns))[:, None]
+    last_peak = np.maximum.accumulate(np.where(drawdown >= 0, periods, 0), axis=0)
+    return {
+        'drawdown': _shape_like(drawdown, vector),
+        'max_drawdown': _shape_like(np.minimum.accumulate(drawdown, axis=0), vector),
+        'duration': _shape_like(periods - last_peak, vector)
+    }
+
+
+def rolling_metrics(returns_matrix: np.ndarray, weights_matrix: np.ndarray, window: int = 252,
+                    alpha: float = 0.05, market_returns: Optional[np.ndarray] = None,
+                    risk_free_rate: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Rolling volatility, VaR, Sharpe ratio and (with market returns) beta, plus
+    the running drawdown, for K portfolios at once. The T×K portfolio returns
+    come from one matrix product; every result is a T×K array.
+    """
+    weights_matrix = np.atleast_2d(np.asarray(weights_matrix, dtype=float))
+    portfolio_returns = np.asarray(returns_matrix, dtype=float) @ weights_matrix.T
+
+    _, std = rolling_mean_std(portfolio_returns, window)
+    drawdown = running_drawdown(portfolio_returns)
+    results = {
+        'volatility': std * np.sqrt(252),
+        'var': rolling_var(portfolio_returns, window, alpha),
+        'sharpe': rolling_sharpe(portfolio_returns, window, risk_free_rate),
+        'drawdown': drawdown['drawdown'],
+        'max_drawdown': drawdown['max_drawdown'],
+        'drawdown_duration': drawdown['duration']
+    }
+    if market_returns is not None:
+        results['beta'] = rolling_beta(portfolio_returns, market_returns, window)
+    return results
@@ -0,0 +1,81 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+from profiling import profiler
+
+
+def fingerprint(*values) -> str:
+    """
+    Stable content hash of pipeline inputs: DataFrames, Series, arrays, scalars
+    and (nested) tuples, lists and dicts of them
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def update(value):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(b"pandas")
+            digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+            names = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+            digest.update(repr(list(names)).encode())
+        elif isinstance(value, np.ndarray):
+            digest.update(b"ndarray")
+            digest.update(repr((value.dtype.str, value.shape)).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (list, tuple)):
+            digest.update(b"sequence")
+            for item in value:
+                update(item)
+        elif isinstance(value, dict):
+            digest.update(b"dict")
+            for key in sorted(value, key=repr):
+                update(key)
+                update(value[key])
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b"|")
+
+    for value in values:
+        update(value)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Memoizes pipeline stages keyed by a fingerprint of their inputs, with a small
+    LRU per stage and hit/miss counters for the debug panel
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries: Dict[str, OrderedDict] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def get_or_compute(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for (stage, key), computing it on a miss"""
+        entries = self._entries.setdefault(stage, OrderedDict())
+        stats = self.stats.setdefault(stage, {'hits': 0, 'misses': 0})
+
+        if key in entries:
+            stats['hits'] += 1
+            profiler.count(f'stage_cache.{stage}.hits')
+            entries.move_to_end(key)
+            return entries[key]
+
+        stats['misses'] += 1
+        profiler.count(f'stage_cache.{stage}.misses')
+        with profiler.span(stage, 'pipeline'):
+            result = compute()
+        entries[key] = result
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return result
+
+    def stats_frame(self) -> pd.DataFrame:
+        """Hit/miss counters per stage as a DataFrame"""
+        return pd.DataFrame.from_dict(self.stats, orient='index', columns=['hits', 'misses'])
+
+    def clear(self):
+        self._entries.clear()
+        self.stats.clear()
@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from profiling import profiled, profiler
+
+# Peak-to-trough windows of well-known market stresses, (start close, end close]
+HISTORICAL_WINDOWS = {
+    'Global Financial Crisis (2008)': ('2008-09-12', '2009-03-09'),
+    'Taper Tantrum (2013)': ('2013-05-21', '2013-06-24'),
+    'Volatility Shock (Feb 2018)': ('2018-01-26', '2018-02-08'),
+    'Q4 2018 Selloff': ('2018-09-20', '2018-12-24'),
+    'COVID-19 Crash (2020)': ('2020-02-19', '2020-03-23'),
+    'Rate Shock (2022)': ('2022-01-03', '2022-10-12')
+}
+
+
+class StressEngine:
+    """
+    Library of named stress scenarios over a fixed asset universe, evaluated
+    for many portfolios at once.
+
+    Every scenario is stored as a T×N path of cumulative asset growth: a
+    historical window keeps its daily path, a hypothetical shock is a single
+    step. Buy-and-hold portfolio values for all scenarios and all K portfolios
+    then come from one dense (ΣT×N) @ (N×K) product, which gives P&L and
+    drawdown; contributions are weight × asset return at the end of each
+    scenario.
+
+    Results are cached per weights matrix and scenario, so adding a scenario
+    and evaluating again only computes the new one.
+    """
+
+    def __init__(self, tickers: List[str], cache_size: int = 16):
+        self.tickers = list(tickers)
+        self._scenarios: Dict[str, Dict] = OrderedDict()
+        self._results = OrderedDict()
+        self.cache_size = cache_size
+
+    @property
+    def scenario_names(self) -> List[str]:
+        return list(self._scenarios)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._scenarios
+
+    def __len__(self) -> int:
+        return len(self._scenarios)
+
+    def _add(self, name: str, kind: str, growth: np.ndarray, coverage: np.ndarray,
+             period: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None):
+        if name in self._scenarios:
+            raise ValueError(f"Scenario '{name}' already exists")
+        self._scenarios[name] = {
+            'kind': kind,
+            'growth': growth,
+            'coverage': coverage,
+            'period': period
+        }
+
+    def remove(self, name: str):
+        self._scenarios.pop(name)
+        for results in self._results.values():
+            results.pop(name, None)
+
+    def add_shock(self, name: str, shocks: Dict[str, float], default: float = 0.0):
+        """Hypothetical instantaneous return per ticker; unlisted tickers get `default`"""
+        unknown = set(shocks) - set(self.tickers)
+        if unknown:
+            raise ValueError(f"Unknown tickers in shock: {', '.join(sorted(unknown))}")
+        returns = np.array([shocks.get(ticker, default) for ticker in self.tickers], dtype=float)
+        self._add(name, 'shock', 1 + returns[None, :], np.ones(len(self.tickers)))
+
+    def add_factor_shock(self, name: str, factor_shocks: Dict[str, float], asset_returns: pd.DataFrame,
+                         factor_returns: pd.DataFrame):
+        """
+        Hypothetical factor moves mapped to assets through their loadings, from
+        an OLS regression of each asset's returns on the factor returns
+        """
+        factor_returns = factor_returns[list(factor_shocks)].dropna()
+        asset_returns = asset_returns.reindex(index=factor_returns.index, columns=self.tickers)
+        factors = np.column_stack([np.ones(len(factor_returns)), factor_returns.to_numpy(dtype=float)])
+        shock = np.array(list(factor_shocks.values()), dtype=float)
+
+        loadings = np.zeros((len(self.tickers), len(shock)))
+        values = asset_returns.to_numpy(dtype=float)
+        complete = ~np.isnan(values).any(axis=0)
+        # Assets with full history share one least-squares solve; the rest use their own rows
+        if complete.any():
+            loadings[complete] = np.linalg.lstsq(factors, values[:, complete], rcond=None)[0][1:].T
+        for i in np.flatnonzero(~complete):
+            valid = ~np.isnan(values[:, i])
+            if valid.sum() > factors.shape[1]:
+                loadings[i] = np.linalg.lstsq(factors[valid], values[valid, i], rcond=None)[0][1:]
+        coverage = (~np.isnan(values)).mean(axis=0) if len(values) else np.zeros(len(self.tickers))
+        self._add(name, 'factor', 1 + (loadings @ shock)[None, :], coverage)
+
+    def add_market_shock(self, name: str, shock: float, asset_returns: pd.DataFrame,
+                         market_returns: Optional[pd.Series] = None):
+        """A market move scaled by each asset's beta (market defaults to the equal-weighted universe)"""
+        if market_returns is None:
+            market_returns = asset_returns.reindex(columns=self.tickers).mean(axis=1)
+        market = market_returns.rename('market').to_frame()
+        self.add_factor_shock(name, {'market': shock}, asset_returns, market)
+
+    def add_historical(self, name: str, returns: pd.DataFrame, start: str, end: str):
+        """
+        Replay the daily returns from the close of `start` to the close of `end`.
+        Missing returns (e.g. an asset not yet listed) count as flat days; the
+        share of days with data is reported as coverage.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        window = returns.loc[(returns.index > start) & (returns.index <= end)].reindex(columns=self.tickers)
+        if window.empty:
+            raise ValueError(f"No returns between {start.date()} and {end.date()} for '{name}'")
+        values = window.to_numpy(dtype=float)
+        coverage = (~np.isnan(values)).mean(axis=0)
+        growth = np.cumprod(1 + np.nan_to_num(values), axis=0)
+        self._add(name, 'historical', growth, coverage, (window.index[0], window.index[-1]))
+
+    def add_historical_windows(self, returns: pd.DataFrame,
+                               windows: Dict[str, Tuple[str, str]] = HISTORICAL_WINDOWS) -> List[str]:
+        """Add every named window the returns fully cover and return their names"""
+        added = []
+        for name, (start, end) in windows.items():
+            if name in self._scenarios or returns.empty:
+                continue
+            if returns.index[0] <= pd.Timestamp(start) and returns.index[-1] >= pd.Timestamp(end):
+                self.add_historical(name, returns, start, end)
+                added.append(name)
+        return added
+
+    def _evaluate_scenarios(self, names: List[str], weights_matrix: np.ndarray, top: int) -> Dict[str, Dict]:
+        """P&L, drawdown, coverage and worst contributors of `names` for K portfolios"""
+        scenarios = [self._scenarios[name] for name in names]
+        lengths = [len(scenario['growth']) for scenario in scenarios]
+        offsets = np.cumsum([0] + lengths)
+
+        # Buy-and-hold value of every portfolio along every scenario path in one product
+        paths = np.vstack([scenario['growth'] for scenario in scenarios])
+        values = (paths - 1) @ weights_matrix.T
+        exposure = np.abs(weights_matrix).sum(axis=1)
+        exposure[exposure == 0] = 1.0
+        top = min(top, len(self.tickers))
+
+        results = {}
+        for name, scenario, start, end in zip(names, scenarios, offsets[:-1], offsets[1:]):
+            wealth = 1 + values[start:end]
+            peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)
+            contributions = weights_matrix * (scenario['growth'][-1] - 1)
+            worst = np.argpartition(contributions, top - 1, axis=1)[:, :top] if top < contributions.shape[1] \
+                else np.arange(contributions.shape[1])[None, :].repeat(len(contributions), axis=0)
+            order = np.argsort(np.take_along_axis(contributions, worst, axis=1), axis=1)
+            worst = np.take_along_axis(worst, order, axis=1)
+            results[name] = {
+                'pnl': wealth[-1] - 1,
+                'max_drawdown': np.minimum((wealth / peak - 1).min(axis=0), 0.0),
+                'coverage': np.abs(weights_matrix) @ scenario['coverage'] / exposure,
+                'worst_assets': worst,
+                'worst_contributions': np.take_along_axis(contributions, worst, axis=1)
+            }
+        return results
+
+    @profiled('risk')
+    def evaluate(self, weights_matrix: np.ndarray, top: int = 3) -> Dict:
+        """
+        Stress results for one weight vector or a K×N matrix. 'pnl',
+        'max_drawdown' and 'coverage' are S×K arrays (scenarios in library
+        order); 'worst_assets' (ticker indices) and 'worst_contributions' are
+        S×K×top, most negative first.
+        """
+        weights_matrix = np.atleast_2d(np.ascontiguousarray(weights_matrix, dtype=float))
+        if weights_matrix.shape[1] != len(self.tickers):
+            raise ValueError(f"Weights must have one column per ticker ({len(self.tickers)})")
+        if not self._scenarios:
+            raise ValueError("No stress scenarios have been added")
+
+        key = (weights_matrix.shape, weights_matrix.tobytes(), top)
+        cached = self._results.get(key)
+        if cached is None:
+            profiler.count('stress.misses')
+            cached = self._results[key] = {}
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        else:
+            profiler.count('stress.hits')
+            self._results.move_to_end(key)
+
+        missing = [name for name in self._scenarios if name not in cached]
+        if missing:
+            cached.update(self._evaluate_scenarios(missing, weights_matrix, top))
+
+        names = self.scenario_names
+        return {
+            'scenarios': names,
+            **{field: np.stack([cached[name][field] for name in names])
+               for field in ['pnl', 'max_drawdown', 'coverage', 'worst_assets', 'worst_contributions']}
+        }
+
+    def report(self, weights: np.ndarray, top: int = 3, portfolio_value: Optional[float] = None) -> pd.DataFrame:
+        """One row per scenario for a single portfolio, with its worst contributors named"""
+        results = self.evaluate(weights, top=top)
+        rows = []
+        for s, name in enumerate(results['scenarios']):
+            scenario = self._scenarios[name]
+            period = scenario['period']
+            row = {
+                'Scenario': name,
+                'Type': scenario['kind'],
+                'Period': f"{period[0].date()} to {period[1].date()}" if period else '',
+                'P&L': results['pnl'][s, 0],
+                'Max Drawdown': results['max_drawdown'][s, 0],
+                'Coverage': results['coverage'][s, 0],
+                'Worst Contributors': ", ".join(
+                    f"{self.tickers[i]} {contribution:+.1%}"
+                    for i, contribution in zip(results['worst_assets'][s, 0], results['worst_contributions'][s, 0])
+                    if contribution < 0
+                )
+            }
+            if portfolio_value is not None:
+                row['P&L ($)'] = row['P&L'] * portfolio_value
+            rows.append(row)
+        return pd.DataFrame(rows).set_index('Scenario')
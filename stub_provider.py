@@ -0,0 +1,68 @@
+import time
+import zlib
+import threading
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional
+
+
+class StubTicker:
+    """Mimics the slice of yfinance.Ticker that DataFetcher uses"""
+
+    def __init__(self, symbol: str, provider: "StubProvider"):
+        self.symbol = symbol
+        self.provider = provider
+
+    def history(self, start: Optional[str] = None, end: Optional[str] = None,
+                period: Optional[str] = None, **kwargs) -> pd.DataFrame:
+        self.provider._simulate_call()
+        if self.symbol in self.provider.missing:
+            return pd.DataFrame(columns=['Close'])
+
+        prices = self.provider.prices(self.symbol)
+        if period == '1d':
+            prices = prices.iloc[-1:]
+        elif period is None:
+            if start is not None:
+                prices = prices[prices.index >= pd.Timestamp(start)]
+            if end is not None:
+                prices = prices[prices.index < pd.Timestamp(end)]
+        return prices.to_frame('Close')
+
+
+class StubProvider:
+    """
+    Local, deterministic stand-in for yfinance that injects latency and transient
+    failures. Pass it to DataFetcher as `ticker_factory` to exercise the fetch
+    paths without network access.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, failure_rate: float = 0.0,
+                 missing: Iterable[str] = (), start: str = "2000-01-03", seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.missing = set(missing)
+        self.dates = pd.bdate_range(start, pd.Timestamp.today().normalize())
+        self.seed = seed
+        self.calls = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol: str) -> StubTicker:
+        return StubTicker(symbol, self)
+
+    def _simulate_call(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("Injected transient failure")
+
+    def prices(self, symbol: str) -> pd.Series:
+        """Deterministic geometric random walk for a symbol"""
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        returns = rng.normal(0.0003, 0.015, size=len(self.dates))
+        return pd.Series(100 * np.exp(np.cumsum(returns)), index=self.dates, name=symbol)
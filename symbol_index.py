@@ -0,0 +1,321 @@
+"""
+Local ticker symbol search: prefix, name and fuzzy lookups over a listing
+file, without network calls.
+
+    python symbol_index.py micro
+    python symbol_index.py AA --exchange NASDAQ
+    python symbol_index.py goldman --listing nasdaqlisted.txt
+
+The listing (bundled data/symbols.csv, or the file in PORTFOLIO_SYMBOL_LISTING)
+is compiled once into sorted NumPy arrays under the cache directory, and
+later processes memory-map them. Every lookup is a handful of binary searches.
+"""
+import argparse
+import csv
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BUNDLED_LISTING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.csv")
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "portfolio_optimizer", "symbols")
+
+# Column names accepted for each field, covering the NASDAQ Trader listing files
+COLUMNS = {
+    'symbol': ('symbol', 'act symbol', 'ticker'),
+    'name': ('name', 'security name', 'company'),
+    'exchange': ('exchange', 'listing exchange', 'market')
+}
+# Name words too common to help a search
+STOPWORDS = {'inc', 'corp', 'corporation', 'co', 'company', 'the', 'and', 'of', 'ltd', 'limited',
+             'plc', 'class', 'common', 'stock', 'shares', 'group', 'holdings', 'sa', 'se', 'nv'}
+ARRAYS = ('symbols', 'names', 'exchanges', 'popularity', 'terms', 'term_rows', 'vocab', 'deletes', 'delete_vocab')
+# Tiers of the ranking: lower is better
+EXACT, SYMBOL_PREFIX, NAME_PREFIX, FUZZY = range(4)
+
+
+def read_listing(path: str) -> List[Tuple[str, str, str]]:
+    """(symbol, name, exchange) rows of a CSV or pipe-delimited listing, in file order"""
+    with open(path, newline='', encoding='utf-8') as f:
+        header = f.readline()
+        delimiter = '|' if '|' in header else ','
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=delimiter)
+        fields = {key.strip().lower(): key for key in reader.fieldnames or []}
+        columns = {}
+        for field, aliases in COLUMNS.items():
+            columns[field] = next((fields[alias] for alias in aliases if alias in fields), None)
+        if columns['symbol'] is None:
+            raise ValueError(f"Listing {path} has no symbol column")
+
+        rows, seen = [], set()
+        for record in reader:
+            symbol = (record.get(columns['symbol']) or '').strip().upper()
+            # NASDAQ Trader files end with a "File Creation Time" line
+            if not symbol or symbol in seen or symbol.startswith('FILE CREATION'):
+                continue
+            seen.add(symbol)
+            name = (record.get(columns['name']) or '').strip() if columns['name'] else ''
+            exchange = (record.get(columns['exchange']) or '').strip().upper() if columns['exchange'] else ''
+            rows.append((symbol, name, exchange))
+    return rows
+
+
+def name_terms(name: str) -> List[str]:
+    """Lower-case words of a security name, without stopwords"""
+    return [word for word in re.findall(r"[a-z0-9]+", name.lower()) if word not in STOPWORDS]
+
+
+def deletions(term: str) -> List[str]:
+    """The term with each single character removed"""
+    return [term[:i] + term[i + 1:] for i in range(len(term))]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance of a and b counting insertions, deletions, substitutions and
+    swaps of adjacent characters, or limit + 1 once it exceeds `limit`
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _encode(values: Iterable[str]) -> np.ndarray:
+    encoded = [value.encode('utf-8') for value in values]
+    return np.array(encoded, dtype=f"S{max([len(v) for v in encoded] + [1])}")
+
+
+def build_index(rows: List[Tuple[str, str, str]], index_dir: str):
+    """
+    Compile listing rows into sorted arrays in `index_dir`: rows sorted by
+    symbol, (name word, row) pairs sorted by word, and a deletion index
+    mapping every word with one character removed back to the word, so that
+    words within edit distance 2 of a query share a key with it
+    """
+    rows = sorted(enumerate(rows), key=lambda item: item[1][0])
+    popularity = np.array([position for position, _ in rows], dtype=np.int32)
+    rows = [row for _, row in rows]
+
+    pairs = sorted({(term, row) for row, (_, name, _) in enumerate(rows) for term in name_terms(name)})
+    vocab = sorted({term for term, _ in pairs} | {symbol.lower() for symbol, _, _ in rows})
+    delete_pairs = sorted({(key, i) for i, term in enumerate(vocab) if len(term) >= 3
+                           for key in deletions(term)})
+
+    arrays = {
+        'symbols': _encode(symbol for symbol, _, _ in rows),
+        'names': _encode(name for _, name, _ in rows),
+        'exchanges': _encode(exchange for _, _, exchange in rows),
+        'popularity': popularity,
+        'terms': _encode(term for term, _ in pairs),
+        'term_rows': np.array([row for _, row in pairs], dtype=np.int32),
+        'vocab': _encode(vocab),
+        'deletes': _encode(key for key, _ in delete_pairs),
+        'delete_vocab': np.array([i for _, i in delete_pairs], dtype=np.int32)
+    }
+    # Build beside the target and move into place, so a concurrent reader
+    # never sees a half-written index
+    parent = os.path.dirname(os.path.abspath(index_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+            json.dump({'count': len(rows)}, f)
+        os.rename(tmp_dir, index_dir)
+    except OSError:
+        # Another process finished the same index first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(index_dir, "meta.json")):
+            raise
+
+
+class SymbolIndex:
+    """
+    Memory-mapped symbol index. `search` ranks exact symbols first, then
+    symbol prefixes, then securities whose name words start with every query
+    word, then fuzzy (misspelt) matches; ties go to the listing order, which
+    is taken as popularity.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r'))
+
+    @classmethod
+    def from_listing(cls, listing: str, index_dir: Optional[str] = None) -> 'SymbolIndex':
+        """Open the compiled index of a listing file, compiling it if the file is new or changed"""
+        stat = os.stat(listing)
+        key = hashlib.blake2b(f"{os.path.abspath(listing)}:{stat.st_size}:{stat.st_mtime_ns}".encode(),
+                              digest_size=8).hexdigest()
+        path = os.path.join(index_dir or os.getenv('PORTFOLIO_SYMBOL_DIR', DEFAULT_INDEX_DIR), key)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            build_index(read_listing(listing), path)
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @staticmethod
+    def _find(array: np.ndarray, key: bytes, side: str = 'left') -> int:
+        """
+        searchsorted with the key cast to the array's dtype: a key of another
+        width makes numpy cast the whole (memory-mapped) array instead
+        """
+        width = array.dtype.itemsize
+        if len(key) > width:
+            # Longer than every entry, so it sorts right after its truncation
+            return int(np.searchsorted(array, np.array(key[:width], dtype=array.dtype), 'right'))
+        return int(np.searchsorted(array, np.array(key, dtype=array.dtype), side))
+
+    def _prefix_range(self, array: np.ndarray, prefix: bytes) -> Tuple[int, int]:
+        return self._find(array, prefix), self._find(array, prefix + b'\xff')
+
+    def _symbol_rows(self, symbol: bytes) -> np.ndarray:
+        lo, hi = self._prefix_range(self.symbols, symbol)
+        return np.arange(lo, hi)
+
+    def _term_rows(self, term: bytes, prefix: bool) -> np.ndarray:
+        if prefix:
+            lo, hi = self._prefix_range(self.terms, term)
+        else:
+            lo, hi = self._find(self.terms, term), self._find(self.terms, term, 'right')
+        return np.asarray(self.term_rows[lo:hi])
+
+    def _fuzzy_rows(self, word: str) -> np.ndarray:
+        """Rows with a name word or symbol within edit distance 1 (2 for long words) of `word`"""
+        if len(word) < 3:
+            return np.zeros(0, dtype=np.int64)
+        limit = 1 if len(word) < 6 else 2
+        keys = [key.encode() for key in [word] + deletions(word)]
+        candidates = set()
+        # The word itself, or one of its deletions, against the vocabulary...
+        for key in keys:
+            i = self._find(self.vocab, key)
+            if i < len(self.vocab) and self.vocab[i] == key:
+                candidates.add(i)
+            # ...and against the vocabulary's deletions
+            start, end = self._find(self.deletes, key), self._find(self.deletes, key, 'right')
+            candidates.update(self.delete_vocab[start:end].tolist())
+
+        rows = []
+        for i in candidates:
+            term = self.vocab[i].decode()
+            if edit_distance(word, term, limit) <= limit:
+                rows.append(self._term_rows(self.vocab[i], prefix=False))
+                rows.append(self._symbol_rows_exact(term.upper().encode()))
+        return np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+
+    def _symbol_rows_exact(self, symbol: bytes) -> np.ndarray:
+        i = self._find(self.symbols, symbol)
+        return np.array([i]) if i < len(self.symbols) and self.symbols[i] == symbol else np.zeros(0, dtype=np.int64)
+
+    def _name_rows(self, words: List[str], fuzzy: bool) -> np.ndarray:
+        """Rows whose name matches every word (by prefix, or fuzzily)"""
+        rows = None
+        for word in words:
+            matches = self._term_rows(word.encode(), prefix=True)
+            if fuzzy:
+                matches = np.concatenate([matches, self._fuzzy_rows(word)])
+            rows = np.unique(matches) if rows is None else np.intersect1d(rows, matches)
+            if not len(rows):
+                break
+        return rows if rows is not None else np.zeros(0, dtype=np.int64)
+
+    def search(self, query: str, limit: int = 10, exchange: Optional[str] = None, fuzzy: bool = True) -> List[Dict]:
+        """Ranked matches for a symbol or name query, optionally on one exchange"""
+        query = query.strip()
+        if not query:
+            return []
+        symbol = query.upper().encode('utf-8')
+        words = [word for word in re.findall(r"[a-z0-9]+", query.lower()) if word not in STOPWORDS] \
+            or re.findall(r"[a-z0-9]+", query.lower())
+
+        tiers = [(EXACT, self._symbol_rows_exact(symbol)), (SYMBOL_PREFIX, self._symbol_rows(symbol))]
+        if words:
+            tiers.append((NAME_PREFIX, self._name_rows(words, fuzzy=False)))
+            # Misspellings are only looked for when the other tiers come up short
+            found = len(np.unique(np.concatenate([rows for _, rows in tiers])))
+            if fuzzy and (found < limit or exchange is not None):
+                tiers.append((FUZZY, self._name_rows(words, fuzzy=True)))
+
+        rows = np.concatenate([found for _, found in tiers]).astype(np.int64)
+        ranks = np.concatenate([np.full(len(found), tier) for tier, found in tiers])
+        if exchange is not None:
+            keep = np.asarray(self.exchanges[rows]) == exchange.upper().encode()
+            rows, ranks = rows[keep], ranks[keep]
+        if not len(rows):
+            return []
+
+        # Best tier of each row, then listing order, then shorter symbols
+        popularity = np.asarray(self.popularity[rows])
+        lengths = np.char.str_len(np.asarray(self.symbols[rows]))
+        order = np.lexsort((lengths, popularity, ranks))
+        rows, ranks = rows[order], ranks[order]
+        _, first = np.unique(rows, return_index=True)
+        first.sort()
+
+        return [self.describe_row(int(row), match=int(rank))
+                for row, rank in zip(rows[first][:limit], ranks[first][:limit])]
+
+    def describe_row(self, row: int, match: Optional[int] = None) -> Dict:
+        result = {
+            'symbol': self.symbols[row].decode(),
+            'name': self.names[row].decode(),
+            'exchange': self.exchanges[row].decode()
+        }
+        if match is not None:
+            result['match'] = ('exact', 'symbol prefix', 'name', 'fuzzy')[match]
+        return result
+
+    def lookup(self, symbol: str) -> Optional[Dict]:
+        """Name and exchange of an exact symbol, or None"""
+        rows = self._symbol_rows_exact(symbol.strip().upper().encode('utf-8'))
+        return self.describe_row(int(rows[0])) if len(rows) else None
+
+    def exchange_symbols(self, exchange: str) -> List[str]:
+        """All symbols listed on an exchange, in listing order"""
+        rows = np.flatnonzero(np.asarray(self.exchanges) == exchange.upper().encode())
+        rows = rows[np.argsort(np.asarray(self.popularity[rows]), kind='stable')]
+        return [symbol.decode() for symbol in np.asarray(self.symbols[rows])]
+
+
+@functools.lru_cache(maxsize=None)
+def default_index() -> SymbolIndex:
+    """Index of PORTFOLIO_SYMBOL_LISTING (or the bundled listing), opened once per process"""
+    return SymbolIndex.from_listing(os.getenv('PORTFOLIO_SYMBOL_LISTING', BUNDLED_LISTING))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Search the local ticker symbol index")
+    parser.add_argument("query", help="Symbol, symbol prefix or company name")
+    parser.add_argument("--exchange", default=None, help="Only symbols listed on this exchange")
+    parser.add_argument("--listing", default=None, help="Listing file (CSV or NASDAQ Trader pipe format)")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    index = SymbolIndex.from_listing(args.listing) if args.listing else default_index()
+    for match in index.search(args.query, limit=args.limit, exchange=args.exchange):
+        print(f"{match['symbol']:<10} {match['exchange']:<9} {match['match']:<14} {match['name']}")
+
+
+if __name__ == "__main__":
+    main()
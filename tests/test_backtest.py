@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import Backtester
+
+
+def make_prices(drift: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2020-01-01', periods=400)
+    returns = rng.normal(drift, 0.01, (len(index), 3))
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index, columns=['A', 'B', 'C'])
+
+
+def test_unknown_strategy_is_rejected_up_front():
+    with pytest.raises(ValueError, match="Unknown strategy 'max_sharp'"):
+        Backtester(make_prices(0.0005), strategy='max_sharp', max_workers=1)
+
+
+def test_max_sharpe_falls_back_when_no_asset_beats_the_risk_free_rate():
+    # Every asset loses money, so the tangency portfolio is undefined
+    backtest = Backtester(make_prices(-0.002), strategy='max_sharpe', estimation_window=120,
+                          risk_free_rate=0.02, max_workers=1)
+    result = backtest.run()
+    assert result['fallbacks'].all()
+    assert result['fallbacks'].index.equals(result['weights'].index)
+
+
+def test_feasible_rebalances_do_not_fall_back():
+    result = Backtester(make_prices(0.002), strategy='max_sharpe', estimation_window=120, max_workers=1).run()
+    assert not result['fallbacks'].any()
+
+
+def test_one_optimizer_is_updated_until_the_eligible_assets_change(monkeypatch):
+    import backtest
+    built = []
+
+    class CountingOptimizer(backtest.PortfolioOptimizer):
+        def __init__(self, returns, **kwargs):
+            built.append(list(returns.columns))
+            super().__init__(returns, **kwargs)
+
+    monkeypatch.setattr(backtest, 'PortfolioOptimizer', CountingOptimizer)
+    prices = make_prices(0.0005)
+    # C lists after 200 days, so windows switch from (A, B) to (A, B, C) once
+    prices.iloc[:200, 2] = np.nan
+    weights = Backtester(prices, estimation_window=120, rebalance_frequency=20, max_workers=1).target_weights()
+
+    assert built == [['A', 'B'], ['A', 'B', 'C']]
+    assert len(weights) > 2
+    assert (weights.loc[:prices.index[319], 'C'] == 0).all()
+    assert (weights.iloc[-1] > 0).all()
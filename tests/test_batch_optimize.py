@@ -0,0 +1,52 @@
+import importlib.util
+
+import pytest
+
+from batch_optimize import check_output, main
+
+
+def test_csv_output_is_always_accepted():
+    check_output('results.csv')
+
+
+def test_unknown_output_extension_is_rejected():
+    with pytest.raises(ValueError, match=".parquet or .csv"):
+        check_output('results.xlsx')
+
+
+def test_parquet_without_an_engine_fails_before_the_batch(monkeypatch, tmp_path):
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name, *args: None)
+    portfolios = tmp_path / 'portfolios.json'
+    portfolios.write_text('[{"name": "p", "tickers": ["AAA"]}]')
+    # The CLI exits on the argument check, before loading portfolios or fetching prices
+    with pytest.raises(SystemExit):
+        main([str(portfolios), '--start', '2020-01-01', '--output', str(tmp_path / 'results.parquet')])
+    assert not (tmp_path / 'results.parquet').exists()
+
+
+def test_portfolios_only_lose_dates_none_of_their_tickers_traded():
+    import numpy as np
+    import pandas as pd
+    import batch_optimize
+    from returns_panel import ReturnsPanel
+
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0.0005, 0.01, (300, 3)), index=pd.bdate_range('2020-01-01', periods=300),
+                           columns=['AAA', 'BBB', 'CCC'])
+    # CCC lists late; AAA and BBB share a holiday
+    returns.iloc[:100, 2] = np.nan
+    returns.iloc[150, :2] = np.nan
+    with ReturnsPanel.from_frame(returns) as panel:
+        batch_optimize._init_worker(panel, pd.Series(100.0, index=returns.columns))
+        try:
+            pair = batch_optimize.optimize_portfolio({'name': 'pair', 'tickers': ['AAA', 'BBB'],
+                                                      'strategy': 'min_variance'})
+            late = batch_optimize.optimize_portfolio({'name': 'late', 'tickers': ['CCC', 'AAA'],
+                                                      'strategy': 'min_variance'})
+            unknown = batch_optimize.optimize_portfolio({'name': 'unknown', 'tickers': ['AAA', 'ZZZ']})
+        finally:
+            batch_optimize._release_worker()
+
+    assert pair['error'] is None and pair['observations'] == 299
+    assert late['error'] is None and late['observations'] == 300
+    assert unknown['error'] == "No price data for ZZZ"
@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+
+
+@pytest.fixture
+def suite(monkeypatch):
+    monkeypatch.syspath_prepend(BENCHMARKS)
+    import suite
+    return suite
+
+
+def test_smoke_run_saves_and_compares_a_baseline(suite, tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    args = ['--assets', '5', '--years', '1', '--points', '3', '--repeats', '1']
+    assert suite.main(args + ['--save', str(baseline)]) == 0
+
+    saved = json.loads(baseline.read_text())
+    keys = set(saved['results'])
+    assert {suite.case_key(name, params) for name, params, _ in suite.frontier_cases(saved['grid'])} <= keys
+    assert {key.split('[')[0] for key in keys} == set(suite.SUITES)
+    assert all(result['time'] > 0 and result['peak_memory'] > 0 for result in saved['results'].values())
+
+    # A generous threshold absorbs timing noise between two runs
+    assert suite.main(args + ['--only', 'optimizer', '--compare', str(baseline), '--threshold', '100']) == 0
+    assert "No regressions" in capsys.readouterr().out
+
+
+def test_regressions_fail_the_comparison(suite):
+    baseline = {key: {'time': 0.010, 'peak_memory': 2 ** 20} for key in ['case[a=1]', 'case[a=2]']}
+    results = {
+        'case[a=1]': {'time': 0.020, 'peak_memory': 2 ** 20},
+        'case[a=2]': {'time': 0.011, 'peak_memory': 4 * 2 ** 20},
+        'case[a=3]': {'time': 1.0, 'peak_memory': 2 ** 30},
+    }
+    regressions = suite.compare(results, baseline, threshold=0.25, min_time=0.005)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('case[a=1]: time') and regressions[1].startswith('case[a=2]: peak memory')
+    # Differences below min_time are noise
+    assert suite.compare(results, baseline, threshold=0.25, min_time=0.05) == [regressions[1]]
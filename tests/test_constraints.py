@@ -0,0 +1,109 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import constraints
+from constraints import ConstraintSpec
+from portfolio_optimizer import PortfolioOptimizer
+
+
+@pytest.fixture
+def optimizer():
+    rng = np.random.default_rng(7)
+    loadings = rng.normal(0, 0.01, (8, 2))
+    returns = rng.normal(0, 1, (500, 2)) @ loadings.T + rng.normal(0, 0.008, (500, 8)) + 0.0004
+    return PortfolioOptimizer(pd.DataFrame(returns, columns=[f"A{i}" for i in range(8)]))
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'turnover_limit': 0.2}, "current weights"),
+    ({'turnover_limit': -0.1, 'current_weights': {}}, "negative"),
+    ({'max_assets': 0}, "positive integer"),
+    ({'max_assets': 2.5}, "positive integer"),
+    ({'min_weight': 0.0}, "min_weight"),
+    ({'min_weight': 1.5}, "min_weight"),
+    ({'lower_bounds': 0.3, 'upper_bounds': 0.2}, "exceed"),
+    ({'groups': {'tech': {'max': 0.4}}}, "no assets"),
+    ({'groups': {'tech': {'assets': ['A0'], 'min': 0.5, 'max': 0.4}}}, "minimum above"),
+])
+def test_invalid_specs_are_rejected(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        ConstraintSpec(**kwargs)
+
+
+def test_from_dict_matches_keyword_construction():
+    spec = ConstraintSpec.from_dict({'upper_bounds': 0.3, 'max_assets': 4, 'min_weight': 0.1})
+    assert (spec.upper_bounds, spec.max_assets, spec.min_weight) == (0.3, 4, 0.1)
+    assert spec.selects_assets and not ConstraintSpec().selects_assets
+
+
+@pytest.mark.parametrize('spec', [
+    {'max_assets': 3},
+    {'max_assets': 4, 'upper_bounds': 0.4},
+    {'max_assets': 5, 'min_weight': 0.15},
+    {'min_weight': 0.2},
+])
+def test_heuristic_respects_cardinality_and_min_weight(optimizer, spec):
+    weights = optimizer.constrained(spec)['weights']
+    held = weights[weights > 0]
+    assert weights.sum() == pytest.approx(1.0)
+    assert len(held) <= spec.get('max_assets', len(weights))
+    assert held.min() >= spec.get('min_weight', 0.0) - 1e-6
+    assert held.max() <= spec.get('upper_bounds', 1.0) + 1e-6
+
+
+def brute_force(optimizer, spec):
+    """Exact cardinality optimum: the best minimum-variance portfolio over every selection"""
+    best = np.inf
+    for size in range(1, spec['max_assets'] + 1):
+        for selection in itertools.combinations(range(optimizer.num_assets), size):
+            lower = np.zeros(optimizer.num_assets)
+            lower[list(selection)] = spec.get('min_weight', 0.0)
+            upper = np.zeros(optimizer.num_assets)
+            upper[list(selection)] = spec.get('upper_bounds', 1.0)
+            try:
+                weights = optimizer.constrained({'lower_bounds': dict(zip(optimizer.mean_returns.index, lower)),
+                                                 'upper_bounds': dict(zip(optimizer.mean_returns.index, upper))})['weights']
+            except ValueError:
+                continue
+            best = min(best, optimizer.calculate_portfolio_performance(weights)[1])
+    return best
+
+
+@pytest.mark.parametrize('spec', [{'max_assets': 3}, {'max_assets': 4, 'min_weight': 0.2}])
+def test_heuristic_is_close_to_the_exact_optimum(optimizer, spec):
+    heuristic = optimizer.constrained(spec, time_limit=5.0)['volatility']
+    assert heuristic == pytest.approx(brute_force(optimizer, spec), rel=0.02)
+
+
+@pytest.mark.skipif(not set(constraints.MIQP_SOLVERS) & set(__import__('cvxpy').installed_solvers()),
+                    reason="no mixed-integer QP solver installed")
+def test_heuristic_against_the_mip(optimizer):
+    spec = {'max_assets': 3, 'min_weight': 0.1}
+    mip = optimizer.constrained(spec, backend='mip', time_limit=30.0)['volatility']
+    heuristic = optimizer.constrained(spec)['volatility']
+    assert mip <= heuristic * (1 + 1e-6)
+    assert heuristic == pytest.approx(mip, rel=0.02)
+
+
+def test_mip_solver_gets_the_time_limit(optimizer, monkeypatch):
+    import cvxpy as cp
+    calls = []
+
+    def solve(self, solver=None, **kwargs):
+        calls.append((solver, kwargs))
+        return np.full(len(self.assets), 1 / len(self.assets))
+
+    monkeypatch.setattr(cp, 'installed_solvers', lambda: ['GUROBI'])
+    monkeypatch.setattr(constraints.ConstrainedProblem, 'solve', solve)
+    optimizer.constrained({'max_assets': 3}, backend='mip', time_limit=2.5)
+    assert calls == [('GUROBI', {'TimeLimit': 2.5})]
+
+
+def test_mip_without_a_solver_is_an_error(optimizer, monkeypatch):
+    import cvxpy as cp
+    monkeypatch.setattr(cp, 'installed_solvers', lambda: ['OSQP'])
+    with pytest.raises(ValueError, match="No mixed-integer QP solver"):
+        optimizer.constrained({'max_assets': 3}, backend='mip')
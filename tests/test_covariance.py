@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from covariance import EWMACovariance, FactorModelCovariance, LedoitWolfCovariance, SampleCovariance
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(8)
+    factors = rng.normal(0, 0.01, (250, 2))
+    loadings = rng.normal(1, 0.3, (2, 6))
+    values = factors @ loadings + rng.normal(0, 0.005, (250, 6)) + 0.0003
+    return pd.DataFrame(values, index=pd.bdate_range('2020-01-01', periods=250), columns=list('ABCDEF'))
+
+
+def ledoit_wolf_reference(values: np.ndarray) -> np.ndarray:
+    """Ledoit & Wolf (2004), Lemma 3.2 and Theorem 3.1, with the norm ||A||² = tr(AAᵀ)/N"""
+    num_periods, num_assets = values.shape
+    x = values - values.mean(axis=0)
+    sample = x.T @ x / num_periods
+    norm = lambda a: np.trace(a @ a.T) / num_assets
+    m = np.trace(sample) / num_assets
+    d2 = norm(sample - m * np.eye(num_assets))
+    b2_bar = sum(norm(np.outer(row, row) - sample) for row in x) / num_periods ** 2
+    b2 = min(b2_bar, d2)
+    return (b2 / d2) * m * np.eye(num_assets) + (1 - b2 / d2) * sample
+
+
+def test_sample_matches_pandas_with_and_without_gaps(returns):
+    np.testing.assert_allclose(SampleCovariance().fit(returns).matrix, returns.cov(), rtol=1e-12)
+    gappy = returns.copy()
+    gappy.iloc[:40, 0] = np.nan
+    gappy.iloc[100:110, 3] = np.nan
+    np.testing.assert_allclose(SampleCovariance().fit(gappy).matrix, gappy.cov(), rtol=1e-10)
+
+
+def test_ledoit_wolf_matches_the_paper(returns):
+    estimator = LedoitWolfCovariance()
+    matrix = estimator.fit(returns).matrix.values
+    np.testing.assert_allclose(matrix, ledoit_wolf_reference(returns.values), rtol=1e-10)
+    assert 0 < estimator.shrinkage < 1
+
+
+def test_ledoit_wolf_matches_scikit_learn(returns):
+    covariance = pytest.importorskip('sklearn.covariance')
+    expected, shrinkage = covariance.ledoit_wolf(returns.values)
+    estimator = LedoitWolfCovariance()
+    np.testing.assert_allclose(estimator.fit(returns).matrix.values, expected, rtol=1e-10)
+    assert estimator.shrinkage == pytest.approx(shrinkage, rel=1e-10)
+
+
+@pytest.mark.parametrize('halflife', [10, 63])
+def test_ewma_matches_pandas(returns, halflife):
+    expected = returns.ewm(halflife=halflife).cov(bias=True).loc[returns.index[-1]]
+    np.testing.assert_allclose(EWMACovariance(halflife).fit(returns).matrix, expected, rtol=1e-10)
+
+
+def test_ewma_factor_reproduces_the_matrix_for_short_histories(returns):
+    model = EWMACovariance(20).fit(returns.iloc[:5])
+    np.testing.assert_allclose(model.factor.T @ model.factor, model.matrix.values, rtol=1e-12)
+
+
+@pytest.mark.parametrize('num_factors', [1, 2, 4])
+def test_factor_model_is_the_top_principal_components(returns, num_factors):
+    sample = returns.cov().values
+    eigvals, eigvecs = np.linalg.eigh(sample)
+    top = np.argsort(eigvals)[::-1][:num_factors]
+    systematic = (eigvecs[:, top] * eigvals[top]) @ eigvecs[:, top].T
+    specific = np.maximum(np.diag(sample) - np.diag(systematic), 1e-10)
+
+    model = FactorModelCovariance(num_factors).fit(returns)
+    np.testing.assert_allclose(model.factor.T @ model.factor, systematic, rtol=1e-8, atol=1e-14)
+    np.testing.assert_allclose(model.specific_variance, specific, rtol=1e-8)
+    np.testing.assert_allclose(model.matrix.values, systematic + np.diag(specific), rtol=1e-8, atol=1e-14)
+    # The Woodbury solve matches a dense one
+    b = np.arange(1.0, 7.0)
+    np.testing.assert_allclose(model.solve(b), np.linalg.solve(model.matrix.values, b), rtol=1e-8)
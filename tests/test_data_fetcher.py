@@ -0,0 +1,99 @@
+import time
+import pandas as pd
+import pytest
+
+from data_fetcher import DataFetcher
+from fetch_pool import RetryBudget
+from price_cache import PriceCache
+from stub_provider import StubProvider
+
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE', 'FFF', 'GGG', 'HHH']
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Retries are exercised, not their jittered delays
+    monkeypatch.setattr(RetryBudget, 'backoff', lambda self, attempt: 0.0)
+
+
+def make_fetcher(provider, tmp_path, **kwargs):
+    return DataFetcher(ticker_factory=provider, cache=PriceCache(str(tmp_path)), **kwargs)
+
+
+def test_tickers_are_fetched_concurrently(tmp_path):
+    provider = StubProvider(latency=0.2)
+    fetcher = make_fetcher(provider, tmp_path, max_workers=8)
+
+    start = time.perf_counter()
+    prices = fetcher.fetch_yfinance_data(TICKERS, '2020-01-01', '2020-06-01')
+    elapsed = time.perf_counter() - start
+
+    assert list(prices.columns) == TICKERS
+    assert prices.notna().all().all()
+    assert provider.calls == len(TICKERS)
+    # Sequential fetching would take 8 × 0.2 s
+    assert elapsed < 0.2 * len(TICKERS) / 2
+
+
+def test_transient_failures_are_retried(tmp_path):
+    provider = StubProvider(latency=0.0, failure_rate=0.3, seed=1)
+    fetcher = make_fetcher(provider, tmp_path, max_retries=100)
+    prices = fetcher.fetch_yfinance_data(TICKERS, '2020-01-01', '2020-06-01')
+    assert prices.notna().all().all()
+    assert provider.calls > len(TICKERS)
+
+
+def test_retry_budget_is_shared_by_the_batch(tmp_path):
+    provider = StubProvider(latency=0.0, failure_rate=1.0)
+    fetcher = make_fetcher(provider, tmp_path, max_retries=3)
+
+    results, errors = fetcher.fetch_yfinance_batch(TICKERS, '2020-01-01', '2020-06-01')
+    assert results == {}
+    assert set(errors) == set(TICKERS)
+    assert all("Injected transient failure" in error for error in errors.values())
+    # One attempt per ticker plus the three retries of the whole batch
+    assert provider.calls == len(TICKERS) + 3
+
+
+def test_errors_are_collected_across_tickers(tmp_path):
+    provider = StubProvider(latency=0.0, missing=['BAD1', 'BAD2'])
+    fetcher = make_fetcher(provider, tmp_path)
+
+    results, errors = fetcher.fetch_yfinance_batch(['AAA', 'BAD1', 'BBB', 'BAD2'], '2020-01-01', '2020-06-01')
+    assert set(results) == {'AAA', 'BBB'}
+    assert set(errors) == {'BAD1', 'BAD2'}
+
+    with pytest.raises(Exception) as raised:
+        fetcher.fetch_yfinance_data(['AAA', 'BAD1', 'BBB', 'BAD2'], '2020-01-01', '2020-06-01')
+    assert "BAD1" in str(raised.value) and "BAD2" in str(raised.value)
+
+
+def test_missing_data_is_not_retried(tmp_path):
+    provider = StubProvider(latency=0.0, missing=['BAD'])
+    fetcher = make_fetcher(provider, tmp_path, max_retries=5)
+    _, errors = fetcher.fetch_yfinance_batch(['BAD'], '2020-01-01', '2020-06-01')
+    assert "No data available" in errors['BAD']
+    # The three download fallbacks, and no retries
+    assert provider.calls == 3
+
+
+def test_cache_top_up_fetches_only_new_dates(tmp_path):
+    provider = StubProvider(latency=0.0)
+    fetcher = make_fetcher(provider, tmp_path)
+    fetcher.fetch_yfinance_data(TICKERS, '2020-01-01', '2020-06-01')
+
+    calls = provider.calls
+    fetcher.fetch_yfinance_data(TICKERS, '2020-01-01', '2020-06-01')
+    assert provider.calls == calls
+
+    prices = fetcher.fetch_yfinance_data(TICKERS, '2020-03-01', '2020-09-01')
+    assert provider.calls == calls + len(TICKERS)
+    assert prices.index[0] >= pd.Timestamp('2020-03-01')
+    assert prices.notna().all().all()
+
+
+def test_current_prices_are_fetched_for_every_ticker(tmp_path):
+    provider = StubProvider(latency=0.0, missing=['BAD'])
+    prices = make_fetcher(provider, tmp_path).get_current_prices(['AAA', 'BBB', 'BAD'])
+    assert set(prices) == {'AAA', 'BBB'}
+    assert prices['AAA'] == pytest.approx(provider.prices('AAA').iloc[-1])
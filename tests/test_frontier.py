@@ -0,0 +1,45 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_optimizer import PortfolioOptimizer
+
+
+@pytest.fixture
+def optimizer():
+    rng = np.random.default_rng(3)
+    loadings = rng.normal(0, 0.01, (20, 3))
+    returns = rng.normal(0, 1, (756, 3)) @ loadings.T + rng.normal(0, 0.01, (756, 20)) + rng.uniform(0, 0.001, 20)
+    return PortfolioOptimizer(pd.DataFrame(returns))
+
+
+def test_default_tolerance_converges_before_the_point_cap(optimizer):
+    portfolios = optimizer.adaptive_frontier()
+    assert 3 <= len(portfolios) < 100
+
+
+def test_tolerance_does_not_depend_on_the_return_scale(optimizer):
+    scaled = PortfolioOptimizer(optimizer.returns * 10)
+    assert len(scaled.adaptive_frontier(tolerance=0.005)) == len(optimizer.adaptive_frontier(tolerance=0.005))
+
+
+def test_inaccurate_solves_do_not_warn(optimizer):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        portfolios = optimizer.adaptive_frontier(tolerance=0.0005)
+    returns = [p['return'] for p in portfolios]
+    assert returns == sorted(returns)
+
+
+def test_trace_leaves_the_endpoints_unchanged(optimizer):
+    frontier = optimizer._parametric_frontier()
+    low = frontier.solve(float(optimizer.mean_returns.min()))
+    high = frontier.solve(float(optimizer.mean_returns.max()) * 0.99)
+    before = [dict(low), dict(high)]
+
+    points = frontier.trace(low, high, max_points=5)
+    assert [low, high] == before
+    assert points[0] is not low and points[-1] is not high
+    assert all('volatility_scaled' not in point for point in points)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hrp import hrp_weights
+from portfolio_optimizer import PortfolioOptimizer
+
+
+@pytest.fixture
+def blocks():
+    # Three blocks of correlated assets, shuffled so the clustering has to regroup them
+    rng = np.random.default_rng(10)
+    groups = np.repeat([0, 1, 2], [3, 4, 5])
+    rng.shuffle(groups)
+    factors = rng.normal(0, 0.01, (1000, 3))
+    noise = rng.normal(0, 0.004, (1000, len(groups))) * rng.uniform(0.5, 2, len(groups))
+    return pd.DataFrame(factors[:, groups] + noise), groups
+
+
+def reference_bisection(cov: np.ndarray, order: list) -> np.ndarray:
+    """López de Prado's recursive bisection, written out over lists of asset indexes"""
+    weights = np.ones(len(cov))
+    clusters = [list(order)]
+    while clusters:
+        clusters = [half for cluster in clusters if len(cluster) > 1
+                    for half in (cluster[:len(cluster) // 2], cluster[len(cluster) // 2:])]
+        for left, right in zip(clusters[::2], clusters[1::2]):
+            variances = []
+            for cluster in (left, right):
+                sub = cov[np.ix_(cluster, cluster)]
+                ivp = 1 / np.diag(sub) / (1 / np.diag(sub)).sum()
+                variances.append(ivp @ sub @ ivp)
+            alpha = 1 - variances[0] / sum(variances)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+    return weights
+
+
+@pytest.mark.parametrize('method', ['single', 'average', 'complete', 'ward'])
+def test_order_keeps_clusters_together_and_weights_follow_it(blocks, method):
+    returns, groups = blocks
+    cov = returns.cov().values
+    solution = hrp_weights(cov, method=method)
+
+    assert sorted(solution['order']) == list(range(len(groups)))
+    ordered_groups = groups[solution['order']]
+    # Each block is one contiguous run of the quasi-diagonal order
+    assert (np.diff(ordered_groups) != 0).sum() == 2
+
+    weights = solution['weights']
+    assert weights.sum() == pytest.approx(1.0) and (weights > 0).all()
+    np.testing.assert_allclose(weights, reference_bisection(cov, list(solution['order'])), rtol=1e-12)
+
+
+def test_uncorrelated_equal_variances_get_equal_weights():
+    solution = hrp_weights(np.eye(8) * 0.0004)
+    np.testing.assert_allclose(solution['weights'], np.full(8, 1 / 8))
+
+
+def test_a_given_linkage_is_reused_and_checked(blocks):
+    returns, _ = blocks
+    optimizer = PortfolioOptimizer(returns)
+    first = optimizer.hrp()
+    linkage = optimizer._hrp_linkages['single']
+    again = optimizer.hrp()
+    assert optimizer._hrp_linkages['single'] is linkage
+    np.testing.assert_array_equal(first['order'], again['order'])
+    with pytest.raises(ValueError, match="Linkage"):
+        hrp_weights(returns.cov().values, linkage=linkage[:-1])
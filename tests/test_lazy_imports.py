@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ['cvxpy', 'scipy.optimize', 'scipy.cluster', 'scipy.linalg', 'yfinance', 'alpha_vantage.timeseries',
+         'plotly.express', 'matplotlib.pyplot']
+
+
+def loaded_after(code: str) -> set:
+    """Heavy modules in sys.modules after running `code` in a fresh interpreter"""
+    script = textwrap.dedent(code) + f"\nimport sys\nprint(','.join(m for m in {HEAVY!r} if m in sys.modules))\n"
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return {m for m in completed.stdout.rstrip("\n").split("\n")[-1].split(",") if m}
+
+
+def test_entry_points_import_no_heavy_dependency():
+    assert loaded_after("""
+        import portfolio_optimizer, risk_metrics, data_fetcher, portfolio_calculations
+        import preprocessing, profiling, stage_cache, utils, batch_optimize
+    """) == set()
+
+
+def test_closed_forms_and_risk_metrics_run_without_cvxpy():
+    loaded = loaded_after("""
+        import numpy as np, pandas as pd
+        from portfolio_optimizer import PortfolioOptimizer
+        from risk_metrics import RiskMetrics
+        returns = pd.DataFrame(np.random.default_rng(0).normal(0.001, 0.01, (300, 4)))
+        optimizer = PortfolioOptimizer(returns)
+        weights = optimizer.min_variance()['weights']
+        optimizer.risk_parity()
+        RiskMetrics(returns).calculate_var(weights)
+        assert optimizer._min_variance_problem is None
+    """)
+    # The dense Cholesky solve needs scipy.linalg; nothing needs the QP stack
+    assert 'cvxpy' not in loaded and 'scipy.cluster' not in loaded and 'scipy.optimize' not in loaded
+
+
+def test_cvxpy_loads_with_the_first_qp():
+    assert 'cvxpy' in loaded_after("""
+        import numpy as np, pandas as pd
+        from portfolio_optimizer import PortfolioOptimizer
+        rng = np.random.default_rng(0)
+        returns = pd.DataFrame(rng.normal(0, 0.01, (300, 1)) + rng.normal(0, 0.003, (300, 4)) * [1, 2, 4, 8])
+        PortfolioOptimizer(returns).min_variance()
+    """)
+
+
+def test_provider_clients_are_created_on_first_use():
+    assert loaded_after("""
+        from data_fetcher import DataFetcher
+        DataFetcher(use_cache=False)
+    """).isdisjoint({'yfinance', 'alpha_vantage.timeseries'})
+
+
+def test_scipy_cluster_loads_only_for_hrp():
+    setup = """
+        import numpy as np, pandas as pd
+        from portfolio_optimizer import PortfolioOptimizer
+        optimizer = PortfolioOptimizer(pd.DataFrame(np.random.default_rng(0).normal(0, 0.01, (300, 4))))
+        optimizer.min_variance()
+    """
+    assert 'scipy.cluster' not in loaded_after(setup)
+    assert 'scipy.cluster' in loaded_after(setup + "    optimizer.hrp()\n")
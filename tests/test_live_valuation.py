@@ -0,0 +1,64 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from live_valuation import LiveValuation, PortfolioState, PriceSource, SimulatedPriceSource
+from portfolio_calculations import calculate_portfolio_value
+
+HOLDINGS = {'AAA': 10, 'BBB': 5, 'CCC': 3, 'DDD': 0}
+PRICES = {'AAA': 100.0, 'BBB': 250.0, 'CCC': 40.0, 'DDD': 75.0}
+TARGETS = {'AAA': 0.4, 'BBB': 0.4, 'CCC': 0.2}
+
+
+def assert_matches_full_recompute(state):
+    prices = dict(zip(state.tickers, state.prices.tolist()))
+    expected = calculate_portfolio_value(HOLDINGS, prices)
+    targets = np.array([TARGETS.get(t, 0.0) for t in state.tickers])
+
+    assert state.total_value == pytest.approx(expected['total_value'], rel=1e-12)
+    np.testing.assert_allclose(state.weights, expected['weights'], rtol=1e-12)
+    assert state.drift == pytest.approx(np.linalg.norm(expected['weights'] - targets), rel=1e-9)
+    assert state.turnover_to_target == pytest.approx(np.abs(expected['weights'] - targets).sum(), rel=1e-9)
+
+
+def test_price_source_is_abstract():
+    with pytest.raises(TypeError):
+        PriceSource()
+
+    class Incomplete(PriceSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize('resync_every', [100000, 7])
+def test_incremental_state_matches_a_full_recompute_after_a_stream(resync_every):
+    state = PortfolioState(HOLDINGS, PRICES, TARGETS, resync_every=resync_every)
+    # A volatile feed moves prices far from where the running sums started
+    source = SimulatedPriceSource(PRICES, volatility=0.02, seed=1, chunk_size=64)
+    stats = asyncio.run(LiveValuation(state, source).run(max_ticks=5000))
+
+    assert stats['ticks'] == state.updates == 5000
+    assert not np.allclose(state.prices, list(PRICES.values()))
+    assert_matches_full_recompute(state)
+
+
+def test_each_tick_matches_a_full_recompute():
+    state = PortfolioState(HOLDINGS, PRICES, TARGETS)
+    rng = np.random.default_rng(2)
+    for ticker, move in zip(rng.choice(list(HOLDINGS), 200), np.exp(rng.normal(0, 0.05, 200))):
+        value = state.update(ticker, state.prices[state.index[ticker]] * move)
+        assert value == state.total_value
+        assert state.weight(ticker) == pytest.approx(state.weights[state.index[ticker]], rel=1e-12)
+        assert_matches_full_recompute(state)
+
+
+def test_unknown_tickers_are_ignored_and_batches_keep_the_last_quote():
+    state = PortfolioState(HOLDINGS, PRICES, TARGETS)
+    assert state.update('ZZZ', 1.0) == state.total_value
+    state.update_many(['AAA', 'ZZZ', 'BBB', 'AAA'], [110.0, 1.0, 240.0, 120.0])
+    assert state.prices[state.index['AAA']] == 120.0
+    assert state.prices[state.index['BBB']] == 240.0
+    assert_matches_full_recompute(state)
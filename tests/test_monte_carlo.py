@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from monte_carlo import MonteCarloRisk
+
+
+@pytest.fixture(params=['normal', 't'])
+def model(request):
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0.0005, 0.01, (500, 6)) @ rng.uniform(0.5, 1.0, (6, 6)))
+    return MonteCarloRisk.from_returns(returns, distribution=request.param, chunk_size=3000)
+
+
+def test_results_do_not_depend_on_the_batch(model):
+    weights = np.random.default_rng(1).dirichlet(np.ones(6), 8)
+    batch = model.simulate(weights, num_paths=20000)
+    for k in range(len(weights)):
+        # Single portfolios and smaller batches use the same common random numbers
+        single = model.simulate(weights[k], num_paths=20000)
+        assert single['var'] == pytest.approx(batch['var'][k], rel=1e-12)
+        assert single['cvar'] == pytest.approx(batch['cvar'][k], rel=1e-12)
+    pair = model.simulate(weights[:2], num_paths=20000)
+    np.testing.assert_allclose(pair['var'], batch['var'][:2], rtol=1e-12)
+
+
+def test_simulate_matches_the_asset_scenarios(model):
+    weights = np.full(6, 1 / 6)
+    pnl = model.scenarios(num_paths=20000) @ weights
+    result = model.simulate(weights, num_paths=20000)
+    assert result['var'] == pytest.approx(np.percentile(pnl, 5), rel=1e-9)
+    assert result['cvar'] == pytest.approx(pnl[pnl <= result['var']].mean(), rel=1e-9)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from moments import RollingMoments
+from portfolio_optimizer import PortfolioOptimizer
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2020-01-01', periods=300)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (300, 4)), index=index, columns=['A', 'B', 'C', 'D'])
+
+
+def test_min_cvar_from_bounded_moments_uses_the_window(returns):
+    optimizer = PortfolioOptimizer.from_moments(RollingMoments.from_returns(returns, window=120))
+    expected = PortfolioOptimizer.from_moments(RollingMoments.from_returns(returns.iloc[-120:]))
+    result = optimizer.min_cvar(scenarios=None)
+    assert result['weights'].sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(
+        result['weights'], expected.min_cvar(scenarios=returns.iloc[-120:].to_numpy())['weights'], atol=1e-6
+    )
+
+
+def test_min_cvar_from_expanding_moments_needs_scenarios(returns):
+    optimizer = PortfolioOptimizer.from_moments(RollingMoments.from_returns(returns))
+    with pytest.raises(ValueError, match="scenarios required"):
+        optimizer.min_cvar()
+    result = optimizer.min_cvar(scenarios=returns.to_numpy())
+    assert result['weights'].sum() == pytest.approx(1.0)
+
+
+@pytest.fixture
+def dispersed_returns():
+    # Correlated assets with very different volatilities, so the closed forms
+    # short and the long-only QPs are solved
+    rng = np.random.default_rng(5)
+    market = rng.normal(0, 0.01, (400, 1))
+    noise = rng.normal(0, 0.004, (400, 8)) * np.linspace(0.5, 3, 8)
+    return pd.DataFrame(market * np.linspace(0.6, 1.4, 8) + noise + rng.uniform(0, 0.001, 8),
+                        columns=list('ABCDEFGH'))
+
+
+@pytest.mark.parametrize('covariance', ['sample', 'factor'])
+def test_update_matches_a_fresh_optimizer_and_keeps_the_compiled_qps(dispersed_returns, covariance):
+    optimizer = PortfolioOptimizer(dispersed_returns.iloc[:250], covariance=covariance)
+    optimizer.min_variance()
+    optimizer.max_sharpe_ratio()
+    problems = optimizer._min_variance_problem, optimizer._max_sharpe_problem
+    assert all(problem is not None for problem in problems)
+
+    for start in [50, 100, 150]:
+        window = dispersed_returns.iloc[start:start + 250]
+        optimizer.update(window)
+        fresh = PortfolioOptimizer(window, covariance=covariance)
+        np.testing.assert_allclose(optimizer.min_variance()['weights'], fresh.min_variance()['weights'], atol=1e-4)
+        np.testing.assert_allclose(optimizer.max_sharpe_ratio()['weights'], fresh.max_sharpe_ratio()['weights'],
+                                   atol=1e-4)
+    assert (optimizer._min_variance_problem, optimizer._max_sharpe_problem) == problems
+
+
+def test_update_pads_a_smaller_factor_and_recompiles_for_a_larger_one(dispersed_returns):
+    # With fewer rows than assets the sample factor is the T×N centered returns
+    optimizer = PortfolioOptimizer(dispersed_returns.iloc[:6])
+    optimizer.min_variance()
+    problem = optimizer._min_variance_problem
+
+    optimizer.update(dispersed_returns.iloc[6:11])
+    fresh = PortfolioOptimizer(dispersed_returns.iloc[6:11])
+    np.testing.assert_allclose(optimizer.min_variance()['weights'], fresh.min_variance()['weights'], atol=1e-4)
+    assert optimizer._min_variance_problem is problem
+
+    optimizer.update(dispersed_returns.iloc[:250])
+    fresh = PortfolioOptimizer(dispersed_returns.iloc[:250])
+    np.testing.assert_allclose(optimizer.min_variance()['weights'], fresh.min_variance()['weights'], atol=1e-4)
+    assert optimizer._min_variance_problem is not problem
+
+
+def test_update_rejects_other_assets(dispersed_returns):
+    optimizer = PortfolioOptimizer(dispersed_returns)
+    with pytest.raises(ValueError, match="optimizer's assets"):
+        optimizer.update(dispersed_returns.iloc[:, :4])
+
+
+def reference_qp(returns, objective):
+    """Long-only solution of a dense quad_form problem, independent of the optimizer's factor QPs"""
+    import cvxpy as cp
+    # Normalized so daily variances are not below the solver's tolerances
+    cov = returns.cov().values
+    cov = cov / np.diag(cov).mean()
+    mean = returns.mean().values
+    w = cp.Variable(returns.shape[1])
+    if objective == 'min_variance':
+        problem = cp.Problem(cp.Minimize(cp.quad_form(w, cov)), [cp.sum(w) == 1, w >= 0])
+        problem.solve(solver=cp.CLARABEL)
+        return w.value
+    problem = cp.Problem(cp.Minimize(cp.quad_form(w, cov)), [(mean / np.abs(mean).max()) @ w == 1, w >= 0])
+    problem.solve(solver=cp.CLARABEL)
+    return w.value / w.value.sum()
+
+
+@pytest.mark.parametrize('objective', ['min_variance', 'max_sharpe'])
+@pytest.mark.parametrize('data', ['returns', 'dispersed_returns'])
+def test_closed_form_and_qp_paths_match_a_dense_reference(objective, data, request):
+    # `returns` is solved in closed form, `dispersed_returns` needs the long-only QP
+    frame = request.getfixturevalue(data)
+    if objective == 'max_sharpe' and data == 'returns':
+        frame = frame + np.array([0.004, 0.003, 0.002, 0.001])
+    optimizer = PortfolioOptimizer(frame)
+    result = optimizer.min_variance() if objective == 'min_variance' else optimizer.max_sharpe_ratio()
+    np.testing.assert_allclose(result['weights'], reference_qp(frame, objective), atol=1e-4)
+
+
+def test_closed_forms_are_long_only_on_uncorrelated_assets(returns):
+    optimizer = PortfolioOptimizer(returns + np.array([0.004, 0.003, 0.002, 0.001]))
+    inverse = np.linalg.inv(optimizer.cov_matrix.values)
+    for weights, expected in [(optimizer.min_variance()['weights'], inverse @ np.ones(4)),
+                              (optimizer.max_sharpe_ratio()['weights'], inverse @ optimizer.mean_returns.values)]:
+        assert (expected > 0).all()
+        np.testing.assert_allclose(weights, expected / expected.sum(), rtol=1e-10)
+    assert optimizer._min_variance_problem is None and optimizer._max_sharpe_problem is None
+
+
+def test_unconstrained_weights_keep_the_short_positions(dispersed_returns):
+    optimizer = PortfolioOptimizer(dispersed_returns)
+    expected = np.linalg.solve(optimizer.cov_matrix.values, np.ones(8))
+    weights = optimizer.min_variance(long_only=False)['weights']
+    assert (weights < 0).any()
+    np.testing.assert_allclose(weights, expected / expected.sum(), rtol=1e-8)
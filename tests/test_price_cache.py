@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from data_fetcher import DataFetcher
+from price_cache import PriceCache
+from stub_provider import StubProvider
+
+
+@pytest.fixture
+def provider():
+    return StubProvider(latency=0.0)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PriceCache(str(tmp_path))
+
+
+def make_fetcher(provider, cache, offline=False):
+    return DataFetcher(ticker_factory=provider, cache=cache, offline=offline)
+
+
+def expected_prices(provider, ticker, start, end):
+    prices = provider.prices(ticker)
+    return prices[(prices.index >= pd.Timestamp(start)) & (prices.index < pd.Timestamp(end))]
+
+
+def assert_prices(actual, expected):
+    pd.testing.assert_series_equal(actual, expected, check_freq=False, check_names=False, check_index_type=False)
+
+
+def test_request_after_cached_range_fetches_the_gap(provider, cache):
+    fetcher = make_fetcher(provider, cache)
+    fetcher.fetch_yfinance_data(['AAA'], '2020-01-01', '2020-06-01')
+    fetcher.fetch_yfinance_data(['AAA'], '2022-01-01', '2022-06-01')
+
+    assert cache.coverage('AAA', 'Close') == (pd.Timestamp('2020-01-01'), pd.Timestamp('2022-06-01'))
+    assert cache.missing_ranges('AAA', 'Close', '2021-01-01', '2021-06-01') == []
+
+    calls = provider.calls
+    prices = fetcher.fetch_yfinance_data(['AAA'], '2021-01-01', '2021-06-01')
+    assert provider.calls == calls
+    assert_prices(prices['AAA'], expected_prices(provider, 'AAA', '2021-01-01', '2021-06-01'))
+
+
+def test_request_before_cached_range_fetches_the_gap(provider, cache):
+    fetcher = make_fetcher(provider, cache)
+    fetcher.fetch_yfinance_data(['AAA'], '2022-01-01', '2022-06-01')
+    fetcher.fetch_yfinance_data(['AAA'], '2020-01-01', '2020-06-01')
+    assert cache.missing_ranges('AAA', 'Close', '2021-01-01', '2021-06-01') == []
+    assert len(cache.load('AAA', 'Close', '2021-01-01', '2021-06-01')) > 0
+
+
+def test_partial_range_downloads_only_the_missing_dates(provider, cache):
+    fetcher = make_fetcher(provider, cache)
+    fetcher.fetch_yfinance_data(['AAA', 'BBB'], '2020-01-01', '2020-06-01')
+    assert cache.missing_ranges('AAA', 'Close', '2020-01-01', '2020-09-01') == \
+        [(pd.Timestamp('2020-06-01'), pd.Timestamp('2020-09-01'))]
+
+    calls = provider.calls
+    prices = fetcher.fetch_yfinance_data(['AAA', 'BBB'], '2020-01-01', '2020-09-01')
+    # One top-up download per ticker
+    assert provider.calls - calls == 2
+    for ticker in ['AAA', 'BBB']:
+        assert_prices(prices[ticker], expected_prices(provider, ticker, '2020-01-01', '2020-09-01'))
+
+
+def test_offline_hit_serves_the_cache_without_calls(provider, cache):
+    make_fetcher(provider, cache).fetch_yfinance_data(['AAA'], '2020-01-01', '2020-06-01')
+    calls = provider.calls
+
+    offline = make_fetcher(provider, cache, offline=True)
+    prices = offline.fetch_yfinance_data(['AAA'], '2020-02-01', '2020-05-01')
+    current = offline.get_current_prices(['AAA'])
+    assert provider.calls == calls
+    assert_prices(prices['AAA'], expected_prices(provider, 'AAA', '2020-02-01', '2020-05-01'))
+    assert current == {'AAA': pytest.approx(expected_prices(provider, 'AAA', '2020-01-01', '2020-06-01').iloc[-1])}
+
+
+def test_offline_miss_raises_without_calls(provider, cache):
+    offline = make_fetcher(provider, cache, offline=True)
+    with pytest.raises(Exception, match="offline mode"):
+        offline.fetch_yfinance_data(['AAA'], '2020-01-01', '2020-06-01')
+    assert offline.get_current_prices(['AAA']) == {}
+    assert provider.calls == 0
+
+
+def test_offline_range_outside_the_cache_raises(provider, cache):
+    make_fetcher(provider, cache).fetch_yfinance_data(['AAA'], '2020-01-01', '2020-06-01')
+    offline = make_fetcher(provider, cache, offline=True)
+    with pytest.raises(Exception, match="offline mode"):
+        offline.fetch_yfinance_data(['AAA'], '2023-01-01', '2023-06-01')
+
+
+def series(start, periods):
+    return pd.Series(range(1, periods + 1), index=pd.bdate_range(start, periods=periods), dtype=float)
+
+
+def test_last_access_survives_a_new_session(tmp_path, monkeypatch):
+    cache = PriceCache(str(tmp_path))
+    clock = iter([100.0, 200.0, 300.0])
+    monkeypatch.setattr('price_cache.time.time', lambda: next(clock))
+    cache.store('OLD', 'Close', series('2020-01-01', 10), '2020-01-01', '2020-01-15')
+    cache.store('NEW', 'Close', series('2020-01-01', 10), '2020-01-01', '2020-01-15')
+    cache.load('OLD', 'Close')
+
+    reopened = PriceCache(str(tmp_path))
+    one_series = reopened._index['Close/OLD']['bytes']
+    assert reopened.evict(max_bytes=one_series) == ['Close/NEW']
+    assert reopened.coverage('OLD', 'Close') is not None
+
+
+def test_top_up_keeps_the_original_fetch_time(tmp_path, monkeypatch):
+    cache = PriceCache(str(tmp_path))
+    now = [0.0]
+    monkeypatch.setattr('price_cache.time.time', lambda: now[0])
+    cache.store('AAA', 'Close', series('2020-01-01', 10), '2020-01-01', '2020-01-15')
+    now[0] = 5 * 86400
+    cache.store('AAA', 'Close', series('2020-01-15', 5), '2020-01-15', '2020-01-22')
+
+    assert PriceCache(str(tmp_path)).evict(max_age_days=3) == ['Close/AAA']
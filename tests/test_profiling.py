@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from profiling import Profiler, profiled, profiler
+
+
+@pytest.fixture
+def enabled_profiler(monkeypatch):
+    monkeypatch.setattr(profiler, 'enabled', True)
+    profiler.reset()
+    yield profiler
+    profiler.reset()
+
+
+def test_disabled_profiler_records_nothing():
+    quiet = Profiler(enabled=False)
+    with quiet.span('work', 'optimize') as span:
+        span.set(rows=1)
+    quiet.count('hits')
+    assert quiet.events == [] and not quiet.counters
+    assert quiet.summary().empty
+
+
+def test_spans_record_arguments_errors_and_the_event_cap():
+    recorder = Profiler(enabled=True, max_events=3)
+    with recorder.span('fetch', 'fetch', ticker='AAA') as span:
+        span.set(rows=10)
+    with pytest.raises(ValueError):
+        with recorder.span('solve', 'optimize'):
+            raise ValueError("infeasible")
+    for _ in range(5):
+        recorder.count('hits')
+        with recorder.span('score', 'risk'):
+            pass
+
+    assert [e['name'] for e in recorder.events] == ['fetch', 'solve', 'score']
+    assert recorder.events[0]['args'] == {'ticker': 'AAA', 'rows': 10}
+    assert recorder.events[1]['args'] == {'error': 'ValueError'}
+    assert recorder.counters['hits'] == 5
+    summary = recorder.summary()
+    assert summary.loc[('fetch', 'fetch'), 'count'] == 1
+
+
+def test_exports_are_valid_json_and_chrome_traces(tmp_path):
+    recorder = Profiler(enabled=True)
+    with recorder.span('fetch', 'fetch'):
+        pass
+    recorder.count('price_cache.hits', 2)
+
+    exported = json.loads(recorder.to_json(str(tmp_path / 'profile.json')))
+    assert exported['counters'] == {'price_cache.hits': 2}
+    assert exported['summary'][0]['name'] == 'fetch'
+
+    trace = json.loads(recorder.to_chrome_trace(str(tmp_path / 'trace.json')))['traceEvents']
+    assert [e['ph'] for e in trace] == ['X', 'C']
+    assert trace[0]['dur'] >= 0 and trace[1]['args'] == {'price_cache.hits': 2}
+    assert json.loads((tmp_path / 'trace.json').read_text())['traceEvents'] == trace
+
+
+def test_instrumented_stages_report_spans_and_solver_stats(enabled_profiler):
+    from portfolio_optimizer import PortfolioOptimizer
+    from risk_metrics import RiskMetrics
+
+    @profiled('risk', name='custom')
+    def score():
+        return 1
+
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0.0005, 0.01, (200, 4)) * [0.5, 1, 2, 4] + rng.normal(0, 0.01, (200, 1)))
+    optimizer = PortfolioOptimizer(returns)
+    optimizer.frontier_range()
+    optimizer.efficient_frontier(np.linspace(*optimizer.frontier_range(), 3))
+    RiskMetrics(returns).calculate_var(np.full(4, 0.25))
+    assert score() == 1
+
+    names = {(e['category'], e['name']) for e in enabled_profiler.events}
+    assert {('optimize', 'covariance.fit'), ('optimize', 'PortfolioOptimizer.min_variance'),
+            ('risk', 'RiskMetrics.calculate_var'), ('risk', 'custom')} <= names
+    solves = [e for e in enabled_profiler.events if e['name'] == 'frontier.solve']
+    assert len(solves) == 3
+    assert all(e['args']['status'] == 'optimal' and e['args']['solver'] for e in solves)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import Backtester
+from preprocessing import align_prices, compute_returns
+from returns_panel import ReturnsPanel
+from utils import calculate_log_returns, calculate_simple_returns
+
+
+@pytest.fixture
+def ragged_prices():
+    """Three tickers: one lists late, one has a short gap, one stops trading early"""
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2020-01-01', periods=400)
+    prices = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0.0005, 0.01, (400, 3)), axis=0),
+                          index=index, columns=['OLD', 'GAP', 'NEW'])
+    prices.iloc[:300, 2] = np.nan
+    prices.iloc[100:103, 1] = np.nan
+    return prices
+
+
+def test_compute_returns_keeps_each_ticker_history(ragged_prices):
+    returns = compute_returns(ragged_prices)
+    assert returns.index.equals(ragged_prices.index[1:])
+    assert returns['OLD'].notna().all()
+    assert returns['NEW'].notna().sum() == 99
+    # A return is missing exactly when either of its prices is
+    assert returns['GAP'].isna().sum() == 4
+    np.testing.assert_allclose(returns['OLD'], ragged_prices['OLD'].pct_change().iloc[1:])
+
+
+def test_how_any_keeps_only_the_common_history(ragged_prices):
+    returns = calculate_simple_returns(ragged_prices)
+    assert returns.notna().all().all()
+    assert returns.index[0] == ragged_prices.index[301]
+
+
+def test_log_returns_match_the_simple_ones(ragged_prices):
+    np.testing.assert_allclose(calculate_log_returns(ragged_prices, how='all'),
+                               np.log1p(compute_returns(ragged_prices)))
+    assert compute_returns(ragged_prices, 'log').equals(calculate_log_returns(ragged_prices, how='all'))
+
+
+def test_panel_returns_match_the_frame(ragged_prices):
+    with ReturnsPanel.from_frame(ragged_prices, backend='memmap') as panel:
+        for how in ('any', 'all'):
+            returns = calculate_simple_returns(panel, how=how)
+            pd.testing.assert_frame_equal(returns.to_frame(), calculate_simple_returns(ragged_prices, how=how),
+                                          check_freq=False)
+            returns.close()
+
+
+def test_align_prices_fills_short_gaps_only(ragged_prices):
+    aligned = align_prices(ragged_prices, max_fill=5)
+    assert aligned['GAP'].notna().all()
+    assert aligned['NEW'].isna().sum() == 300
+
+
+def test_backtest_keeps_history_before_a_late_listing(ragged_prices):
+    result = Backtester(ragged_prices, estimation_window=60, rebalance_frequency=20, max_workers=1).run()
+    weights = result['weights']
+    # Rebalancing starts after the first window, not after the late listing, and
+    # the new ticker is held once its 60 returns (from row 301) fill a window
+    assert weights.index[0] == ragged_prices.index[60]
+    assert (weights.loc[:ragged_prices.index[359], 'NEW'] == 0).all()
+    assert (weights.loc[ragged_prices.index[360]:, 'NEW'] > 0).any()
+    # Windows covering the gap hold nothing of the asset with missing dates
+    around_gap = weights.loc[ragged_prices.index[101]:ragged_prices.index[160], 'GAP']
+    assert (around_gap == 0).all()
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+    assert result['equity_curve'].notna().all()
@@ -0,0 +1,112 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from returns_panel import ReturnsPanel, as_frame
+
+BACKENDS = ['shared_memory', 'memmap']
+
+
+def private_memory_mb(payload=None) -> float:
+    """This process's private memory after reading every value of the payload"""
+    if payload is not None:
+        assert np.isfinite(as_frame(payload).to_numpy().sum())
+    with open('/proc/self/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return sum(int(fields[k].split()[0]) for k in ('Private_Clean', 'Private_Dirty')) / 1024
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2000-01-03', periods=2520)
+    return pd.DataFrame(rng.normal(0, 0.01, (2520, 2000)), index=index, columns=[f"T{i}" for i in range(2000)])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_round_trip_through_pickle(returns, backend):
+    with ReturnsPanel.from_frame(returns, backend=backend) as panel:
+        handle = pickle.dumps(panel)
+        assert len(handle) < returns.values.nbytes / 100
+        attached = pickle.loads(handle)
+        pd.testing.assert_frame_equal(attached.to_frame(), returns, check_freq=False)
+        attached.close()
+        # Closing an attached copy leaves the owner's buffer alone
+        pd.testing.assert_frame_equal(panel.to_frame(), returns, check_freq=False)
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason="needs Linux smaps_rollup")
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_workers_share_the_panel_instead_of_copying_it(returns, backend):
+    size_mb = returns.values.nbytes / 2 ** 20
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        pool.submit(private_memory_mb).result()
+        baseline = pool.submit(private_memory_mb).result()
+        with ReturnsPanel.from_frame(returns, backend=backend) as panel:
+            shared = pool.submit(private_memory_mb, panel).result() - baseline
+        # Last, as the allocator keeps the freed copy's pages afterwards
+        copied = pool.submit(private_memory_mb, returns).result() - baseline
+
+    # A pickled DataFrame is a private copy in the worker; the panel's pages are shared
+    assert copied > 0.75 * size_mb
+    assert shared < 0.25 * size_mb
+
+
+def test_memmap_file_is_removed_on_close(returns, tmp_path):
+    path = str(tmp_path / 'returns.npy')
+    panel = ReturnsPanel.from_frame(returns, backend='memmap', path=path)
+    derived = panel.derive(returns.to_numpy() * 2, returns.index)
+    assert os.path.exists(path) and os.path.exists(derived.location)
+
+    attached = pickle.loads(pickle.dumps(panel))
+    attached.close()
+    assert os.path.exists(path)
+
+    panel.close()
+    derived.close()
+    assert not os.path.exists(path)
+    assert not os.path.exists(derived.location)
+
+
+def test_shared_memory_block_is_unlinked_on_close(returns):
+    panel = ReturnsPanel.from_frame(returns, backend='shared_memory')
+    name = panel.location
+    attached = pickle.loads(pickle.dumps(panel))
+    attached.close()
+    block = shared_memory.SharedMemory(name=name)
+    block.close()
+
+    panel.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_close_refuses_while_views_are_alive(returns):
+    panel = ReturnsPanel.from_frame(returns, backend='shared_memory')
+    view = panel.to_frame()
+    with pytest.raises(BufferError):
+        panel.close()
+    del view
+    panel.close()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_select_views_adjacent_columns_and_copies_only_other_selections(returns, backend):
+    with ReturnsPanel.from_frame(returns, backend=backend) as panel:
+        adjacent = panel.select(['T10', 'T11', 'T12'])
+        scattered = panel.select(['T12', 'T5', 'T1999'])
+        pd.testing.assert_frame_equal(adjacent, returns[['T10', 'T11', 'T12']], check_freq=False)
+        pd.testing.assert_frame_equal(scattered, returns[['T12', 'T5', 'T1999']], check_freq=False)
+
+        assert np.shares_memory(adjacent.to_numpy(), panel.values)
+        assert not np.shares_memory(scattered.to_numpy(), panel.values)
+        assert scattered.to_numpy().nbytes == len(returns) * 3 * 8
+        assert 'T5' in panel and 'X' not in panel
+        with pytest.raises(KeyError, match="X"):
+            panel.select(['T5', 'X'])
+        del adjacent
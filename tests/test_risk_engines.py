@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_optimizer import PortfolioOptimizer
+from risk_engines import min_cvar_weights, risk_parity_weights
+
+
+@pytest.fixture
+def scenarios():
+    rng = np.random.default_rng(9)
+    market = rng.standard_t(4, (1500, 1)) * 0.01
+    return market * rng.uniform(0.5, 1.5, 8) + rng.normal(0, 0.01, (1500, 8)) * rng.uniform(0.5, 2, 8) + 0.0004
+
+
+def cvar_objective(scenarios: np.ndarray, weights: np.ndarray, alpha: float) -> float:
+    """Rockafellar-Uryasev objective min_ζ ζ + E[(loss - ζ)⁺]/α, minimized over ζ at the sample losses"""
+    losses = -scenarios @ weights
+    return min(zeta + np.maximum(losses - zeta, 0).sum() / (alpha * len(losses)) for zeta in losses)
+
+
+def test_risk_contributions_are_equal(scenarios):
+    cov = np.cov(scenarios, rowvar=False)
+    solution = risk_parity_weights(cov)
+    weights = solution['weights']
+    contributions = weights * (cov @ weights)
+    assert weights.sum() == pytest.approx(1.0) and (weights > 0).all()
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-7)
+    assert solution['max_deviation'] < 1e-7
+
+
+def test_risk_contributions_follow_the_budgets_on_correlated_assets():
+    # Pairwise correlation 0.95 and very different volatilities
+    vols = np.array([0.05, 0.1, 0.2, 0.4, 0.8])
+    cov = (0.95 + 0.05 * np.eye(5)) * np.outer(vols, vols)
+    budgets = np.array([1, 2, 3, 4, 5])
+    solution = risk_parity_weights(cov, budgets)
+    contributions = solution['weights'] * (cov @ solution['weights'])
+    np.testing.assert_allclose(contributions / contributions.sum(), budgets / budgets.sum(), rtol=1e-7)
+    assert solution['iterations'] < 20
+
+
+@pytest.mark.parametrize('budgets', [np.array([1.0, -1.0, 1.0]), np.ones(2)])
+def test_invalid_budgets_are_rejected(budgets):
+    with pytest.raises(ValueError, match="budgets"):
+        risk_parity_weights(np.eye(3), budgets)
+
+
+def test_optimizer_risk_parity_equalizes_contributions(scenarios):
+    optimizer = PortfolioOptimizer(pd.DataFrame(scenarios))
+    weights = optimizer.risk_parity()['weights']
+    contributions = weights * (optimizer.cov_matrix.values @ weights)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-7)
+
+
+@pytest.mark.parametrize('alpha', [0.01, 0.05, 0.2])
+@pytest.mark.parametrize('long_only, min_return', [(True, None), (False, None), (True, 0.0006)])
+def test_interior_point_cvar_matches_highs(scenarios, alpha, long_only, min_return):
+    ipm = min_cvar_weights(scenarios, alpha=alpha, long_only=long_only, min_return=min_return, method='ipm')
+    highs = min_cvar_weights(scenarios, alpha=alpha, long_only=long_only, min_return=min_return, method='highs')
+
+    # The LP optimum can be degenerate in the weights, but not in its value
+    assert ipm['cvar'] == pytest.approx(highs['cvar'], rel=1e-6)
+    assert -ipm['cvar'] == pytest.approx(cvar_objective(scenarios, ipm['weights'], alpha), rel=1e-6)
+    assert -highs['cvar'] == pytest.approx(cvar_objective(scenarios, highs['weights'], alpha), rel=1e-6)
+    assert ipm['weights'].sum() == pytest.approx(1.0)
+    if long_only:
+        assert (ipm['weights'] >= 0).all()
+    if min_return is not None:
+        assert scenarios.mean(axis=0) @ ipm['weights'] >= min_return - 1e-9
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_metrics import RiskMetrics
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(6)
+    index = pd.bdate_range('2020-01-01', periods=500)
+    return pd.DataFrame(rng.normal(0.0004, 0.01, (500, 5)), index=index, columns=list('ABCDE'))
+
+
+def test_portfolio_returns_are_memoized_per_weight_vector(returns):
+    metrics = RiskMetrics(returns)
+    weights = np.full(5, 0.2)
+    first = metrics.portfolio_returns(weights)
+    assert metrics.portfolio_returns(weights.copy()) is first
+    pd.testing.assert_series_equal(first, returns @ weights, check_names=False)
+
+    # The key is a copy of the weights, so changing them in place is a new entry
+    weights[0], weights[1] = 0.4, 0.0
+    changed = metrics.portfolio_returns(weights)
+    assert changed is not first
+    pd.testing.assert_series_equal(changed, returns @ weights, check_names=False)
+
+
+def test_least_recently_used_weights_are_evicted(returns):
+    metrics = RiskMetrics(returns, cache_size=2)
+    a, b, c = np.eye(5)[:3]
+    series_a = metrics.portfolio_returns(a)
+    series_b = metrics.portfolio_returns(b)
+    assert metrics.portfolio_returns(a) is series_a
+    metrics.portfolio_returns(c)
+
+    assert len(metrics._portfolio_cache) == 2
+    assert metrics.portfolio_returns(a) is series_a
+    assert metrics.portfolio_returns(b) is not series_b
+
+
+def test_every_metric_shares_one_product(returns, monkeypatch):
+    from profiling import profiler
+    monkeypatch.setattr(profiler, 'enabled', True)
+    profiler.reset()
+    metrics = RiskMetrics(returns)
+    weights = np.full(5, 0.2)
+    metrics.calculate_var(weights)
+    metrics.calculate_cvar(weights)
+    metrics.calculate_drawdown(weights)
+    counters = dict(profiler.counters)
+    profiler.reset()
+    assert counters['portfolio_returns.misses'] == 1
+    assert counters['portfolio_returns.hits'] == 2
+
+
+@pytest.mark.parametrize('alpha', [0.01, 0.05, 0.1])
+def test_batch_metrics_match_the_per_portfolio_metrics(returns, alpha):
+    rng = np.random.default_rng(7)
+    weights = rng.dirichlet(np.ones(5), 11)
+    metrics = RiskMetrics(returns)
+    # A small chunk size makes the batch cross chunk boundaries
+    batch = metrics.calculate_batch_metrics(weights, alpha=alpha, window=21, chunk_size=4)
+
+    for k, w in enumerate(weights):
+        portfolio = (returns @ w).to_numpy()
+        assert batch['var'][k] == pytest.approx(np.percentile(portfolio, alpha * 100), rel=1e-12)
+        assert batch['var'][k] == pytest.approx(metrics.calculate_var(w, alpha), rel=1e-12)
+        assert batch['cvar'][k] == pytest.approx(metrics.calculate_cvar(w, alpha), rel=1e-12)
+
+        drawdown = metrics.calculate_drawdown(w)
+        assert batch['max_drawdown'][k] == pytest.approx(drawdown['max_drawdown'], rel=1e-12)
+        assert batch['max_drawdown_period'][k] == drawdown['max_drawdown_period']
+
+        rolling = metrics.calculate_rolling_volatility(w, window=21).dropna()
+        assert batch['rolling_vol_mean'][k] == pytest.approx(rolling.mean(), rel=1e-9)
+        assert batch['rolling_vol_max'][k] == pytest.approx(rolling.max(), rel=1e-9)
+        assert batch['rolling_vol_last'][k] == pytest.approx(rolling.iloc[-1], rel=1e-9)
+
+
+def test_batch_rolling_volatility_is_nan_without_a_full_window(returns):
+    batch = RiskMetrics(returns.iloc[:10]).calculate_batch_metrics(np.full((2, 5), 0.2), window=21)
+    assert np.isnan(batch['rolling_vol_mean']).all()
+    assert np.isfinite(batch['var']).all()
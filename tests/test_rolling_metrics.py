@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_metrics import rolling_beta, rolling_mean_std, rolling_metrics, rolling_quantile, rolling_sharpe
+
+WINDOW = 20
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(4)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (200, 3)))
+
+
+@pytest.fixture
+def gappy_returns(returns):
+    # A lone gap, a run of gaps, and a series with missing history at the start
+    gappy = returns.copy()
+    gappy.iloc[50, 0] = np.nan
+    gappy.iloc[120:125, 1] = np.nan
+    gappy.iloc[:30, 2] = np.nan
+    return gappy
+
+
+@pytest.mark.parametrize('frame', ['returns', 'gappy_returns'])
+def test_mean_std_match_pandas(frame, request):
+    data = request.getfixturevalue(frame)
+    mean, std = rolling_mean_std(data.values, WINDOW)
+    np.testing.assert_allclose(mean, data.rolling(WINDOW).mean().values, atol=1e-12)
+    np.testing.assert_allclose(std, data.rolling(WINDOW).std().values, atol=1e-12)
+
+
+@pytest.mark.parametrize('frame', ['returns', 'gappy_returns'])
+@pytest.mark.parametrize('q', [0.0, 0.05, 0.5, 1.0])
+def test_quantile_matches_pandas(frame, q, request):
+    data = request.getfixturevalue(frame)
+    np.testing.assert_allclose(rolling_quantile(data.values, WINDOW, q),
+                               data.rolling(WINDOW).quantile(q).values, atol=1e-15)
+
+
+def test_windows_with_a_nan_are_nan(gappy_returns):
+    mean, _ = rolling_mean_std(gappy_returns.values, WINDOW)
+    assert np.isnan(mean[50:70, 0]).all() and not np.isnan(mean[[49, 70], 0]).any()
+    assert np.isnan(mean[120:144, 1]).all() and not np.isnan(mean[144:, 1]).any()
+    assert np.isnan(mean[:49, 2]).all() and not np.isnan(mean[49:, 2]).any()
+
+
+def test_window_longer_than_the_series_is_all_nan(returns):
+    assert np.isnan(rolling_mean_std(returns.values[:10], WINDOW)[0]).all()
+    assert np.isnan(rolling_quantile(returns.values[:10], WINDOW, 0.05)).all()
+
+
+def test_beta_matches_pandas(gappy_returns, returns):
+    market = returns[0].rename('market') * 0.8 + 0.001
+    market.iloc[90] = np.nan
+    expected = gappy_returns.rolling(WINDOW).cov(market) / market.rolling(WINDOW).var().values[:, None]
+    np.testing.assert_allclose(rolling_beta(gappy_returns.values, market.values, WINDOW), expected.values,
+                               rtol=1e-9)
+
+
+def test_metrics_use_the_rolling_sharpe(returns):
+    weights = np.array([[1, 0, 0], [0.2, 0.3, 0.5]])
+    results = rolling_metrics(returns.values, weights, window=WINDOW, risk_free_rate=0.02)
+    portfolios = returns.values @ weights.T
+    np.testing.assert_allclose(results['sharpe'], rolling_sharpe(portfolios, WINDOW, 0.02))
+
+    frame = pd.DataFrame(portfolios)
+    expected = (frame.rolling(WINDOW).mean() * 252 - 0.02) / (frame.rolling(WINDOW).std() * np.sqrt(252))
+    np.testing.assert_allclose(results['sharpe'], expected.values, rtol=1e-9)
+    np.testing.assert_allclose(results['var'], frame.rolling(WINDOW).quantile(0.05).values, atol=1e-15)
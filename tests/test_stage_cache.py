@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stage_cache import StageCache, fingerprint
+
+
+@pytest.fixture
+def prices():
+    index = pd.bdate_range('2020-01-01', periods=50)
+    return pd.DataFrame({'A': np.linspace(100, 110, 50), 'B': np.linspace(50, 45, 50)}, index=index)
+
+
+def test_equal_inputs_share_a_key(prices):
+    assert fingerprint(prices, 'sample', 0.02) == fingerprint(prices.copy(), 'sample', 0.02)
+    assert fingerprint({'a': 1, 'b': [np.ones(3)]}) == fingerprint({'b': [np.ones(3)], 'a': 1})
+
+
+@pytest.mark.parametrize('change', [
+    lambda p: p.assign(A=p['A'].where(p.index != p.index[10], 0.0)),
+    lambda p: p.iloc[:-1],
+    lambda p: p.set_axis(p.index + pd.Timedelta(days=1)),
+    lambda p: p.rename(columns={'B': 'C'}),
+    lambda p: p[['B', 'A']],
+    lambda p: p['A'],
+])
+def test_any_change_to_a_frame_changes_the_key(prices, change):
+    assert fingerprint(change(prices)) != fingerprint(prices)
+
+
+def test_array_dtype_shape_and_argument_order_change_the_key():
+    values = np.arange(6, dtype=float)
+    assert fingerprint(values) != fingerprint(values.astype(np.float32))
+    assert fingerprint(values) != fingerprint(values.reshape(2, 3))
+    assert fingerprint('sample', 0.02) != fingerprint(0.02, 'sample')
+    assert fingerprint([1, 2], 3) != fingerprint([1, 2, 3])
+
+
+def test_stages_recompute_only_when_their_inputs_change(prices):
+    cache = StageCache()
+    calls = []
+
+    def returns_for(frame):
+        calls.append('returns')
+        return frame.pct_change().dropna()
+
+    def model_for(returns, method):
+        calls.append('model')
+        return (returns.mean(), method)
+
+    def run(frame, method):
+        returns = cache.get_or_compute('returns', fingerprint(frame), lambda: returns_for(frame))
+        model_key = fingerprint(fingerprint(returns), method)
+        return cache.get_or_compute('model', model_key, lambda: model_for(returns, method))
+
+    run(prices, 'sample')
+    run(prices.copy(), 'sample')
+    assert calls == ['returns', 'model']
+
+    # A new setting only reruns the downstream stage
+    run(prices, 'ledoit_wolf')
+    assert calls == ['returns', 'model', 'model']
+
+    # New prices invalidate every stage below them
+    changed = prices.copy()
+    changed.iloc[-1, 0] += 1
+    run(changed, 'ledoit_wolf')
+    assert calls == ['returns', 'model', 'model', 'returns', 'model']
+    assert cache.stats == {'returns': {'hits': 2, 'misses': 2}, 'model': {'hits': 1, 'misses': 3}}
+
+
+def test_each_stage_keeps_its_most_recent_entries():
+    cache = StageCache(max_entries=2)
+    for key in ['a', 'b', 'a', 'c']:
+        cache.get_or_compute('stage', key, lambda: key.upper())
+    computed = []
+    assert cache.get_or_compute('stage', 'a', lambda: computed.append('a')) == 'A'
+    cache.get_or_compute('stage', 'b', lambda: computed.append('b'))
+    assert computed == ['b']
+
+    cache.clear()
+    assert cache.stats == {} and cache.stats_frame().empty
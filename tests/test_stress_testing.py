@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stress_testing import StressEngine
+
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(11)
+    index = pd.bdate_range('2019-06-03', periods=400)
+    frame = pd.DataFrame(rng.normal(-0.001, 0.02, (400, 5)), index=index, columns=TICKERS)
+    # EEE lists partway through the first window
+    frame.iloc[:120, 4] = np.nan
+    return frame
+
+
+@pytest.fixture
+def weights():
+    rng = np.random.default_rng(12)
+    long_only = rng.dirichlet(np.ones(5), 6)
+    long_short = np.array([[0.6, 0.5, -0.3, 0.2, 0.0]])
+    return np.vstack([long_only, long_short])
+
+
+def replay(returns: pd.DataFrame, weights: np.ndarray, start: str, end: str):
+    """Buy-and-hold day by day: P&L, max drawdown and per-asset contributions of one portfolio"""
+    window = returns.loc[(returns.index > start) & (returns.index <= end)].fillna(0.0)
+    positions = weights.astype(float).copy()
+    cash = 1 - weights.sum()
+    peak, max_drawdown = 1.0, 0.0
+    for _, day in window.iterrows():
+        positions = positions * (1 + day.to_numpy())
+        wealth = cash + positions.sum()
+        peak = max(peak, wealth)
+        max_drawdown = min(max_drawdown, wealth / peak - 1)
+    return wealth - 1, max_drawdown, positions - weights
+
+
+def test_evaluate_matches_a_full_replay(returns, weights):
+    engine = StressEngine(TICKERS)
+    windows = {'first': ('2019-07-01', '2019-12-31'), 'second': ('2020-01-15', '2020-09-30')}
+    for name, (start, end) in windows.items():
+        engine.add_historical(name, returns, start, end)
+    results = engine.evaluate(weights, top=2)
+
+    assert results['scenarios'] == ['first', 'second']
+    assert results['pnl'].shape == (2, len(weights)) and results['worst_assets'].shape == (2, len(weights), 2)
+    for s, (start, end) in enumerate(windows.values()):
+        for k, w in enumerate(weights):
+            pnl, max_drawdown, contributions = replay(returns, w, start, end)
+            assert results['pnl'][s, k] == pytest.approx(pnl, rel=1e-10)
+            assert results['max_drawdown'][s, k] == pytest.approx(max_drawdown, rel=1e-10, abs=1e-15)
+            assert results['pnl'][s, k] == pytest.approx(contributions.sum(), rel=1e-10)
+            worst = np.argsort(contributions)[:2]
+            np.testing.assert_array_equal(results['worst_assets'][s, k], worst)
+            np.testing.assert_allclose(results['worst_contributions'][s, k], contributions[worst], rtol=1e-10)
+
+
+def test_coverage_counts_the_days_with_data(returns):
+    engine = StressEngine(TICKERS)
+    engine.add_historical('first', returns, '2019-07-01', '2019-12-31')
+    window = returns.loc['2019-07-02':'2019-12-31']
+    expected_eee = window['EEE'].notna().mean()
+    coverage = engine.evaluate(np.eye(5))['coverage'][0]
+    np.testing.assert_allclose(coverage, [1, 1, 1, 1, expected_eee])
+    assert 0 < expected_eee < 1
+
+
+def test_shocks_are_a_single_step(weights):
+    engine = StressEngine(TICKERS)
+    engine.add_shock('crash', {'AAA': -0.3, 'BBB': -0.1}, default=-0.05)
+    shock = np.array([-0.3, -0.1, -0.05, -0.05, -0.05])
+    results = engine.evaluate(weights)
+    np.testing.assert_allclose(results['pnl'][0], weights @ shock)
+    np.testing.assert_allclose(results['max_drawdown'][0], np.minimum(weights @ shock, 0))
+    with pytest.raises(ValueError, match="Unknown tickers"):
+        engine.add_shock('bad', {'ZZZ': -0.1})
+
+
+def test_new_scenarios_only_evaluate_themselves(returns, weights, monkeypatch):
+    engine = StressEngine(TICKERS)
+    engine.add_historical('first', returns, '2019-07-01', '2019-12-31')
+    before = engine.evaluate(weights)
+
+    evaluated = []
+    original = engine._evaluate_scenarios
+    monkeypatch.setattr(engine, '_evaluate_scenarios',
+                        lambda names, *args: evaluated.append(list(names)) or original(names, *args))
+    engine.add_shock('crash', {'AAA': -0.3})
+    after = engine.evaluate(weights)
+    assert evaluated == [['crash']]
+    np.testing.assert_array_equal(after['pnl'][0], before['pnl'][0])
+
+    engine.remove('crash')
+    assert engine.evaluate(weights)['scenarios'] == ['first'] and evaluated == [['crash']]
@@ -0,0 +1,51 @@
+import pytest
+
+from data_fetcher import DataFetcher
+from symbol_index import SymbolIndex, build_index
+from stub_provider import StubProvider
+
+LISTING = [
+    ('AAPL', 'Apple Inc.', 'NASDAQ'),
+    ('AAL', 'American Airlines Group Inc.', 'NASDAQ'),
+    ('MSFT', 'Microsoft Corporation', 'NASDAQ'),
+    ('BAC', 'Bank of America Corporation', 'NYSE'),
+    ('BRK.B', 'Berkshire Hathaway Inc.', 'NYSE'),
+]
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    build_index(LISTING, str(tmp_path / 'index'))
+    return DataFetcher(ticker_factory=StubProvider(latency=0.0), symbol_index=SymbolIndex(str(tmp_path / 'index')))
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('apple', ['AAPL']),
+    ('bank america', ['BAC']),
+    ('Berkshire', ['BRK.B']),
+])
+def test_name_queries_only_offer_listed_symbols(fetcher, query, expected):
+    assert fetcher.get_available_tickers(query) == expected
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('microsft', ['MSFT']),
+    ('berkshre hathawy', ['BRK.B']),
+])
+def test_misspelled_names_are_not_offered_as_symbols(fetcher, query, expected):
+    assert fetcher.get_available_tickers(query) == expected
+
+
+def test_symbol_queries_rank_exact_then_prefix(fetcher):
+    assert fetcher.get_available_tickers('AAPL')[0] == 'AAPL'
+    assert fetcher.get_available_tickers('aa') == ['AAPL', 'AAL']
+
+
+@pytest.mark.parametrize('query', ['SPY', 'spy', '^GSPC', 'GC=F'])
+def test_unlisted_tickers_can_be_added_as_typed(fetcher, query):
+    assert fetcher.get_available_tickers(query)[-1] == query.upper()
+
+
+def test_ticker_label_names_listed_symbols(fetcher):
+    assert fetcher.ticker_label('AAPL') == 'AAPL · Apple Inc. (NASDAQ)'
+    assert fetcher.ticker_label('SPY') == 'SPY'
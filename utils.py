@@ -1,18 +1,51 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Union
+from profiling import profiled
+from returns_panel import ReturnsPanel
 
-def calculate_log_returns(prices: pd.DataFrame) -> pd.DataFrame:
+@profiled('returns')
+def calculate_log_returns(prices: Union[pd.DataFrame, ReturnsPanel],
+                          how: str = 'any') -> Union[pd.DataFrame, ReturnsPanel]:
     """
-    Calculate log returns from price data
+    Calculate log returns from price data (see returns_from_prices for `how`)
     """
-    return np.log(prices / prices.shift(1)).dropna()
+    return returns_from_prices(prices, log=True, how=how)
 
-def calculate_simple_returns(prices: pd.DataFrame) -> pd.DataFrame:
+@profiled('returns')
+def calculate_simple_returns(prices: Union[pd.DataFrame, ReturnsPanel],
+                             how: str = 'any') -> Union[pd.DataFrame, ReturnsPanel]:
     """
-    Calculate simple returns from price data
+    Calculate simple returns from price data (see returns_from_prices for `how`)
     """
-    return prices.pct_change().dropna()
+    return returns_from_prices(prices, log=False, how=how)
+
+def returns_from_prices(prices: Union[pd.DataFrame, ReturnsPanel], log: bool = False,
+                        how: str = 'any') -> Union[pd.DataFrame, ReturnsPanel]:
+    """
+    Simple or log returns in one vectorized pass, for a DataFrame or a shared
+    price panel (returned as a new panel on the same backend).
+
+    A return is NaN when either of its prices is missing. how='any' then drops
+    every date with a missing return, leaving only the common history;
+    how='all' only drops dates without any return, so each ticker keeps its
+    own (ragged) history.
+    """
+    if how not in ('any', 'all'):
+        raise ValueError("how must be 'any' or 'all'")
+    values = prices.values if isinstance(prices, ReturnsPanel) else prices.to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values[1:] / values[:-1]
+        returns = np.log(ratio, out=ratio) if log else np.subtract(ratio, 1, out=ratio)
+    returns[~np.isfinite(returns)] = np.nan
+
+    missing = np.isnan(returns)
+    keep = ~(missing.any(axis=1) if how == 'any' else missing.all(axis=1))
+    if not keep.all():
+        returns = returns[keep]
+    if isinstance(prices, ReturnsPanel):
+        return prices.derive(returns, prices.dates[1:][keep])
+    return pd.DataFrame(returns, index=prices.index[1:][keep], columns=prices.columns)
 
 def format_weights(weights: np.ndarray, assets: List[str]) -> Dict:
     """